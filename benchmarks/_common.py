@@ -0,0 +1,76 @@
+"""
+Shared by the benchmarks: puts `src` on the path, times calls, and swaps in a temporary
+database holding a synthetic catalog. Import it before any module of `src`.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+import os
+import sys
+import tempfile
+import time
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+os.chdir(SRC)
+
+from sqlalchemy import create_engine
+
+import _db_utils
+from _db_builder import BuildReport, invalidate_caches
+from _db_synthetic import SyntheticCatalog
+from _db_utils import SingletonModelBase
+
+
+BUDGET = 1.0    # seconds per measurement
+
+
+def elapsed(call: Callable[[], object]) -> float:
+    """
+    Seconds taken by one call, for what runs once, e.g. a build.
+    """
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def per_call(call: Callable[[], object], repeats: Optional[int] = None) -> float:
+    """
+    Mean microseconds per call after one warm up call, over `BUDGET` seconds or at most
+    `repeats` calls.
+    """
+    call()
+
+    start = time.perf_counter()
+    calls = 0
+
+    while (repeats is None or calls < repeats) and time.perf_counter() - start < BUDGET:
+        call()
+        calls += 1
+
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+@contextmanager
+def synthetic_database(catalog: SyntheticCatalog) -> Iterator[BuildReport]:
+    """
+    Build `catalog` into a temporary database and serve every lookup from it until the
+    block exits.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SingletonModelBase.get_instance().metadata.create_all(engine)
+        report = catalog.build(engine)
+        engine.dispose()
+
+        database = _db_utils.DATABASE
+        _db_utils.configure(database=str(path))
+        invalidate_caches()
+
+        try:
+            yield report
+
+        finally:
+            _db_utils.configure(database=database)
+            invalidate_caches()
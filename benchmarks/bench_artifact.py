@@ -0,0 +1,115 @@
+"""
+The `ItemManager`/`LootManager` path from the database against the same managers
+reading a compiled `CatalogArtifact`, on synthetic catalogs of 1k to 100k items: a
+fresh process up to its first item lookup, compiled loot table and `creature_value`
+(wall time, peak RSS and `CatalogArtifact.item` decodes), then the warm per-table cost.
+
+    python benchmarks/bench_artifact.py
+"""
+from pathlib import Path
+import json
+import subprocess
+import sys
+import tempfile
+
+from _common import per_call, SRC, synthetic_database
+
+import _db_utils
+from _db_artifact import compile_artifact
+from _db_synthetic import generate_catalog
+from catalog_artifact import CatalogArtifact
+from item_manager import ItemManager
+from loot import CreatureValues, LootTable
+from loot_manager import LootManager
+
+
+SIZES   = (1_000, 10_000, 100_000)
+REPEATS = 200
+
+PRELUDE = """
+import json, sys, time
+start = time.perf_counter()
+from catalog_artifact import CatalogArtifact
+decoded = []
+item = CatalogArtifact.item
+CatalogArtifact.item = lambda self, index: decoded.append(index) or item(self, index)
+"""
+
+FROM_DATABASE = PRELUDE + """
+import _db_utils
+_db_utils.configure(database=sys.argv[1])
+from item_manager import ItemManager
+from loot_manager import LootManager
+"""
+
+FROM_ARTIFACT = PRELUDE + """
+from item_manager import ItemManager
+from loot_manager import LootManager
+artifact = CatalogArtifact(sys.argv[2])
+ItemManager.use_artifact(artifact)
+LootManager.use_artifact(artifact)
+"""
+
+LOOKUPS = """
+ItemManager.Item.get_fm_name(sys.argv[4])
+table = LootManager.table(sys.argv[3])
+table.compiled, table.creature_value
+"""
+
+REPORT = """
+# Peak RSS of this process image, ru_maxrss would include the parent's from before exec.
+hwm = next(line for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(json.dumps([time.perf_counter() - start, int(hwm.split()[1]), len(decoded)]))
+"""
+
+
+def cold_start(code: str, *args: str):
+    output = subprocess.run(
+        [sys.executable, "-c", code + LOOKUPS + REPORT, *args], cwd=SRC, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+def warm(table: LootTable) -> float:
+    """
+    Microseconds to compile `table` and value it afresh, through the managers.
+    """
+
+    def compile_and_value():
+        CreatureValues.invalidate()
+        fresh = LootTable(table.creature, table.weights, table.all_loot, table.kinds)
+        return fresh.compiled, fresh.creature_value
+
+    return per_call(compile_and_value, REPEATS)
+
+
+if __name__ == '__main__':
+
+    print(f"{'items':>8} {'':>5} {'cold (s)':>9} {'peak':>8} {'decodes':>8} {'warm (us)':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            catalog = generate_catalog(items=size)
+            table, name = catalog.loot_tables[0], catalog.items[size // 2].name
+            path = str(Path(tmp) / f"{size}.bin")
+
+            with synthetic_database(catalog):
+                compile_artifact(path)
+                args = (_db_utils.DATABASE, path, table.creature.value, getattr(name, "value", name))
+                cold = [cold_start(code, *args) for code in (FROM_DATABASE, FROM_ARTIFACT)]
+
+                hot = [warm(table)]
+
+                with CatalogArtifact(path) as artifact:
+                    ItemManager.use_artifact(artifact)
+                    LootManager.use_artifact(artifact)
+
+                    try:
+                        hot.append(warm(table))
+
+                    finally:
+                        ItemManager.use_artifact(None)
+                        LootManager.use_artifact(None)
+
+            for source, (seconds, rss, decodes), micros in zip(("db", "art"), cold, hot):
+                print(f"{size:>8} {source:>5} {seconds:>9.3f} {rss / 1024:>5.0f}MiB {decodes:>8} {micros:>10.0f}")
@@ -0,0 +1,81 @@
+"""
+Load test of concurrent loot table lookups from asyncio: blocking calls on the event
+loop against `AccessWrapper.aget` on database executors of 1 to 16 threads, with the
+cache off so every lookup reaches SQLite. Reports throughput and the worst stall seen
+by a ticker task sharing the loop.
+
+    python benchmarks/bench_async.py
+"""
+import asyncio
+import random
+import time
+
+import _common   # puts `src` on the path, before any of its modules
+
+import _db_utils
+from _db_access_wrapper import AccessWrapper
+from enums import Monster
+from loot_manager import _model, as_loottable
+
+
+LOOKUPS = 2_000
+WORKERS = (1, 2, 4, 8, 16)
+TICK    = 0.001
+
+
+async def ticker(stop: asyncio.Event) -> float:
+    worst = 0.0
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - start - TICK)
+
+    return worst
+
+
+async def load(lookup) -> tuple:
+    monsters = [random.choice(list(Monster)) for _ in range(LOOKUPS)]
+    stop = asyncio.Event()
+    stall = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await lookup(monsters)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    return LOOKUPS / elapsed, await stall
+
+
+def blocking(tables: AccessWrapper):
+
+    async def lookup(monsters):
+        for monster in monsters:
+            tables.get_fm_name(monster)
+
+    return lookup
+
+
+def concurrent(tables: AccessWrapper):
+
+    async def lookup(monsters):
+        await asyncio.gather(*(tables.aget(monster) for monster in monsters))
+
+    return lookup
+
+
+if __name__ == '__main__':
+
+    tables = AccessWrapper(Monster, _model, as_loottable)
+    tables.get_fm_name(Monster.GOBLIN)  # Warm up mappers and the pool.
+
+    print(f"{'mode':<22} {'lookups/s':>10} {'worst stall':>12}")
+
+    rate, stall = asyncio.run(load(blocking(tables)))
+    print(f"{'blocking on the loop':<22} {rate:>10,.0f} {stall * 1000:>10.1f}ms")
+
+    for workers in WORKERS:
+        _db_utils.configure(async_workers=workers)
+        rate, stall = asyncio.run(load(concurrent(tables)))
+        print(f"{f'aget, {workers} workers':<22} {rate:>10,.0f} {stall * 1000:>10.1f}ms")
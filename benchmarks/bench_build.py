@@ -0,0 +1,36 @@
+"""
+Catalog build time: `CREATE_DATABASE` against `BUILD_DATABASE` on the shipped entries,
+then `BUILD_DATABASE` alone on a synthetic 100k item catalog.
+
+    python benchmarks/bench_build.py
+"""
+from pathlib import Path
+import tempfile
+
+from _common import elapsed
+
+import _db_utils
+from _db_builder import BUILD_DATABASE, CREATE_DATABASE, ZERO_DATABASE
+from _db_synthetic import generate_catalog
+from _db_utils import SingletonModelBase
+
+
+SYNTHETIC_ITEMS = 100_000
+
+
+def fresh(database: Path) -> None:
+    _db_utils.configure(database=str(database))
+    ZERO_DATABASE(SingletonModelBase.get_instance())
+
+
+if __name__ == '__main__':
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh(Path(tmp) / "orm.db")
+        print(f"CREATE_DATABASE, shipped catalog: {elapsed(CREATE_DATABASE):.3f}s")
+
+        fresh(Path(tmp) / "bulk.db")
+        print(f"BUILD_DATABASE, shipped catalog: {BUILD_DATABASE()}")
+
+        fresh(Path(tmp) / "synthetic.db")
+        print(f"BUILD_DATABASE, {SYNTHETIC_ITEMS:,} items: {generate_catalog(items=SYNTHETIC_ITEMS).build()}")
@@ -0,0 +1,82 @@
+"""
+Reader throughput while a writer keeps committing, under the default and the tuned
+`EngineProfile`. Runs on a copy of the shipped catalog.
+
+    python benchmarks/bench_engine.py
+"""
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+
+from _common import SRC
+
+from sqlalchemy.exc import OperationalError
+
+import _db_utils
+from _db_models import ItemModel
+from _db_utils import EngineProfile, session_scope
+from enums import ItemName
+
+
+READERS     = 8
+SECONDS     = 3.0
+
+
+def run(profile: EngineProfile, database: Path) -> dict:
+    _db_utils.configure(profile, str(database))
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def count(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with session_scope(read_only=True) as session:
+                    ItemModel.get_fm_name(session, ItemName.TOOLBOX).value
+                count("reads")
+
+            except OperationalError:
+                count("locked")
+
+    def writer():
+        value = 0
+        while not stop.is_set():
+            try:
+                with session_scope() as session:
+                    value += 1
+                    session.query(ItemModel).filter_by(name=ItemName.TRASH).update({"value": value})
+                count("writes")
+
+            except OperationalError:
+                count("locked")
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(SECONDS)
+    stop.set()
+
+    for thread in threads:
+        thread.join()
+
+    return {key: value / SECONDS for key, value in counts.items()}
+
+
+if __name__ == '__main__':
+
+    print(f"{'profile':>8} {'reads/s':>9} {'writes/s':>9} {'locked/s':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, profile in (("default", EngineProfile()), ("tuned", EngineProfile.tuned())):
+            database = Path(tmp) / f"{name}.db"
+            shutil.copy(SRC / "example.db", database)
+
+            result = run(profile, database)
+            print(f"{name:>8} {result['reads']:>9.0f} {result['writes']:>9.0f} {result['locked']:>9.0f}")
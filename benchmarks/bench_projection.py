@@ -0,0 +1,51 @@
+"""
+Projection queries against full rows on a synthetic catalog of `items` (100k by
+default): the values and names of one tag's items, and every item's name and value,
+read as plain tuples or as `ItemModel` rows converted by `as_item`.
+
+    python benchmarks/bench_projection.py [items]
+"""
+from typing import Callable
+import sys
+
+from _common import per_call, synthetic_database
+
+import _db_models as db
+from _db_synthetic import generate_catalog
+from _db_utils import session_scope
+from item_manager import as_item, ItemManager
+
+
+def rows(call: Callable[[object], list]) -> Callable[[], list]:
+
+    def load():
+        with session_scope(read_only=True) as session:
+            return [as_item(row) for row in call(session)]
+
+    return load
+
+
+if __name__ == '__main__':
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    catalog = generate_catalog(items=size, tags=max(20, size // 1_000), monsters=20)
+    tag = catalog.tags[len(catalog.tags) // 2]
+
+    with synthetic_database(catalog) as report:
+        print(f"{size:,} items built, {report}")
+
+        # Without a loaded catalog, as a process that only rolls loot.
+        timings = {
+            f"values_fm_tag('{tag}')": per_call(lambda: ItemManager.values_fm_tag(tag)),
+            f"ItemModel.gets_fm_tag('{tag}') values": per_call(
+                lambda: [item.value for item in rows(lambda session: db.ItemModel.gets_fm_tag(session, tag))()]
+            ),
+            f"names_fm_tag('{tag}')": per_call(lambda: ItemManager.names_fm_tag(tag)),
+            "select(('name', 'value')) of every item": per_call(lambda: ItemManager.select(("name", "value"))),
+            "ItemModel.gets_all names and values": per_call(
+                lambda: [(item.name, item.value) for item in rows(db.ItemModel.gets_all)()]
+            ),
+        }
+
+    for name, us in timings.items():
+        print(f"{name:<44}{us:>14,.1f} us")
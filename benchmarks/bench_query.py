@@ -0,0 +1,48 @@
+"""
+`ItemManager.query` on a synthetic catalog of `items` (100k by default): a filter
+mix compiled into one statement against intersecting the single criterion lookups
+in Python, and keyset pages near the start and the end of the order.
+
+    python benchmarks/bench_query.py [items]
+"""
+import sys
+
+from _common import per_call, synthetic_database
+
+from _db_synthetic import generate_catalog
+from enums import Quality
+from item_manager import ItemManager
+
+
+if __name__ == '__main__':
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    catalog = generate_catalog(items=size, tags=max(20, size // 1_000), monsters=20)
+    first, second = catalog.tags[0], catalog.tags[1]
+
+    with synthetic_database(catalog) as report:
+        print(f"{size:,} items built, {report}")
+        ItemManager.catalog()
+
+        query = ItemManager.query().all_tags(first, second).of_quality(Quality.RARE).value_between(high=1_000)
+
+        def intersect():
+            rare = {id(item) for item in ItemManager.gets_fm_quality(Quality.RARE)}
+            return [
+                item for item in ItemManager.gets_fm_tag(first)
+                if id(item) in rare and second in item.tags and item.value <= 1_000
+            ]
+
+        by_value = ItemManager.query().order_by("value")
+        last = by_value.page(size - 50).after
+
+        timings = {
+            "query(all_tags, quality, value).all()": per_call(query.all),
+            "intersecting lookups in Python": per_call(intersect),
+            "order_by('value').page(50)": per_call(lambda: by_value.page(50)),
+            "order_by('value').page(50, near the end)": per_call(lambda: by_value.page(50, last)),
+            "order_by('value').stream() in full": per_call(lambda: sum(1 for _ in by_value.stream())),
+        }
+
+    for name, us in timings.items():
+        print(f"{name:<44}{us:>14,.1f} us")
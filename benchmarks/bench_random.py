@@ -0,0 +1,73 @@
+"""
+Latency of one random pick by tag, `ORDER BY random()` against the cached id arrays
+of `QueryBase._get_fm_random`, on catalogs of 100 to 100k items.
+
+    python benchmarks/bench_random.py
+"""
+from pathlib import Path
+import tempfile
+
+from _common import per_call
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import Session
+
+import _db_models as db
+from enums import Quality, Tag
+
+
+SIZES   = (100, 1_000, 10_000, 100_000)
+PICKS   = 200   # per measurement at most, slow paths stop at `_common.BUDGET`
+
+
+def build(path: Path, size: int):
+    engine = create_engine(f"sqlite:///{path}")
+    db.ModelBase.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.execute(insert(db.QualityModel), [{"id": 1, "name": Quality.COMMON}])
+        session.execute(insert(db.TagModel), [{"id": i, "name": tag} for i, tag in enumerate(Tag, 1)])
+        session.execute(insert(db.ItemModel), [
+            {
+                "id": i, "name": f"Item {i}", "weight": 1, "value": i, "description": "",
+                "quality_id": 1, "craftable": False,
+            }
+            for i in range(1, size + 1)
+        ])
+        session.execute(insert(db.Item_Tag), [
+            {"item_id": i, "tag_id": i % len(Tag) + 1} for i in range(1, size + 1)
+        ])
+        session.commit()
+
+    return engine
+
+
+def order_by_random(session: Session, tag: Tag):
+    return (
+        session.query(db.ItemModel)
+        .filter(db.ItemModel.tags.any(name=tag))
+        .order_by(func.random())
+        .first()
+    )
+
+
+def time_picks(session: Session, pick) -> float:
+    # The warm up call fills the id cache.
+    return per_call(lambda: pick(session, Tag.JUNK), PICKS)
+
+
+if __name__ == '__main__':
+
+    print(f"{'items':>8} {'order_by_random':>16} {'cached_ids':>12}  (us per pick)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            engine = build(Path(tmp) / f"{size}.db", size)
+            db.QueryBase.invalidate_ids()
+
+            with Session(engine) as session:
+                before = time_picks(session, order_by_random)
+                after = time_picks(session, db.ItemModel.get_fm_tag_random)
+
+            print(f"{size:>8} {before:>16.0f} {after:>12.0f}")
+            engine.dispose()
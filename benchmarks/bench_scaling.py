@@ -0,0 +1,89 @@
+"""
+How the hot paths scale with catalog size. Synthetic catalogs of 10^2 items up to
+`max_items` (10^6 by default) are written by `_db_synthetic`, then each path is timed
+and the exponent k of time ~ n^k fitted over the sizes.
+
+    python benchmarks/bench_scaling.py [max_items]
+"""
+from typing import Dict, List
+import sys
+
+from _common import elapsed, per_call, synthetic_database
+
+import numpy as np
+
+import _db_models as db
+from _db_synthetic import generate_catalog
+from _db_utils import session_scope
+from item_manager import ItemManager
+from loot import LootTable
+from loot_manager import as_loottable
+
+
+REPEATS = 200   # calls per measurement at most, slow paths stop at `_common.BUDGET`
+LEVEL   = 1_000
+
+
+def measure(size: int) -> Dict[str, float]:
+    catalog = generate_catalog(items=size, tags=max(20, size // 1_000), monsters=20)
+
+    with synthetic_database(catalog) as report:
+        timings = {"build": report.seconds * 1e6}
+
+        tag, name, monster = catalog.tags[0], catalog.items[size // 2].name, catalog.monsters[0]
+        timings["ItemManager.reload"] = elapsed(ItemManager.reload) * 1e6
+        timings["ItemManager.Item.get_fm_name"] = per_call(lambda: ItemManager.Item.get_fm_name(name), REPEATS)
+        timings["ItemManager.get_fm_tag_random"] = per_call(lambda: ItemManager.get_fm_tag_random(tag), REPEATS)
+
+        with session_scope(read_only=True) as session:
+            timings["ItemModel.get_fm_name"] = per_call(lambda: db.ItemModel.get_fm_name(session, name), REPEATS)
+            timings["ItemModel.get_fm_tag_random"] = per_call(
+                lambda: db.ItemModel.get_fm_tag_random(session, tag), REPEATS
+            )
+            timings["as_loottable"] = per_call(
+                lambda: as_loottable(db.LootTableModel.get_fm_name(session, monster)), REPEATS
+            )
+
+        table = catalog.loot_tables[0]
+        timings["LootTable.compiled"] = per_call(
+            lambda: LootTable(table.creature, table.weights, table.all_loot, table.kinds).compiled, REPEATS
+        )
+        timings[f"encounter_by_level({LEVEL})"] = per_call(lambda: table.encounter_by_level(LEVEL), REPEATS)
+
+    return timings
+
+
+def complexity(sizes: List[int], times: List[float]) -> str:
+    k = np.polyfit(np.log(sizes), np.log(times), 1)[0]
+
+    if k < 0.15:
+        label = "O(1)"
+
+    elif k < 0.7:
+        label = "sublinear"
+
+    elif k < 1.3:
+        label = "O(n)"
+
+    else:
+        label = "superlinear"
+
+    return f"n^{k:.2f} {label}"
+
+
+if __name__ == '__main__':
+
+    max_items = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [10 ** e for e in range(2, 7) if 10 ** e <= max_items]
+    results = {}
+
+    for size in sizes:
+        results[size] = measure(size)
+        print(f"{size:,} items measured", file=sys.stderr)
+
+    print(f"{'path':<34}" + "".join(f"{size:>12,}" for size in sizes) + "  scaling  (us)")
+
+    for path in results[sizes[0]]:
+        times = [results[size][path] for size in sizes]
+        fit = complexity(sizes, times) if len(sizes) > 1 else ""
+        print(f"{path:<34}" + "".join(f"{t:>12,.0f}" for t in times) + f"  {fit}")
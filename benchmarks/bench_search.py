@@ -0,0 +1,52 @@
+"""
+`ItemManager.search` against scanning every item's text in Python, on a synthetic
+catalog of `items` (100k by default). A selective word matches one item, a common
+word matches every item and has to be ranked in full.
+
+    python benchmarks/bench_search.py [items]
+"""
+import sys
+
+from _common import per_call, synthetic_database
+
+import _db_models as db
+from _db_synthetic import generate_catalog
+from _db_utils import session_scope
+from enums import Quality
+from item_manager import ItemManager
+
+
+def scan(word: str, limit: int = 10):
+    return [
+        item for item in ItemManager.catalog().items
+        if word in item.description.lower() or word in (item.flavor_text or "").lower()
+    ][:limit]
+
+
+if __name__ == '__main__':
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    catalog = generate_catalog(items=size, tags=max(20, size // 1_000), monsters=20)
+    selective, common, tag = str(size // 2), "synthetic", catalog.tags[0]
+
+    with synthetic_database(catalog) as report:
+        print(f"{size:,} items built, {report}")
+        ItemManager.catalog()
+
+        timings = {
+            f"ItemManager.search('{selective}')": per_call(lambda: ItemManager.search(selective)),
+            f"ItemManager.search('{common}')": per_call(lambda: ItemManager.search(common)),
+            f"ItemManager.search('{common}', tag)": per_call(lambda: ItemManager.search(common, tag=tag)),
+            f"ItemManager.search('{common}', quality)": per_call(
+                lambda: ItemManager.search(common, quality=Quality.LEGENDARY)
+            ),
+            f"scan('{selective}')": per_call(lambda: scan(selective)),
+        }
+
+        with session_scope(read_only=True) as session:
+            timings[f"ItemModel.search_ids('{selective}')"] = per_call(
+                lambda: db.ItemModel.search_ids(session, selective)
+            )
+
+    for name, us in timings.items():
+        print(f"{name:<44}{us:>14,.1f} us")
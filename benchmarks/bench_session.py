@@ -0,0 +1,40 @@
+"""
+Per-lookup overhead of `session_scope` on the shipped catalog: a session committed
+per lookup, a read-only session per lookup, and one `shared_session` for all lookups.
+
+    python benchmarks/bench_session.py
+"""
+from _common import per_call
+
+from _db_models import MonsterModel
+from _db_utils import session_scope, shared_session
+from enums import Monster
+
+
+LOOKUPS = 5_000
+
+
+def lookup(read_only: bool) -> None:
+    with session_scope(read_only=read_only) as session:
+        MonsterModel.get_fm_name(session, Monster.GOBLIN)
+
+
+def committed() -> float:
+    return per_call(lambda: lookup(read_only=False), LOOKUPS)
+
+
+def read_only() -> float:
+    return per_call(lambda: lookup(read_only=True), LOOKUPS)
+
+
+def shared() -> float:
+    with shared_session(read_only=True):
+        return per_call(lambda: lookup(read_only=True), LOOKUPS)
+
+
+if __name__ == '__main__':
+
+    read_only()  # Warm up the pool and mappers.
+
+    for name, run in (("commit per lookup", committed), ("read-only", read_only), ("shared session", shared)):
+        print(f"{name:>18}: {run():7.1f} us per lookup")
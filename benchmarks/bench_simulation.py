@@ -0,0 +1,47 @@
+"""
+Throughput of `simulate_encounters` against the number of worker processes, from the
+database and from a compiled `CatalogArtifact`. Each run includes starting the pool,
+as every call does. Speedup is against one worker from the same source.
+
+    python benchmarks/bench_simulation.py [encounters]
+"""
+from pathlib import Path
+import os
+import sys
+import tempfile
+
+from _common import elapsed
+
+from _db_artifact import compile_artifact
+from simulation import simulate_encounters
+
+
+ENCOUNTERS  = 1_000_000
+LEVELS      = 10
+
+
+def throughput(encounters: int, workers: int, artifact=None) -> float:
+    return encounters / elapsed(
+        lambda: simulate_encounters(encounters, seed=42, workers=workers, mob_level_max=LEVELS, artifact=artifact)
+    )
+
+
+if __name__ == '__main__':
+
+    encounters = int(sys.argv[1]) if len(sys.argv) > 1 else ENCOUNTERS
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, cpus, 2 * cpus} - {0})
+
+    print(f"{encounters} encounters of levels 1-{LEVELS}, {cpus} CPUs")
+    print(f"{'workers':>8} {'database':>18} {'artifact':>18}  (encounters/s, speedup)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = str(Path(tmp) / "catalog.bin")
+        compile_artifact(artifact)
+        single = None
+
+        for workers in counts:
+            rates = [throughput(encounters, workers), throughput(encounters, workers, artifact)]
+            single = single or rates
+
+            print(f"{workers:>8}" + "".join(f" {rate:>11,.0f} {rate / base:>5.2f}x" for rate, base in zip(rates, single)))
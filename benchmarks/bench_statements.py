@@ -0,0 +1,43 @@
+"""
+Per-call overhead of the `_db_models` lookup classmethods on the shipped catalog,
+with SQLite's own work kept small, so statement construction and compilation show.
+Each lookup is timed with its statement built afresh on every call, as before the
+statements were cached, and with the cached statement.
+
+    python benchmarks/bench_statements.py
+"""
+from _common import per_call
+
+import _db_models as db
+from _db_utils import session_scope
+from enums import ItemName, Monster, Quality, Tag
+
+
+CALLS = 2_000   # per measurement at most, slow lookups stop at `_common.BUDGET`
+
+LOOKUPS = {
+    "QualityModel.get_fm_name"          : lambda session: db.QualityModel.get_fm_name(session, Quality.COMMON),
+    "TagModel.get_fm_id"                : lambda session: db.TagModel.get_fm_id(session, 3),
+    "ItemModel.get_fm_name"             : lambda session: db.ItemModel.get_fm_name(session, ItemName.TOOLBOX),
+    "ItemModel.get_fm_tag_random"       : lambda session: db.ItemModel.get_fm_tag_random(session, Tag.JUNK),
+    "ItemModel.samples_fm_tag"          : lambda session: db.ItemModel.samples_fm_tag(session, Tag.JUNK, 3),
+    "ItemModel.gets_fm_tag"             : lambda session: db.ItemModel.gets_fm_tag(session, Tag.TOOL),
+    "LootTableModel.get_fm_name"        : lambda session: db.LootTableModel.get_fm_name(session, Monster.GOBLIN),
+    "LootTableModel.gets_monster_fm_item": lambda session: db.LootTableModel.gets_monster_fm_item(session, ItemName.SAW),
+}
+
+
+def rebuilt(session, lookup) -> None:
+    db.QueryBase._statements.clear()
+    lookup(session)
+
+
+if __name__ == '__main__':
+
+    print(f"{'lookup':<38} {'rebuilt':>8} {'cached':>8} {'speedup':>8}  (us per call)")
+
+    with session_scope(read_only=True) as session:
+        for name, lookup in LOOKUPS.items():
+            before = per_call(lambda: rebuilt(session, lookup), CALLS)
+            after = per_call(lambda: lookup(session), CALLS)
+            print(f"{name:<38} {before:>8.0f} {after:>8.0f} {before / after:>7.1f}x")
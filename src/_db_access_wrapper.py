@@ -1,77 +1,188 @@
-
+from contextlib import AbstractContextManager
 from enum import Enum
-from typing import Generic, List, TypeVar
+from typing import Callable, FrozenSet, Generic, Hashable, Iterable, List, Optional, TYPE_CHECKING, TypeVar, Union
 
-from sqlalchemy.orm.exc import NoResultFound
+from _db_cache import LRUCache
+from _db_invalidation import InvalidationBus
 
-from _db_models import ModelBase, QueryBase
-from _db_utils import session_scope
+if TYPE_CHECKING:
+    from _db_models import ModelBase, QueryBase
 
-ModelType = TypeVar('ModelType', bound=ModelBase)
-QueryType = TypeVar('QueryType', bound=QueryBase)
+ModelType = TypeVar('ModelType', bound='ModelBase')
+QueryType = TypeVar('QueryType', bound='QueryBase')
 
+_MISSING = object()
 
-class AccessWrapper:
 
-    def __init__(self, keys, model, result_converter):
+def _read_session() -> AbstractContextManager:
+    # Imported on first lookup, SQLAlchemy is not loaded until then.
+    from _db_utils import session_scope
+    return session_scope(read_only=True)
+
+
+async def _in_db_executor(call: Callable, *args) -> object:
+    from _db_utils import run_in_db_executor
+    return await run_in_db_executor(call, *args)
+
+
+def _no_result(message: str) -> Exception:
+    from sqlalchemy.orm.exc import NoResultFound
+    return NoResultFound(message)
+
+
+class AccessWrapper:
+    """
+    Attribute, item and lookup access to the rows of `model`, converted by
+    `result_converter`. `model` may be a callable returning the model class, which is
+    then first called on the first lookup. Changes published for `tables` evict the
+    cached results of the changed keys, changes to `depends_on` evict every result.
+    """
+
+    def __init__(
+        self,
+        keys,
+        model               : Union[type, Callable[[], type]],
+        result_converter,
+        cache               : Optional[LRUCache] = None,
+        tables              : Iterable[str] = (),
+        depends_on          : Iterable[str] = ()
+    ):
         self.keys               : Enum = keys  # TODO: Redundent?
-        self.model              : Generic[ModelType, QueryType] = model
+        self._model             : Union[type, Callable[[], type]] = model
         self.result_converter = result_converter
+        self.cache              : Optional[LRUCache] = cache
 
-    def __getattr__(self, name: Enum) -> object:
+        if cache is not None:
+            InvalidationBus.subscribe(tables, self._evict)
+            InvalidationBus.subscribe(depends_on, lambda keys: self.invalidate())
 
-        with session_scope() as session:
+    @property
+    def model(self) -> Generic[ModelType, QueryType]:
+        if not isinstance(self._model, type):
+            self._model = self._model()
 
-            if not (_name := getattr(self.keys, name, None)):
-                raise AttributeError(f"{name} is not a valid attribute")
+        return self._model
 
-            if not (query := self.model.get_fm_name(session, _name)):
-                raise NoResultFound(f"Query '{name}' returned no results.")
+    def _cached(self, key: Hashable, load) -> object:
+        if self.cache is None:
+            return load()
 
-            return self.result_converter(query)
+        return self.cache.get_or_load(key, load)
 
-    def __getitem__(self, name: Enum) -> object:
+    def _fm_name(self, name: Enum, _name: Enum) -> object:
 
-        with session_scope() as session:
+        def load():
+            with _read_session() as session:
 
-            if not (_name := getattr(self.keys, name.name, None)):
-                raise AttributeError(f"{name} is not a valid attribute")
+                if not (query := self.model.get_fm_name(session, _name)):
+                    raise _no_result(f"Query '{name}' returned no results.")
 
-            if not (query := self.model.get_fm_name(session, _name)):
-                raise NoResultFound(f"Query '{name}' returned no results.")
+                return self.result_converter(query)
 
-            return self.result_converter(query)
+        return self._cached(_name, load)
+
+    def __getattr__(self, name: Enum) -> object:
+
+        if not (_name := getattr(self.keys, name, None)):
+            raise AttributeError(f"{name} is not a valid attribute")
+
+        return self._fm_name(name, _name)
+
+    def __getitem__(self, name: Union[Enum, str]) -> object:
+
+        if not isinstance(name, Enum):
+            # A plain name, e.g. from a synthetic catalog, is looked up as it is.
+            return self._fm_name(name, name)
+
+        if not (_name := getattr(self.keys, name.name, None)):
+            raise AttributeError(f"{name} is not a valid attribute")
+
+        return self._fm_name(name, _name)
 
     @property
     def random(self) -> object:
-        with session_scope() as session:
+        with _read_session() as session:
 
             if not (query := self.model.get_fm_random(session)):
-                raise NoResultFound(f"Query returned no results.")
+                raise _no_result(f"Query returned no results.")
 
             return self.result_converter(query)
 
     @property
     def all_results(self) -> List[object]:
-        with session_scope() as session:
 
-            if not (query := self.model.gets_all(session)):
-                raise NoResultFound(f"Query returned no results.")
+        def load():
+            with _read_session() as session:
+
+                if not (query := self.model.gets_all(session)):
+                    raise _no_result(f"Query returned no results.")
+
+                return [self.result_converter(row) for row in query]
 
-            return [self.result_converter(row) for row in query]
+        return list(self._cached(("all",), load))
 
     def get_fm_id(self, id: int) -> object:
-        with session_scope() as session:
 
-            if not (query := self.model.get_fm_id(session, id)):
-                raise NoResultFound(f"Query returned no results.")
+        def load():
+            with _read_session() as session:
 
-            return self.result_converter(query)
+                if not (query := self.model.get_fm_id(session, id)):
+                    raise _no_result(f"Query returned no results.")
+
+                return self.result_converter(query)
+
+        return self._cached(("id", id), load)
 
     def get_fm_name(self, name: Enum) -> object:
-        with session_scope() as session:
+        return self._fm_name(name, name)
 
-            if not (query := self.model.get_fm_name(session, name)):
-                raise NoResultFound(f"Query returned no results.")
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop one cached result, by key name or `("id", id)`, or every result.
+        """
+        if self.cache is None:
+            return
 
-            return self.result_converter(query)
+        if key is None:
+            self.cache.clear()
+
+        else:
+            self.cache.invalidate(key)
+
+    def _evict(self, keys: Optional[FrozenSet[Hashable]]) -> None:
+        if keys is None:
+            self.invalidate()
+            return
+
+        for key in keys:
+            self.cache.invalidate(key)
+
+        self.cache.invalidate(("all",))
+
+    def _cache_get(self, key: Hashable) -> object:
+        return _MISSING if self.cache is None else self.cache.get(key, _MISSING)
+
+    async def aget(self, name: Enum) -> object:
+        """
+        `get_fm_name` for asyncio code. A cached result is returned straight away,
+        anything else is loaded on the database executor.
+        """
+        if (value := self._cache_get(name)) is not _MISSING:
+            return value
+
+        return await _in_db_executor(self.get_fm_name, name)
+
+    async def aget_fm_id(self, id: int) -> object:
+        if (value := self._cache_get(("id", id))) is not _MISSING:
+            return value
+
+        return await _in_db_executor(self.get_fm_id, id)
+
+    async def arandom(self) -> object:
+        return await _in_db_executor(lambda: self.random)
+
+    async def aall_results(self) -> List[object]:
+        if (value := self._cache_get(("all",))) is not _MISSING:
+            return list(value)
+
+        return await _in_db_executor(lambda: self.all_results)
@@ -0,0 +1,201 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+import hashlib
+import os
+
+from sqlalchemy.engine import Connection, Engine
+
+from _db_utils import get_engine
+from catalog_artifact import (
+    CatalogArtifact, HEADER, ITEM, KIND_ITEM, KIND_TAG, LOOT_ENTRY, LOOT_TABLE, MAGIC, MATERIAL,
+    NONE, TAG, U32, VERSION
+)
+
+import _db_models as db
+
+
+# Every table the artifact is compiled from, with the columns that order its rows.
+SOURCE_TABLES = (
+    (db.TagModel.__tablename__, "id"),
+    (db.QualityModel.__tablename__, "id"),
+    (db.MonsterModel.__tablename__, "id"),
+    (db.MaterialModel.__tablename__, "id"),
+    (db.ItemModel.__tablename__, "id"),
+    (db.Item_Tag.name, "item_id, tag_id"),
+    (db.Item_Material.name, "item_id, material_id"),
+    (db.LootTableModel.__tablename__, "id"),
+    (db.LootEntryModel.__tablename__, "loot_table_id, position"),
+)
+
+
+def source_hash(conn: Connection) -> bytes:
+    """
+    SHA-256 over every row of the catalog tables, in primary key order.
+    """
+    digest = hashlib.sha256()
+
+    for table, order in SOURCE_TABLES:
+        digest.update(table.encode())
+
+        for row in conn.exec_driver_sql(f'SELECT * FROM "{table}" ORDER BY {order}'):
+            digest.update(repr(tuple(row)).encode())
+
+    return digest.digest()
+
+
+class _Strings:
+
+    def __init__(self):
+        self.ids    : Dict[str, int] = {}
+
+    def __call__(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+
+        return self.ids.setdefault(value, len(self.ids))
+
+    def sections(self) -> List[bytes]:
+        offsets, data = [0], bytearray()
+
+        for value in self.ids:
+            data += value.encode()
+            offsets.append(len(data))
+
+        return [b"".join(U32.pack(o) for o in offsets), bytes(data)]
+
+
+def _u32s(values) -> bytes:
+    return b"".join(U32.pack(v) for v in values)
+
+
+def compile_artifact(path: str, engine: Optional[Engine] = None) -> str:
+    """
+    Compile the catalog in the database into the artifact read by `CatalogArtifact`,
+    written to a temporary file and moved over `path`. Returns the source hash.
+    """
+    strings = _Strings()
+
+    with (engine or get_engine()).connect() as conn:
+        digest = source_hash(conn)
+
+        qualities = dict(conn.exec_driver_sql('SELECT id, name FROM "Qualities"').all())
+        tags = dict(conn.exec_driver_sql('SELECT id, name FROM "Tags"').all())
+        monsters = dict(conn.exec_driver_sql('SELECT id, name FROM "Monsters"').all())
+
+        materials, material_index = [], {}
+        for id, name, quality_id in conn.exec_driver_sql('SELECT id, name, quality_id FROM "Materials" ORDER BY id'):
+            material_index[id] = len(materials)
+            materials.append(MATERIAL.pack(strings(name), strings(qualities[quality_id])))
+
+        item_tags, item_materials = defaultdict(list), defaultdict(list)
+        for item_id, tag_id in conn.exec_driver_sql('SELECT item_id, tag_id FROM "Item_Tag" ORDER BY item_id, tag_id'):
+            item_tags[item_id].append(tag_id)
+
+        for item_id, material_id in conn.exec_driver_sql('SELECT item_id, material_id FROM "Item_Material" ORDER BY item_id, material_id'):
+            item_materials[item_id].append(material_id)
+
+        items, names, tag_items = [], [], defaultdict(list)
+        tag_column, material_column = [], []
+
+        for id, name, weight, value, description, quality_id, craftable, flavor_text in conn.exec_driver_sql(
+            'SELECT id, name, weight, value, description, quality_id, craftable, flavor_text FROM "Items" ORDER BY id'
+        ):
+            index = len(items)
+            names.append((name.encode(), index))
+
+            for tag_id in item_tags[id]:
+                tag_items[tag_id].append(index)
+
+            items.append(ITEM.pack(
+                id, strings(name), weight, value, strings(description), strings(qualities[quality_id]),
+                strings(flavor_text), bool(craftable),
+                len(tag_column), len(item_tags[id]), len(material_column), len(item_materials[id])
+            ))
+            tag_column.extend(strings(tags[tag_id]) for tag_id in item_tags[id])
+            material_column.extend(material_index[material_id] for material_id in item_materials[id])
+
+        tag_records, tag_members = [], []
+        for tag_id in sorted(tag_items, key=lambda tag_id: tags[tag_id].encode()):
+            tag_records.append(TAG.pack(strings(tags[tag_id]), len(tag_members), len(tag_items[tag_id])))
+            tag_members.extend(tag_items[tag_id])
+
+        entries = defaultdict(list)
+        for loot_table_id, kind, item_name, tag_name, weight in conn.exec_driver_sql(
+            'SELECT e.loot_table_id, e.kind, i.name, t.name, e.weight FROM "LootEntries" e '
+            'LEFT JOIN "Items" i ON i.id = e.item_id LEFT JOIN "Tags" t ON t.id = e.tag_id '
+            'ORDER BY e.loot_table_id, e.position'
+        ):
+            if kind == db.LootKind.ITEM:
+                entries[loot_table_id].append(LOOT_ENTRY.pack(KIND_ITEM, strings(item_name), weight))
+
+            else:
+                entries[loot_table_id].append(LOOT_ENTRY.pack(KIND_TAG, strings(tag_name), weight))
+
+        loot_tables, loot_entries = [], []
+        for loot_table_id, monster_id in sorted(
+            conn.exec_driver_sql('SELECT id, monster_id FROM "LootTables"').all(),
+            key=lambda row: monsters[row[1]].encode()
+        ):
+            loot_tables.append(LOOT_TABLE.pack(strings(monsters[monster_id]), len(loot_entries), len(entries[loot_table_id])))
+            loot_entries.extend(entries[loot_table_id])
+
+    name_index = [index for _, index in sorted(names)]
+
+    sections = strings.sections() + [
+        b"".join(materials),
+        b"".join(items),
+        _u32s(tag_column),
+        _u32s(material_column),
+        _u32s(name_index),
+        b"".join(tag_records),
+        _u32s(tag_members),
+        b"".join(loot_tables),
+        b"".join(loot_entries),
+    ]
+    counts = [
+        len(strings.ids) + 1, len(sections[1]), len(materials), len(items), len(tag_column),
+        len(material_column), len(name_index), len(tag_records), len(tag_members), len(loot_tables), len(loot_entries)
+    ]
+
+    offsets, offset = [], HEADER.size
+    for section in sections:
+        offsets.append(offset)
+        offset += len(section)
+
+    header = HEADER.pack(MAGIC, VERSION, digest, *(v for pair in zip(offsets, counts) for v in pair))
+
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(header)
+
+        for section in sections:
+            f.write(section)
+
+    os.replace(f"{path}.tmp", path)
+    return digest.hex()
+
+
+def open_artifact(path: str, engine: Optional[Engine] = None, verify: bool = True) -> CatalogArtifact:
+    """
+    Open the artifact at `path`. With `verify` its source hash must match the catalog
+    in the database, a `ValueError` means it is stale and needs compiling again.
+    Verifying reads every catalog row, so do it once rather than in every worker.
+    """
+    artifact = CatalogArtifact(path)
+
+    if verify:
+        with (engine or get_engine()).connect() as conn:
+            digest = source_hash(conn).hex()
+
+        if digest != artifact.source_hash:
+            artifact.close()
+            raise ValueError(f"Catalog artifact '{path}' is stale, compiled from {artifact.source_hash[:12]} not {digest[:12]}")
+
+    return artifact
+
+
+if __name__ == '__main__':
+
+    print(f"catalog.bin compiled from {compile_artifact('catalog.bin')[:12]}")
+
+    with open_artifact("catalog.bin") as artifact:
+        print(f"{len(artifact)} items, {len(artifact.monsters)} loot tables")
@@ -1,9 +1,19 @@
 
-import json
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+import time
+
+from sqlalchemy import and_, bindparam, delete, insert, select, Table, update
+from sqlalchemy.engine import Connection, Engine
 
 from _db_entries import ITEMS, LOOT_TABLES, MATERIALS
-from _db_utils import ENGINE, session_scope, SingletonModelBase
-from enums import Monster, Quality, Tag
+from _db_invalidation import InvalidationBus
+from _db_utils import get_engine, session_scope, SingletonModelBase
+from enums import ItemName, LootKind, Monster, Quality, Tag
+from item import Item
+from loot import LootTable
+from material import Material
 
 
 import _db_models as db
@@ -13,8 +23,8 @@ def ZERO_DATABASE(model_base):
 
     with session_scope() as _:
 
-        model_base.metadata.drop_all(bind=ENGINE)
-        model_base.metadata.create_all(bind=ENGINE)
+        model_base.metadata.drop_all(bind=get_engine())
+        model_base.metadata.create_all(bind=get_engine())
 
 
 def CREATE_DATABASE():
@@ -54,16 +64,391 @@ def CREATE_DATABASE():
             session.add(i)
 
         for table in LOOT_TABLES.values():
-            t = db.LootTableModel(
-                weights=json.dumps(table.weights),
-                all_loot=json.dumps(table.all_loot),
-                monster=db.MonsterModel.get_fm_name(session, table.creature),
-            )
+            t = db.LootTableModel(monster=db.MonsterModel.get_fm_name(session, table.creature))
+
+            for position, (weight, loot, kind) in enumerate(zip(table.weights, table.all_loot, table.kinds)):
+                e = db.LootEntryModel(position=position, kind=kind, weight=weight)
+
+                if e.kind == db.LootKind.TAG:
+                    e.tag = db.TagModel.get_fm_name(session, loot)
+
+                else:
+                    e.item = db.ItemModel.get_fm_name(session, loot)
+
+                t.entries.append(e)
+
             session.add(t)
 
+    invalidate_caches()
+
+
+class BuildReport(NamedTuple):
+    rows    : Dict[str, int]
+    seconds : float
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.seconds if self.seconds else float("inf")
+
+    def __str__(self) -> str:
+        tables = ", ".join(f"{table}={count}" for table, count in self.rows.items())
+        return f"{self.total_rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s): {tables}"
+
+
+def _loot_entry(
+    loot        : Union[ItemName, Tag, str],
+    kind        : LootKind,
+    item_ids    : Dict[str, int],
+    tag_ids     : Dict[str, int]
+) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    The kind, item id and tag id columns of a `LootEntries` row.
+    """
+    if kind == LootKind.TAG:
+        return kind.value, None, tag_ids[loot]
+
+    return kind.value, item_ids[loot], None
+
+
+def BUILD_DATABASE(
+    items       : Iterable[Item] = ITEMS.values(),
+    materials   : Iterable[Material] = MATERIALS.values(),
+    loot_tables : Iterable[LootTable] = LOOT_TABLES.values(),
+    tags        : Iterable[str] = Tag,
+    qualities   : Iterable[str] = Quality,
+    monsters    : Iterable[str] = Monster,
+    engine      : Optional[Engine] = None
+) -> BuildReport:
+    """
+    Bulk counterpart to `CREATE_DATABASE` for an empty schema. Ids are assigned up front
+    so every link is resolved from in-memory maps, and each table is written with one
+    driver level executemany in a single transaction.
+    """
+    start = time.perf_counter()
+
+    tag_ids         = {tag: id for id, tag in enumerate(tags, 1)}
+    quality_ids     = {quality: id for id, quality in enumerate(qualities, 1)}
+    monster_ids     = {monster: id for id, monster in enumerate(monsters, 1)}
+    material_ids    = {}
+    item_ids        = {}
+
+    material_rows = []
+    for id, material in enumerate(materials, 1):
+        material_ids[material.name] = id
+        material_rows.append((id, material.name, quality_ids[material.quality], 0))
+
+    item_rows, item_tag_rows, item_material_rows = [], [], []
+    for id, item in enumerate(items, 1):
+        item_ids[item.name] = id
+        item_rows.append((
+            id,
+            item.name,
+            item.weight,
+            item.value,
+            item.description,
+            quality_ids[item.quality],
+            item.craftable,
+            item.flavor_text,
+        ))
+        item_tag_rows.extend((id, tag_ids[tag]) for tag in dict.fromkeys(item.tags))
+        item_material_rows.extend(
+            (id, material_ids[name])
+            for name in dict.fromkeys(material.name for material in item.composition)
+        )
+
+    loot_table_rows, loot_entry_rows = [], []
+    for id, table in enumerate(loot_tables, 1):
+        loot_table_rows.append((id, monster_ids[table.creature]))
+        loot_entry_rows.extend(
+            (id, position, *_loot_entry(loot, kind, item_ids, tag_ids), weight)
+            for position, (weight, loot, kind) in enumerate(zip(table.weights, table.all_loot, table.kinds))
+        )
+
+    writes = (
+        (db.TagModel.__table__, ("id", "name"), [(id, name) for name, id in tag_ids.items()]),
+        (db.QualityModel.__table__, ("id", "name"), [(id, name) for name, id in quality_ids.items()]),
+        (db.MonsterModel.__table__, ("id", "name"), [(id, name) for name, id in monster_ids.items()]),
+        (db.MaterialModel.__table__, ("id", "name", "quality_id", "quantity"), material_rows),
+        (
+            db.ItemModel.__table__,
+            ("id", "name", "weight", "value", "description", "quality_id", "craftable", "flavor_text"),
+            item_rows
+        ),
+        (db.Item_Tag, ("item_id", "tag_id"), item_tag_rows),
+        (db.Item_Material, ("item_id", "material_id"), item_material_rows),
+        (db.LootTableModel.__table__, ("id", "monster_id"), loot_table_rows),
+        (
+            db.LootEntryModel.__table__,
+            ("loot_table_id", "position", "kind", "item_id", "tag_id", "weight"),
+            loot_entry_rows
+        ),
+    )
+
+    with (engine or get_engine()).begin() as conn:
+
+        # Indexing the text row by row through the triggers doubles the build, index it once.
+        for trigger in db.ITEMS_FTS_TRIGGERS:
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS "{trigger}"')
+
+        for table, columns, table_rows in writes:
+            if table_rows:
+                conn.exec_driver_sql(
+                    f'INSERT INTO "{table.name}" ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                    table_rows
+                )
+
+        for statement in db.ITEMS_FTS_DDL:
+            conn.exec_driver_sql(statement)
+
+        conn.exec_driver_sql(db.ITEMS_FTS_REBUILD)
+
+    rows = {table.name: len(table_rows) for table, _, table_rows in writes}
+
+    invalidate_caches()
+    return BuildReport(rows=rows, seconds=time.perf_counter() - start)
+
+
+class SyncReport:
+    """
+    Keys inserted, updated and deleted per table by `SYNC_DATABASE`.
+    """
+
+    def __init__(self):
+        self.changes: Dict[str, Dict[str, List[Hashable]]] = defaultdict(lambda: defaultdict(list))
+
+    def __bool__(self) -> bool:
+        return any(keys for table in self.changes.values() for keys in table.values())
+
+    def __str__(self) -> str:
+        if not self:
+            return "No changes."
+
+        return "\n".join(
+            f"{table}: " + ", ".join(f"{len(keys)} {change}" for change, keys in changes.items() if keys)
+            for table, changes in self.changes.items()
+            if any(changes.values())
+        )
+
+    def record(self, table: Table, change: str, keys: Iterable[Hashable]) -> None:
+        self.changes[table.name][change].extend(keys)
+
+    @property
+    def invalidations(self) -> Dict[str, Optional[Set[Hashable]]]:
+        """
+        The changes in the form `InvalidationBus.publish` takes. Tables with a name
+        column are keyed by name, like the caches, any row of the others may have changed.
+        """
+        tables = SingletonModelBase.get_instance().metadata.tables
+
+        return {
+            table: set(chain.from_iterable(changes.values())) if "name" in tables[table].c else None
+            for table, changes in self.changes.items()
+            if any(changes.values())
+        }
+
+
+def _sync_rows(
+    conn        : Connection,
+    table       : Table,
+    key         : str,
+    desired     : Dict[Hashable, Dict[str, object]],
+    report      : SyncReport
+) -> Tuple[Dict[Hashable, int], Set[int]]:
+    """
+    Insert and update `table` towards `desired`, rows keyed by the `key` column.
+    Returns the id of every desired key and the ids of the rows no longer desired,
+    which are deleted later once nothing links to them.
+    """
+    columns = [table.c.id, table.c[key]] + [table.c[c] for c in next(iter(desired.values()), {})]
+    current = {row[1]: row for row in conn.execute(select(*columns))}
+
+    inserts = [{key: k, **values} for k, values in desired.items() if k not in current]
+    changed = [
+        k for k, values in desired.items()
+        if k in current and any(getattr(current[k], c) != v for c, v in values.items())
+    ]
+    updates = [{"_id": current[k].id, **desired[k]} for k in changed]
+
+    if inserts:
+        conn.execute(insert(table), inserts)
+        report.record(table, "inserted", [row[key] for row in inserts])
+
+    if updates:
+        values = {c: bindparam(c) for c in updates[0] if c != "_id"}
+        conn.execute(update(table).where(table.c.id == bindparam("_id")).values(values), updates)
+        report.record(table, "updated", changed)
+
+    ids = {row[1]: row.id for row in conn.execute(select(table.c.id, table.c[key]))}
+    stale = {row.id for k, row in current.items() if k not in desired}
+    report.record(table, "deleted", [k for k in current if k not in desired])
+
+    return {k: ids[k] for k in desired}, stale
+
+
+def _sync_links(
+    conn        : Connection,
+    table       : Table,
+    column      : str,
+    desired     : Dict[int, Set[int]],
+    report      : SyncReport
+) -> None:
+    """
+    Make the links of every item in `desired` exactly its set of `column` ids,
+    links of items not in `desired` are removed.
+    """
+    current = defaultdict(set)
+    for item_id, other_id in conn.execute(select(table.c.item_id, table.c[column])):
+        current[item_id].add(other_id)
+
+    inserts = [(i, o) for i, others in desired.items() for o in others - current.get(i, set())]
+    deletes = [(i, o) for i, others in current.items() for o in others - desired.get(i, set())]
+
+    if inserts:
+        conn.execute(insert(table), [{"item_id": i, column: o} for i, o in inserts])
+        report.record(table, "inserted", inserts)
+
+    if deletes:
+        conn.execute(
+            delete(table).where(and_(table.c.item_id == bindparam("_item_id"), table.c[column] == bindparam("_other_id"))),
+            [{"_item_id": i, "_other_id": o} for i, o in deletes]
+        )
+        report.record(table, "deleted", deletes)
+
+
+def _sync_loot_entries(
+    conn        : Connection,
+    desired     : Dict[int, List[Tuple[str, Optional[int], Optional[int], int]]],
+    report      : SyncReport
+) -> None:
+    """
+    Rewrite the entries of every loot table whose `(kind, item_id, tag_id, weight)`
+    rows differ from `desired`, entries of tables not in `desired` are removed.
+    """
+    table = db.LootEntryModel.__table__
+    current = defaultdict(list)
+
+    for row in conn.execute(select(table).order_by(table.c.loot_table_id, table.c.position)):
+        current[row.loot_table_id].append((row.kind, row.item_id, row.tag_id, row.weight))
+
+    changed = [id for id in current.keys() | desired.keys() if current.get(id) != desired.get(id)]
+
+    if not changed:
+        return
+
+    conn.execute(delete(table).where(table.c.loot_table_id.in_(changed)))
+
+    if rows := [
+        {"loot_table_id": id, "position": position, "kind": kind, "item_id": item_id, "tag_id": tag_id, "weight": weight}
+        for id in changed
+        for position, (kind, item_id, tag_id, weight) in enumerate(desired.get(id, ()))
+    ]:
+        conn.execute(insert(table), rows)
+
+    report.record(table, "updated", sorted(changed))
+
+
+def SYNC_DATABASE(
+    items       : Iterable[Item] = ITEMS.values(),
+    materials   : Iterable[Material] = MATERIALS.values(),
+    loot_tables : Iterable[LootTable] = LOOT_TABLES.values(),
+    tags        : Iterable[str] = Tag,
+    qualities   : Iterable[str] = Quality,
+    monsters    : Iterable[str] = Monster,
+    engine      : Optional[Engine] = None,
+    dry_run     : bool = False
+) -> SyncReport:
+    """
+    Bring an existing database in line with the definitions by applying only the
+    inserts, updates and deletes that differ, in one transaction. Rows are matched by
+    name, loot tables by monster. With `dry_run` the changes are reported and rolled back.
+    """
+    report = SyncReport()
+    items = list(items)
+
+    with (engine or get_engine()).connect() as conn, conn.begin() as transaction:
+
+        tag_ids, stale_tags = _sync_rows(conn, db.TagModel.__table__, "name", {t: {} for t in tags}, report)
+        quality_ids, stale_qualities = _sync_rows(conn, db.QualityModel.__table__, "name", {q: {} for q in qualities}, report)
+        monster_ids, stale_monsters = _sync_rows(conn, db.MonsterModel.__table__, "name", {m: {} for m in monsters}, report)
+
+        material_ids, stale_materials = _sync_rows(conn, db.MaterialModel.__table__, "name", {
+            material.name: {"quality_id": quality_ids[material.quality]}
+            for material in materials
+        }, report)
+
+        item_ids, stale_items = _sync_rows(conn, db.ItemModel.__table__, "name", {
+            item.name: {
+                "weight": item.weight,
+                "value": item.value,
+                "description": item.description,
+                "quality_id": quality_ids[item.quality],
+                "craftable": item.craftable,
+                "flavor_text": item.flavor_text,
+            }
+            for item in items
+        }, report)
+
+        _sync_links(conn, db.Item_Tag, "tag_id", {
+            item_ids[item.name]: {tag_ids[tag] for tag in item.tags}
+            for item in items
+        }, report)
+        _sync_links(conn, db.Item_Material, "material_id", {
+            item_ids[item.name]: {material_ids[material.name] for material in item.composition}
+            for item in items
+        }, report)
+
+        loot_tables = list(loot_tables)
+        loot_table_ids, stale_loot_tables = _sync_rows(conn, db.LootTableModel.__table__, "monster_id", {
+            monster_ids[table.creature]: {}
+            for table in loot_tables
+        }, report)
+
+        _sync_loot_entries(conn, {
+            loot_table_ids[monster_ids[table.creature]]: [
+                (*_loot_entry(loot, kind, item_ids, tag_ids), weight)
+                for weight, loot, kind in zip(table.weights, table.all_loot, table.kinds)
+            ]
+            for table in loot_tables
+        }, report)
+
+        # Nothing links to the stale rows any more, delete dependents first.
+        for model, stale in (
+            (db.LootTableModel, stale_loot_tables),
+            (db.ItemModel, stale_items),
+            (db.MaterialModel, stale_materials),
+            (db.TagModel, stale_tags),
+            (db.QualityModel, stale_qualities),
+            (db.MonsterModel, stale_monsters),
+        ):
+            if stale:
+                if model is db.TagModel:
+                    conn.execute(delete(db.Item_Tag).where(db.Item_Tag.c.tag_id.in_(stale)))
+
+                conn.execute(delete(model.__table__).where(model.id.in_(stale)))
+
+        if dry_run:
+            transaction.rollback()
+
+    if report and not dry_run:
+        InvalidationBus.publish(report.invalidations)
+
+    return report
+
+
+def invalidate_caches() -> None:
+    """
+    Drop every cached lookup, after a rebuild or after `_db_utils.configure` switched
+    to another database.
+    """
+    InvalidationBus.publish_all()
+
 
 if __name__ == '__main__':
 
     ZERO_DATABASE(SingletonModelBase.get_instance())
-    CREATE_DATABASE()
+    print(BUILD_DATABASE())
     ...
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional
+import threading
+import time
+
+
+class CacheStats(NamedTuple):
+    hits        : int
+    misses      : int
+    evictions   : int
+    size        : int
+
+
+class LRUCache:
+    """
+    Bounded least recently used cache with an optional time to live in seconds.
+    Entries past their ttl count as misses and are dropped when next looked up. A value
+    loaded while an entry was invalidated is returned but not stored, it may be stale.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize '{maxsize}' must be a positive integer")
+
+        self.maxsize    : int = maxsize
+        self.ttl        : Optional[float] = ttl
+        self.hits       : int = 0
+        self.misses     : int = 0
+        self.evictions  : int = 0
+
+        self._entries   : OrderedDict = OrderedDict()
+        self._lock      : threading.Lock = threading.Lock()
+        self._generation: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._live(key)
+
+    def _live(self, key: Hashable) -> bool:
+        if key not in self._entries:
+            return False
+
+        if self.ttl is not None and time.monotonic() - self._entries[key][1] > self.ttl:
+            del self._entries[key]
+            self.evictions += 1
+            return False
+
+        return True
+
+    def get_or_load(self, key: Hashable, load: Callable[[], object]) -> object:
+        with self._lock:
+            if self._live(key):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+            self.misses += 1
+            generation = self._generation
+
+        # Load outside the lock, a slow query should not block hits on other keys.
+        value = load()
+
+        with self._lock:
+            if generation != self._generation:
+                return value
+
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return value
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        """
+        The live value for `key`, or `default` without loading. Only a hit is counted,
+        the load that follows a miss counts that.
+        """
+        with self._lock:
+            if not self._live(key):
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, evictions=self.evictions, size=len(self._entries))
@@ -0,0 +1,166 @@
+from typing import Callable, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Tuple
+import threading
+import weakref
+
+# Changed keys handed to a listener, `None` when any row may have changed.
+Keys        = Optional[FrozenSet[Hashable]]
+Listener    = Callable[[Keys], None]
+
+
+class InvalidationBus:
+    """
+    Tells registered caches which rows of the catalog changed. A change names its table
+    and the keys the caches look rows up by, each name the row had and `("id", id)`, or
+    `None` when any row of the table may have changed. Every listener subscribed to one
+    of the changed tables is called once per publish with the union of their keys.
+    """
+    _subscriptions  : List[Tuple[FrozenSet[str], Listener]] = []
+    _lock           : threading.Lock = threading.Lock()
+
+    @classmethod
+    def subscribe(cls, tables: Iterable[str], listener: Listener) -> Listener:
+        with cls._lock:
+            # Replaced rather than appended to, `publish` iterates without the lock.
+            cls._subscriptions = cls._subscriptions + [(frozenset(tables), listener)]
+
+        return listener
+
+    @classmethod
+    def unsubscribe(cls, listener: Listener) -> None:
+        with cls._lock:
+            cls._subscriptions = [s for s in cls._subscriptions if s[1] is not listener]
+
+    @classmethod
+    def publish(cls, changes: Mapping[str, Optional[Iterable[Hashable]]]) -> None:
+        """
+        Call the listeners of every table in `changes`, a mapping of table name to its
+        changed keys or `None`.
+        """
+        for tables, listener in cls._subscriptions:
+
+            if not (changed := [changes[table] for table in tables & changes.keys()]):
+                continue
+
+            if any(keys is None for keys in changed):
+                listener(None)
+
+            else:
+                listener(frozenset().union(*changed))
+
+    @classmethod
+    def publish_all(cls) -> None:
+        """
+        Any row of any table may have changed, e.g. after a rebuild.
+        """
+        for _, listener in cls._subscriptions:
+            listener(None)
+
+
+class DataVersionWatcher:
+    """
+    Notices commits made to the database file through other connections, by another
+    process or tool, with SQLite's `PRAGMA data_version`. Which rows changed is not
+    known, a change is published as `InvalidationBus.publish_all`. Commits made through
+    the sessions of this process already published their keys, the version they leave
+    is recorded by `committed` and not published again. Call `poll`, or `start` a
+    thread polling every `interval` seconds.
+    """
+    _watchers       : "weakref.WeakSet[DataVersionWatcher]" = weakref.WeakSet()
+
+    def __init__(self, engine=None, interval: float = 1.0):
+        self.interval       : float = interval
+        self._engine        = engine
+        self._connection    = None
+        self._version       : Optional[int] = None
+        self._lock          : threading.Lock = threading.Lock()
+        self._stop          : threading.Event = threading.Event()
+        self._thread        : Optional[threading.Thread] = None
+
+        DataVersionWatcher._watchers.add(self)
+
+    @classmethod
+    def committing(cls, engine) -> None:
+        """
+        A session of this process is about to commit through `engine`, changes by other
+        connections until now are published first so `committed` cannot hide them.
+        """
+        for watcher in list(cls._watchers):
+            if watcher._watches(engine):
+                watcher.poll()
+
+    @classmethod
+    def committed(cls, engine) -> None:
+        """
+        A session of this process committed through `engine` and published its keys,
+        the version it left is accounted for.
+        """
+        for watcher in list(cls._watchers):
+            if watcher._watches(engine):
+
+                with watcher._lock:
+                    watcher._version = watcher._data_version()
+
+    def _watches(self, engine) -> bool:
+        # Not polled yet, the first poll reads the current version anyway.
+        return self._connection is not None and engine is not None and engine.url.database == self._engine.url.database
+
+    def _data_version(self) -> int:
+        if self._connection is None:
+            # Imported on first poll, SQLAlchemy is not loaded until then.
+            from _db_utils import get_engine
+
+            # A connection of its own, data_version only counts commits by other connections.
+            self._engine = self._engine or get_engine()
+            self._connection = self._engine.raw_connection()
+
+        cursor = self._connection.cursor()
+
+        try:
+            cursor.execute("PRAGMA data_version")
+            return cursor.fetchone()[0]
+
+        finally:
+            cursor.close()
+
+    def poll(self) -> bool:
+        """
+        Publish a change when the database was written since the last poll, the first
+        poll only reads the current version. Returns whether a change was published.
+        """
+        with self._lock:
+            version = self._data_version()
+            changed = self._version is not None and version != self._version
+            self._version = version
+
+        if changed:
+            InvalidationBus.publish_all()
+
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "DataVersionWatcher":
+        if self._thread is None:
+            self.poll()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="inventory-data-version", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+
+        with self._lock:
+
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
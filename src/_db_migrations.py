@@ -0,0 +1,136 @@
+from typing import List
+import json
+
+from sqlalchemy import insert, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from _db_utils import get_engine, SingletonModelBase
+
+import _db_models as db
+
+
+def _primary_key(conn: Connection, table_name: str) -> List[str]:
+    return inspect(conn).get_pk_constraint(table_name)["constrained_columns"]
+
+
+def _rebuild_association(conn: Connection, table) -> bool:
+    """
+    SQLite cannot add a primary key to an existing table, copy the distinct links into
+    a new one instead.
+    """
+    if _primary_key(conn, table.name) == [c.name for c in table.primary_key.columns]:
+        return False
+
+    columns = ", ".join(c.name for c in table.columns)
+    not_null = " AND ".join(f"{c.name} IS NOT NULL" for c in table.columns)
+
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{table.name}_old"'))
+    table.create(conn)
+    conn.execute(text(
+        f'INSERT OR IGNORE INTO "{table.name}" ({columns}) '
+        f'SELECT DISTINCT {columns} FROM "{table.name}_old" WHERE {not_null}'
+    ))
+    conn.execute(text(f'DROP TABLE "{table.name}_old"'))
+    return True
+
+
+def _decode(value) -> list:
+    # Written by `json.dumps` into a `JSON` column, so encoded twice.
+    while isinstance(value, str):
+        value = json.loads(value)
+
+    return value
+
+
+def _normalize_loot_tables(conn: Connection) -> int:
+    """
+    Move the JSON `weights` and `all_loot` columns of `LootTables` into `LootEntries`
+    rows, then drop them. Returns the number of entries written.
+    """
+    if "all_loot" not in {column["name"] for column in inspect(conn).get_columns("LootTables")}:
+        return 0
+
+    items = dict(conn.execute(text('SELECT name, id FROM "Items"')).all())
+    tags = dict(conn.execute(text('SELECT name, id FROM "Tags"')).all())
+    rows = []
+
+    for id, weights, all_loot in conn.execute(text('SELECT id, weights, all_loot FROM "LootTables"')).all():
+        for position, (weight, loot) in enumerate(zip(_decode(weights), _decode(all_loot))):
+            entry = {"loot_table_id": id, "position": position, "weight": weight, "item_id": None, "tag_id": None}
+
+            # Item names were tried before tags when these tables were loaded.
+            if loot in items:
+                entry.update(kind=db.LootKind.ITEM.value, item_id=items[loot])
+
+            else:
+                entry.update(kind=db.LootKind.TAG.value, tag_id=tags[loot])
+
+            rows.append(entry)
+
+    if rows:
+        conn.execute(insert(db.LootEntryModel.__table__), rows)
+
+    for column in ("weights", "all_loot"):
+        conn.execute(text(f'ALTER TABLE "LootTables" DROP COLUMN {column}'))
+
+    return len(rows)
+
+
+def _create_items_fts(conn: Connection) -> bool:
+    """
+    Add the full-text index and its triggers to an existing `Items` table, then index
+    every item already there.
+    """
+    if "Items_fts" in inspect(conn).get_table_names():
+        return False
+
+    for statement in db.ITEMS_FTS_DDL:
+        conn.exec_driver_sql(statement)
+
+    conn.exec_driver_sql(db.ITEMS_FTS_REBUILD)
+    return True
+
+
+def migrate(engine: Engine = None) -> List[str]:
+    """
+    Bring an existing database up to the current schema in one transaction: composite
+    primary keys on the association tables, every missing table and index, then loot
+    tables moved out of JSON into `LootEntries` and the full-text index over `Items`.
+    Returns what was changed, safe to run repeatedly.
+    """
+    engine = engine or get_engine()
+    metadata = SingletonModelBase.get_instance().metadata
+    changes = []
+
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+
+        for table in (db.Item_Tag, db.Item_Material):
+            if table.name in existing and _rebuild_association(conn, table):
+                changes.append(f"rebuilt {table.name} with primary key ({', '.join(table.primary_key.columns.keys())})")
+
+        for table in metadata.sorted_tables:
+            if table.name not in existing:
+                table.create(conn)
+                changes.append(f"created table {table.name}")
+                continue
+
+            indexes = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    changes.append(f"created index {index.name}")
+
+        if "LootTables" in existing and (entries := _normalize_loot_tables(conn)):
+            changes.append(f"moved {entries} loot entries out of LootTables JSON into LootEntries")
+
+        if "Items" in existing and _create_items_fts(conn):
+            changes.append("created full-text index Items_fts")
+
+    return changes
+
+
+if __name__ == '__main__':
+
+    print(*migrate() or ["Up to date."], sep='\n')
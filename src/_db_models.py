@@ -1,35 +1,172 @@
 
-from typing import List
-
-from sqlalchemy import Boolean, Column, ForeignKey, func, Integer, JSON, String, Table
-from sqlalchemy.orm import joinedload, Query, relationship, selectinload, Session
+from collections import defaultdict
+from itertools import chain
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple, TYPE_CHECKING, Union
+import random
+
+from sqlalchemy import (
+    bindparam, Boolean, CheckConstraint, column, Column, DDL, event, ForeignKey, func, Index, inspect, Integer, or_,
+    select, Select, String, Table, table, tuple_
+)
+from sqlalchemy.orm import joinedload, object_session, Query, relationship, selectinload, Session
 
+from _db_invalidation import DataVersionWatcher, InvalidationBus
 from _db_utils import session_scope, SingletonModelBase
-from enums import MaterialType, Monster, Quality, Tag
+from enums import as_enum, ItemName, LootKind, MaterialType, Monster, Quality, Tag
 
 from material import Material
 
+if TYPE_CHECKING:
+    from item_manager import ItemQuery
+
 
 ModelBase = SingletonModelBase.get_instance()
 
 
 class QueryBase:
+    # Ids matching each filter, see `_get_fm_random`.
+    _id_cache       : Dict[Tuple[type, tuple], List[int]] = {}
+    # Parameterized statements, see `_statement`.
+    _statements     : Dict[Tuple[type, Hashable], Select] = {}
+    # Tables whose changes make the cached ids of this model stale, its own by default.
+    _ids_depend_on  : Tuple[str, ...] = ()
+
+    @classmethod
+    def _load_options(cls) -> tuple:
+        """
+        Loader options applied to every query, override to eager load relationships.
+        """
+        return ()
+
+    @classmethod
+    def _select(cls) -> Select:
+        return select(cls).options(*cls._load_options())
+
+    @classmethod
+    def _statement(cls, key: Hashable, build: Callable[[], Select]) -> Select:
+        """
+        The statement for `key`, built once with `bindparam` placeholders and reused with
+        new values on every call. SQLAlchemy then finds its compiled form by identity.
+        """
+        if (statement := QueryBase._statements.get((cls, key))) is None:
+            statement = QueryBase._statements[(cls, key)] = build()
+
+        return statement
+
+    @classmethod
+    def _scalars(cls, session: Session, key: Hashable, build: Callable[[], Select], **params) -> List["QueryBase"]:
+        # Unique, joined eager loads repeat a row once per related row.
+        return session.scalars(cls._statement(key, build), params).unique().all()
 
     @classmethod
     def get_fm_id(cls, session: Session, id: int) -> Query["QueryBase"]:
-        return session.query(cls).filter_by(id=id).first()
+        rows = cls._scalars(session, "id", lambda: cls._select().where(cls.id == bindparam("id")), id=id)
+        return rows[0] if rows else None
 
     @classmethod
     def get_fm_name(cls, session: Session, name: str) -> Query["QueryBase"]:
-        return session.query(cls).filter_by(name=name).first()
+        rows = cls._scalars(session, "name", lambda: cls._select().where(cls.name == bindparam("name")), name=name)
+        return rows[0] if rows else None
 
     @classmethod
     def get_fm_random(cls, session: Session) -> Query["QueryBase"]:
-        return session.query(cls).order_by(func.random()).first()
+        return cls._get_fm_random(session, ())
+
+    @classmethod
+    def _ids(cls, session: Session, key: tuple, *criteria) -> List[int]:
+        """
+        Ids of the rows matching `criteria`, read once per `key` and cached until
+        `invalidate_ids` is called.
+        """
+        if (ids := QueryBase._id_cache.get((cls, key))) is None:
+            ids = QueryBase._id_cache[(cls, key)] = [
+                id for (id,) in session.query(cls.id).filter(*criteria).order_by(cls.id)
+            ]
+
+        return ids
+
+    @classmethod
+    def _get_fm_random(cls, session: Session, key: tuple, *criteria) -> Query["QueryBase"]:
+        """
+        Uniform pick among the rows matching `criteria`, one primary key lookup however
+        large the table grows.
+        """
+        for _ in range(2):
+
+            if not (ids := cls._ids(session, key, *criteria)):
+                return None
+
+            if row := cls.get_fm_id(session, ids[random.randrange(len(ids))]):
+                return row
+
+            # The row is gone, the cached ids are stale.
+            cls.invalidate_ids()
+
+        return None
+
+    @classmethod
+    def _samples_fm(cls, session: Session, k: int, replace: bool, key: tuple, *criteria) -> List["QueryBase"]:
+        """
+        `k` uniform picks among the rows matching `criteria`, loaded in one query.
+        Without `replace` every pick is a different row.
+        """
+        if k < 0:
+            raise ValueError(f"Cannot sample '{k}' rows")
+
+        for _ in range(2):
+            ids = cls._ids(session, key, *criteria)
+
+            if not replace and k > len(ids):
+                raise ValueError(f"Cannot sample '{k}' rows from {len(ids)} without replacement")
+
+            if not ids:
+                return []
+
+            picks = random.choices(ids, k=k) if replace else random.sample(ids, k)
+            rows = {row.id: row for row in cls._scalars(
+                session,
+                "ids",
+                lambda: cls._select().where(cls.id.in_(bindparam("ids", expanding=True))),
+                ids=list(set(picks))
+            )}
+
+            if len(rows) == len(set(picks)):
+                return [rows[id] for id in picks]
+
+            cls.invalidate_ids()
+
+        return []
+
+    @classmethod
+    def invalidate_ids(cls) -> None:
+        """
+        Forget the cached ids of this model, or of every model when called on `QueryBase`.
+        """
+        if cls is QueryBase:
+            QueryBase._id_cache.clear()
+            return
+
+        for key in [key for key in QueryBase._id_cache if key[0] is cls]:
+            QueryBase._id_cache.pop(key, None)
+
+    def _cache_keys(self) -> Iterator[Tuple[str, Optional[Hashable]]]:
+        """
+        `(table, key)` for every cached lookup a change to this row makes stale, its
+        `("id", id)` and each name it had. A `None` key stands for the whole table.
+        """
+        yield self.__tablename__, ("id", self.id)
+
+        if "name" in (attrs := inspect(self).attrs):
+
+            if not (names := attrs.name.history.sum()):
+                yield self.__tablename__, None
+
+            for name in names:
+                yield self.__tablename__, name
 
     @classmethod
     def gets_all(cls, session: Session) -> List[Query["QueryBase"]]:
-        return session.query(cls).all()
+        return cls._scalars(session, "all", lambda: cls._select().order_by(cls.id))
 
 
 class QualityModel(ModelBase, QueryBase):
@@ -66,7 +203,7 @@ class MaterialModel(ModelBase, QueryBase):
     __tablename__   = "Materials"
     id              = Column(Integer, primary_key=True)
     name            = Column(String, unique=True, nullable=False)
-    quality_id      = Column(Integer, ForeignKey('Qualities.id'))
+    quality_id      = Column(Integer, ForeignKey('Qualities.id'), index=True)
     quality         = relationship('QualityModel', backref="materials")
     quantity        = Column(Integer, default=0, nullable=False)
     items           = relationship("ItemModel", secondary="Item_Material", back_populates="materials")
@@ -78,24 +215,29 @@ class MaterialModel(ModelBase, QueryBase):
     def as_material(self) -> Material:
         return Material(name=MaterialType(self.name), quality=Quality(self.quality.name))
 
+    @classmethod
+    def _load_options(cls) -> tuple:
+        return (selectinload(cls.quality),)
+
     @classmethod
     def gets_fm_quality(cls, session: Session, quality: Quality) -> Query["MaterialModel"]:
-        return (
-            session.query(cls)
-            .join(cls.quality)
-            .filter(QualityModel.name == quality)
-            .all()
+        return cls._scalars(
+            session,
+            "fm_quality",
+            lambda: cls._select().join(cls.quality).where(QualityModel.name == bindparam("quality")),
+            quality=quality
         )
 
 
 class ItemModel(ModelBase, QueryBase):
     __tablename__   = 'Items'
+    _ids_depend_on  = ("Items", "Item_Tag", "Item_Material", "Tags", "Qualities", "Materials")
     id              = Column(Integer, primary_key=True)
     name            = Column(String, unique=True, nullable=False)
-    weight          = Column(Integer, nullable=False)
-    value           = Column(Integer, nullable=False)
+    weight          = Column(Integer, nullable=False, index=True)
+    value           = Column(Integer, nullable=False, index=True)
     description     = Column(String, nullable=False)
-    quality_id      = Column(Integer, ForeignKey('Qualities.id'))
+    quality_id      = Column(Integer, ForeignKey('Qualities.id'), index=True)
     quality         = relationship('QualityModel', backref='items')
     craftable       = Column(Boolean, nullable=False)
     materials       = relationship("MaterialModel", secondary="Item_Material", back_populates='items')
@@ -105,62 +247,284 @@ class ItemModel(ModelBase, QueryBase):
     def __repr__(self):
         return f"ItemModel(id={self.id}, name='{self.name}', weight={self.weight}, value={self.value}, description='{self.description}', quality_id={self.quality_id}, craftable={self.craftable})"
 
+    def _cache_keys(self) -> Iterator[Tuple[str, Optional[Hashable]]]:
+        yield from super()._cache_keys()
+
+        # Loot tables name their items and pool them by tag, they only go stale when an
+        # item is added, removed or renamed or its tags change, not on any other column.
+        session, attrs = object_session(self), inspect(self).attrs
+
+        if self in session.new or self in session.deleted or attrs.name.history.has_changes() or attrs.tags.history.has_changes():
+            for name in attrs.name.history.sum() or (None,):
+                yield Item_Tag.name, name
+
     @classmethod
-    def get_fm_materialtype_random(cls, session: Session, material_type: MaterialType) -> Query["ItemModel"]:
+    def _load_options(cls) -> tuple:
+        """
+        Everything `as_item` reads, one extra query per relationship however many rows match.
+        """
         return (
-            session.query(cls)
-            .filter(cls.materials.any(name=material_type))
-            .options(selectinload(cls.materials))
-            .order_by(func.random())
-            .first()
+            selectinload(cls.quality),
+            selectinload(cls.materials).selectinload(MaterialModel.quality),
+            selectinload(cls.tags),
         )
 
     @classmethod
-    def get_fm_quality_random(cls, session: Session, quality: Quality) -> Query["ItemModel"]:
-        return (
-            session.query(cls)
-            .filter(cls.quality.has(name=quality))
-            .options(selectinload(cls.quality))
-            .order_by(func.random())
-            .first()
+    def _fm_materialtype(cls, material_type: MaterialType):
+        return cls.id.in_(
+            select(Item_Material.c.item_id)
+            .join(MaterialModel, MaterialModel.id == Item_Material.c.material_id)
+            .where(MaterialModel.name == material_type)
         )
 
     @classmethod
-    def get_fm_tag_random(cls, session: Session, tag: Tag) -> Query["ItemModel"]:
-        return (
-            session.query(cls)
-            .filter(cls.tags.any(name=tag))
-            .options(selectinload(cls.tags))
-            .order_by(func.random())
-            .first()
+    def _fm_quality(cls, quality: Quality):
+        return cls.quality_id.in_(select(QualityModel.id).where(QualityModel.name == quality))
+
+    @classmethod
+    def _fm_tag(cls, tag: Tag):
+        return cls.id.in_(
+            select(Item_Tag.c.item_id)
+            .join(TagModel, TagModel.id == Item_Tag.c.tag_id)
+            .where(TagModel.name == tag)
         )
 
+    @classmethod
+    def get_fm_materialtype_random(cls, session: Session, material_type: MaterialType) -> Query["ItemModel"]:
+        return cls._get_fm_random(session, ("materialtype", material_type), cls._fm_materialtype(material_type))
+
+    @classmethod
+    def get_fm_quality_random(cls, session: Session, quality: Quality) -> Query["ItemModel"]:
+        return cls._get_fm_random(session, ("quality", quality), cls._fm_quality(quality))
+
+    @classmethod
+    def get_fm_tag_random(cls, session: Session, tag: Tag) -> Query["ItemModel"]:
+        return cls._get_fm_random(session, ("tag", tag), cls._fm_tag(tag))
+
+    @classmethod
+    def samples_fm_materialtype(cls, session: Session, material_type: MaterialType, k: int, replace: bool = False) -> List["ItemModel"]:
+        return cls._samples_fm(session, k, replace, ("materialtype", material_type), cls._fm_materialtype(material_type))
+
+    @classmethod
+    def samples_fm_quality(cls, session: Session, quality: Quality, k: int, replace: bool = False) -> List["ItemModel"]:
+        return cls._samples_fm(session, k, replace, ("quality", quality), cls._fm_quality(quality))
+
+    @classmethod
+    def samples_fm_tag(cls, session: Session, tag: Tag, k: int, replace: bool = False) -> List["ItemModel"]:
+        return cls._samples_fm(session, k, replace, ("tag", tag), cls._fm_tag(tag))
+
     @classmethod
     def gets_fm_quality(cls, session: Session, quality: Quality) -> Query["ItemModel"]:
-        return (
-            session.query(cls)
-            .filter(cls.quality.has(name=quality))
-            .options(selectinload(cls.quality))
-            .all()
+        return cls._scalars(
+            session, "fm_quality", lambda: cls._select().where(cls._fm_quality(bindparam("quality"))), quality=quality
         )
 
     @classmethod
     def gets_fm_materialtype(cls, session: Session, material_type: MaterialType) -> Query["ItemModel"]:
-        return (
-            session.query(cls)
-            .filter(cls.materials.any(name=material_type))
-            .options(selectinload(cls.materials))
-            .all()
+        return cls._scalars(
+            session,
+            "fm_materialtype",
+            lambda: cls._select().where(cls._fm_materialtype(bindparam("material_type"))),
+            material_type=material_type
         )
 
     @classmethod
     def gets_fm_tag(cls, session: Session, tag: Tag) -> Query["ItemModel"]:
-        return (
-            session.query(cls)
-            .filter(cls.tags.any(name=tag))
-            .options(selectinload(cls.tags))
-            .all()
+        return cls._scalars(session, "fm_tag", lambda: cls._select().where(cls._fm_tag(bindparam("tag"))), tag=tag)
+
+    @classmethod
+    def _fm_item_query(cls, query: "ItemQuery", *columns, after: bool = False, limit: bool = False) -> Select:
+        """
+        `columns` of the items matching every filter of `query`, in its order. The values
+        are `bindparam` placeholders filled from `_item_query_params`, so one statement
+        serves every query with the same filters.
+        """
+        statement = select(*columns)
+
+        def tag_ids(name: str) -> Select:
+            return (
+                select(Item_Tag.c.item_id)
+                .join(TagModel, TagModel.id == Item_Tag.c.tag_id)
+                .where(TagModel.name.in_(bindparam(name, expanding=True)))
+            )
+
+        if query.names:
+            statement = statement.where(cls.name.in_(bindparam("names", expanding=True)))
+
+        if query.tags_any:
+            statement = statement.where(cls.id.in_(tag_ids("tags_any")))
+
+        if query.tags_all:
+            statement = statement.where(cls.id.in_(
+                tag_ids("tags_all").group_by(Item_Tag.c.item_id).having(func.count() == bindparam("tags_all_count"))
+            ))
+
+        if query.qualities:
+            statement = statement.where(cls.quality_id.in_(
+                select(QualityModel.id).where(QualityModel.name.in_(bindparam("qualities", expanding=True)))
+            ))
+
+        if query.materials:
+            statement = statement.where(cls.id.in_(
+                select(Item_Material.c.item_id)
+                .join(MaterialModel, MaterialModel.id == Item_Material.c.material_id)
+                .where(MaterialModel.name.in_(bindparam("materials", expanding=True)))
+            ))
+
+        for name in ("value", "weight"):
+            low, high = getattr(query, name)
+
+            if low is not None:
+                statement = statement.where(getattr(cls, name) >= bindparam(f"{name}_low"))
+
+            if high is not None:
+                statement = statement.where(getattr(cls, name) <= bindparam(f"{name}_high"))
+
+        if query.craftable is not None:
+            statement = statement.where(cls.craftable == bindparam("craftable"))
+
+        keys = cls._item_query_keys(query)
+
+        if after:
+            position = tuple_(*keys)
+            cursor = tuple_(*(bindparam(f"after_{i}") for i in range(len(keys))))
+            statement = statement.where(position < cursor if query.descending else position > cursor)
+
+        statement = statement.order_by(*(key.desc() if query.descending else key for key in keys))
+        return statement.limit(bindparam("limit")) if limit else statement
+
+    @classmethod
+    def _item_query_keys(cls, query: "ItemQuery") -> tuple:
+        # Ordered by the key then id, so every row has one position to page from.
+        return (cls.id,) if query.order == "id" else (getattr(cls, query.order), cls.id)
+
+    @staticmethod
+    def _item_query_params(query: "ItemQuery") -> dict:
+        tags_all = list(dict.fromkeys(query.tags_all))
+
+        return {
+            "names": list(query.names),
+            "tags_any": list(query.tags_any),
+            "tags_all": tags_all,
+            "tags_all_count": len(tags_all),
+            "qualities": list(query.qualities),
+            "materials": list(query.materials),
+            "value_low": query.value[0],
+            "value_high": query.value[1],
+            "weight_low": query.weight[0],
+            "weight_high": query.weight[1],
+            "craftable": query.craftable,
+        }
+
+    @staticmethod
+    def _item_query_key(query: "ItemQuery", *shape) -> tuple:
+        filters = (query.names, query.tags_any, query.tags_all, query.qualities, query.materials, query.craftable is not None)
+        ranges = (bound is not None for bound in (*query.value, *query.weight))
+        return ("query", *map(bool, filters), *ranges, query.order, query.descending, *shape)
+
+    @classmethod
+    def gets_id_fm_query(
+        cls,
+        session : Session,
+        query   : "ItemQuery",
+        limit   : Optional[int] = None,
+        after   : Optional[tuple] = None
+    ) -> List[Tuple]:
+        """
+        The position of every item matching `query` in its order, its order key and id or
+        just its id, the id last. With `limit`, only that many after the position `after`.
+        """
+        params = cls._item_query_params(query)
+
+        if after is not None:
+            params.update({f"after_{i}": value for i, value in enumerate(after)})
+
+        if limit is not None:
+            params["limit"] = limit
+
+        statement = cls._statement(
+            cls._item_query_key(query, "ids", after is not None, limit is not None),
+            lambda: cls._fm_item_query(
+                query, *cls._item_query_keys(query), after=after is not None, limit=limit is not None
+            )
+        )
+        return [tuple(row) for row in session.execute(statement, params)]
+
+    @classmethod
+    def _field(cls, name: str):
+        # The quality by name, a subquery keeps the projection to a single table.
+        if name == "quality":
+            return select(QualityModel.name).where(QualityModel.id == cls.quality_id).scalar_subquery()
+
+        return getattr(cls, name)
+
+    @classmethod
+    def gets_fields_fm_query(cls, session: Session, query: "ItemQuery", fields: Tuple[str, ...]) -> List[tuple]:
+        """
+        Only the columns `fields` of the items matching `query`, as plain tuples read off
+        the cursor. No instances are made and no relationships loaded.
+        """
+        statement = cls._statement(
+            cls._item_query_key(query, "fields", fields),
+            lambda: cls._fm_item_query(query, *(cls._field(name) for name in fields))
         )
+        return [tuple(row) for row in session.connection().execute(statement, cls._item_query_params(query))]
+
+    @classmethod
+    def gets_fm_query(cls, session: Session, query: "ItemQuery", chunk_size: int = 1_000) -> Iterator["ItemModel"]:
+        """
+        The items matching `query` in its order, fetched `chunk_size` rows at a time with
+        their relationships loaded per chunk.
+        """
+        statement = cls._statement(
+            cls._item_query_key(query, "rows"),
+            lambda: cls._fm_item_query(query, cls).options(*cls._load_options())
+        )
+        return session.scalars(statement, cls._item_query_params(query), execution_options={"yield_per": chunk_size})
+
+    @classmethod
+    def gets_fm_ids(cls, session: Session, ids: List[int], chunk_size: int = 10_000) -> List["ItemModel"]:
+        """
+        The items of `ids` in that order, ids without an item skipped. Read `chunk_size`
+        ids at a time, SQLite caps the parameters of one statement.
+        """
+        rows = {}
+
+        for start in range(0, len(ids), chunk_size):
+            rows.update((row.id, row) for row in cls._scalars(
+                session,
+                "fm_ids",
+                lambda: cls._select().where(cls.id.in_(bindparam("ids", expanding=True))),
+                ids=ids[start:start + chunk_size]
+            ))
+
+        return [rows[id] for id in ids if id in rows]
+
+    @classmethod
+    def search_ids(cls, session: Session, text: str, limit: int = 10, tag: Tag = None, quality: Quality = None) -> List[int]:
+        """
+        Ids of the items whose description or flavor text has a word starting with each
+        word of `text`, best bm25 rank first, served from the `Items_fts` index.
+        """
+        if not (match := fts_query(text)):
+            return []
+
+        def build() -> Select:
+            statement = select(ITEMS_FTS.c.rowid).where(ITEMS_FTS.c.Items_fts.op("MATCH")(bindparam("match")))
+
+            if tag is not None or quality is not None:
+                statement = statement.join(cls, cls.id == ITEMS_FTS.c.rowid)
+
+            if tag is not None:
+                statement = statement.where(cls._fm_tag(bindparam("tag")))
+
+            if quality is not None:
+                statement = statement.where(cls._fm_quality(bindparam("quality")))
+
+            return statement.order_by(ITEMS_FTS.c.rank).limit(bindparam("limit"))
+
+        params = {"match": match, "limit": limit, "tag": tag, "quality": quality}
+        return session.scalars(cls._statement(("search", tag is not None, quality is not None), build), params).all()
 
 
 class MonsterModel(ModelBase, QueryBase):
@@ -177,40 +541,224 @@ class MonsterModel(ModelBase, QueryBase):
         return Monster(self.name)
 
 
+class LootEntryModel(ModelBase):
+    """
+    One weighted entry of a loot table, dropping a single item or any item with a tag.
+    """
+    __tablename__   = "LootEntries"
+    loot_table_id   = Column(Integer, ForeignKey('LootTables.id'), primary_key=True)
+    position        = Column(Integer, primary_key=True)
+    kind            = Column(String, nullable=False)
+    item_id         = Column(Integer, ForeignKey('Items.id'), nullable=True, index=True)
+    item            = relationship('ItemModel')
+    tag_id          = Column(Integer, ForeignKey('Tags.id'), nullable=True, index=True)
+    tag             = relationship('TagModel')
+    weight          = Column(Integer, nullable=False)
+
+    __table_args__  = (
+        CheckConstraint(
+            "(kind = 'item' AND item_id IS NOT NULL AND tag_id IS NULL) OR "
+            "(kind = 'tag' AND tag_id IS NOT NULL AND item_id IS NULL)",
+            name="ck_LootEntries_kind"
+        ),
+    )
+
+    def __repr__(self):
+        return f"LootEntryModel(loot_table_id={self.loot_table_id}, position={self.position}, kind='{self.kind}', item_id={self.item_id}, tag_id={self.tag_id}, weight={self.weight})"
+
+    @property
+    def loot(self) -> Union[ItemName, Tag]:
+        if self.kind == LootKind.ITEM:
+            return as_enum(ItemName, self.item.name)
+
+        return as_enum(Tag, self.tag.name)
+
+    def _cache_keys(self) -> Iterator[Tuple[str, Optional[Hashable]]]:
+        # Entries are cached as part of their loot table, when it is not in the session
+        # its monster is unknown.
+        session = object_session(self)
+
+        if (table := session.identity_map.get(session.identity_key(LootTableModel, self.loot_table_id))) is not None:
+            yield from table._cache_keys()
+
+        else:
+            yield LootTableModel.__tablename__, ("id", self.loot_table_id)
+            yield LootTableModel.__tablename__, None
+
+
 class LootTableModel(ModelBase, QueryBase):
     __tablename__   = "LootTables"
     id              = Column(Integer, primary_key=True)
-    weights         = Column(JSON, nullable=False)
-    all_loot        = Column(JSON, nullable=False)
-    monster_id      = Column(Integer, ForeignKey('Monsters.id'))
+    monster_id      = Column(Integer, ForeignKey('Monsters.id'), index=True)
     monster         = relationship('MonsterModel', back_populates='loot_table')
+    entries         = relationship('LootEntryModel', order_by=LootEntryModel.position)
 
     def __repr__(self):
-        return f"LootTableModel(id={self.id}, weights={self.weights}, all_loot={self.all_loot}, monster_id={self.monster_id})"
+        return f"LootTableModel(id={self.id}, monster_id={self.monster_id})"
+
+    def _cache_keys(self) -> Iterator[Tuple[str, Optional[Hashable]]]:
+        # Cached by the name of the monster, before and after any change.
+        yield self.__tablename__, ("id", self.id)
+
+        if not (monsters := inspect(self).attrs.monster.history.sum()):
+            yield self.__tablename__, None
+
+        for monster in monsters:
+            if monster is not None:
+                yield self.__tablename__, monster.name
+
+    @classmethod
+    def _load_options(cls) -> tuple:
+        """
+        The monster and every entry with its item or tag name, in the same statement.
+        """
+        return (
+            joinedload(cls.monster),
+            joinedload(cls.entries).joinedload(LootEntryModel.item).load_only(ItemModel.name),
+            joinedload(cls.entries).joinedload(LootEntryModel.tag),
+        )
 
     @classmethod
     def get_fm_name(cls, session, monster: Monster) -> Query["LootTableModel"]:
+        rows = cls._scalars(
+            session,
+            "name",
+            lambda: cls._select().where(
+                cls.monster_id.in_(select(MonsterModel.id).where(MonsterModel.name == bindparam("monster")))
+            ),
+            monster=monster
+        )
+        return rows[0] if rows else None
+
+    @classmethod
+    def _monsters_fm_entries(cls, entries: Select) -> Select:
         return (
-            session.query(cls)
-            .join(cls.monster)
-            .options(joinedload(cls.monster))
-            .filter(MonsterModel.name == monster)
-            .first()
+            select(MonsterModel.name)
+            .join(cls, cls.monster_id == MonsterModel.id)
+            .where(cls.id.in_(entries))
+            .order_by(MonsterModel.id)
         )
 
+    @classmethod
+    def gets_monster_fm_item(cls, session: Session, item: ItemName) -> List[str]:
+        """
+        Names of the monsters whose loot table can drop `item`, by name or by any of
+        its tags. Served from the indexes on `LootEntries.item_id` and `tag_id`.
+        """
+
+        def build() -> Select:
+            item_id = select(ItemModel.id).where(ItemModel.name == bindparam("item")).scalar_subquery()
+            return cls._monsters_fm_entries(select(LootEntryModel.loot_table_id).where(or_(
+                LootEntryModel.item_id == item_id,
+                LootEntryModel.tag_id.in_(select(Item_Tag.c.tag_id).where(Item_Tag.c.item_id == item_id))
+            )))
+
+        return session.scalars(cls._statement("monster_fm_item", build), {"item": item}).all()
+
+    @classmethod
+    def gets_monster_fm_tag(cls, session: Session, tag: Tag) -> List[str]:
+        """
+        Names of the monsters whose loot table has an entry for `tag` itself.
+        """
+
+        def build() -> Select:
+            return cls._monsters_fm_entries(select(LootEntryModel.loot_table_id).where(
+                LootEntryModel.tag_id.in_(select(TagModel.id).where(TagModel.name == bindparam("tag")))
+            ))
 
-# Association tables
+        return session.scalars(cls._statement("monster_fm_tag", build), {"tag": tag}).all()
+
+
+# Association tables, the primary key serves item -> tag lookups and the reverse index tag -> item.
 Item_Tag = Table(
     'Item_Tag', ModelBase.metadata,
-    Column('item_id', Integer, ForeignKey('Items.id')),
-    Column('tag_id', Integer, ForeignKey('Tags.id'))
+    Column('item_id', Integer, ForeignKey('Items.id'), primary_key=True),
+    Column('tag_id', Integer, ForeignKey('Tags.id'), primary_key=True),
+    Index('ix_Item_Tag_tag_id_item_id', 'tag_id', 'item_id')
 )
 Item_Material = Table(
     'Item_Material', ModelBase.metadata,
-    Column('item_id', Integer, ForeignKey('Items.id')),
-    Column('material_id', Integer, ForeignKey('Materials.id'))
+    Column('item_id', Integer, ForeignKey('Items.id'), primary_key=True),
+    Column('material_id', Integer, ForeignKey('Materials.id'), primary_key=True),
+    Index('ix_Item_Material_material_id_item_id', 'material_id', 'item_id')
+)
+
+# Full-text index over the free text of `Items`, an FTS5 table reading its content from
+# `Items` and kept in step by triggers. SQLAlchemy cannot describe a virtual table, it is
+# created and dropped along with `Items` instead of being part of the metadata.
+ITEMS_FTS = table("Items_fts", column("rowid"), column("rank"), column("Items_fts"))
+ITEMS_FTS_DDL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "Items_fts" USING fts5('
+    'description, flavor_text, content="Items", content_rowid="id")',
+    'CREATE TRIGGER IF NOT EXISTS "Items_fts_insert" AFTER INSERT ON "Items" BEGIN '
+    'INSERT INTO "Items_fts" (rowid, description, flavor_text) VALUES (new.id, new.description, new.flavor_text); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS "Items_fts_delete" AFTER DELETE ON "Items" BEGIN '
+    'INSERT INTO "Items_fts" ("Items_fts", rowid, description, flavor_text) '
+    "VALUES ('delete', old.id, old.description, old.flavor_text); "
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS "Items_fts_update" AFTER UPDATE OF id, description, flavor_text ON "Items" BEGIN '
+    'INSERT INTO "Items_fts" ("Items_fts", rowid, description, flavor_text) '
+    "VALUES ('delete', old.id, old.description, old.flavor_text); "
+    'INSERT INTO "Items_fts" (rowid, description, flavor_text) VALUES (new.id, new.description, new.flavor_text); '
+    'END',
 )
 
+ITEMS_FTS_TRIGGERS = ("Items_fts_insert", "Items_fts_delete", "Items_fts_update")
+ITEMS_FTS_REBUILD = """INSERT INTO "Items_fts" ("Items_fts") VALUES ('rebuild')"""
+
+for statement in ITEMS_FTS_DDL:
+    event.listen(ItemModel.__table__, "after_create", DDL(statement))
+
+# The triggers go with `Items`, the index would outlive it.
+event.listen(ItemModel.__table__, "before_drop", DDL('DROP TABLE IF EXISTS "Items_fts"'))
+
+
+def fts_query(text: str) -> str:
+    """
+    `text` as an FTS5 query, every word quoted as a prefix so punctuation in it cannot
+    break the query syntax.
+    """
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in text.split())
+
+
+for model in (QualityModel, TagModel, MaterialModel, ItemModel, MonsterModel, LootTableModel):
+    InvalidationBus.subscribe(model._ids_depend_on or (model.__tablename__,), lambda keys, model=model: model.invalidate_ids())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    """
+    Note the cache keys of every row written, they are published once the transaction
+    commits and dropped if it rolls back.
+    """
+    changes = session.info.setdefault("changed_keys", defaultdict(set))
+
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, (QueryBase, LootEntryModel)):
+            for table, key in instance._cache_keys():
+                changes[table].add(key)
+
+
+@event.listens_for(Session, "before_commit")
+def _poll_data_version(session: Session) -> None:
+    DataVersionWatcher.committing(session.get_bind())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session) -> None:
+    if changes := session.info.pop("changed_keys", None):
+        InvalidationBus.publish({table: None if None in keys else keys for table, keys in changes.items()})
+        DataVersionWatcher.committed(session.get_bind())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session: Session, previous_transaction) -> None:
+    # A savepoint rolling back keeps the keys, publishing too many is harmless.
+    if previous_transaction.parent is None:
+        session.info.pop("changed_keys", None)
+
+
 if __name__ == '__main__':
 
     with session_scope() as session:
@@ -243,6 +791,7 @@ if __name__ == '__main__':
         # print(ItemModel.get_fm_quality_random(session, Quality.UNCOMMON))
         # print(ItemModel.get_fm_random(session))
         # print(ItemModel.get_fm_tag_random(session, Tag.JUNK))
+        # print(*ItemModel.samples_fm_tag(session, Tag.JUNK, 20, replace=True), sep='\n')
         # print(*[i for i in ItemModel.gets_fm_materialtype(session, MaterialType.BRASS)], sep='\n')
         # print(*[i for i in ItemModel.gets_fm_quality(session, Quality.UNCOMMON)], sep='\n')
         # print(*[i for i in ItemModel.gets_fm_tag(session, Tag.TREASURE)], sep='\n')
@@ -254,3 +803,4 @@ if __name__ == '__main__':
         # LootTableModel =========================================================
         # print(LootTableModel.get_fm_name(session, Monster.GOBLIN))
         # print(LootTableModel.get_fm_random(session))
+        # print(LootTableModel.gets_monster_fm_item(session, ItemName.TOOLBOX))
@@ -0,0 +1,133 @@
+from typing import List, NamedTuple, Optional, Union
+import random
+
+from sqlalchemy.engine import Engine
+
+from _db_builder import BUILD_DATABASE, BuildReport
+from enums import LootKind, MaterialType, Monster, Quality, Tag
+from item import Item
+from loot import LootTable
+from material import Material
+
+
+# Share of each `Quality`, poor to legendary, most items are common.
+QUALITY_WEIGHTS = (10, 55, 22, 9, 3, 1)
+
+
+class SyntheticCatalog(NamedTuple):
+    items       : List[Item]
+    materials   : List[Material]
+    loot_tables : List[LootTable]
+    tags        : List[Union[Tag, str]]
+    monsters    : List[Union[Monster, str]]
+
+    def build(self, engine: Optional[Engine] = None) -> BuildReport:
+        """
+        Write the catalog into an empty database through `BUILD_DATABASE`.
+        """
+        return BUILD_DATABASE(
+            items=self.items,
+            materials=self.materials,
+            loot_tables=self.loot_tables,
+            tags=self.tags,
+            monsters=self.monsters,
+            engine=engine
+        )
+
+
+def _names(enum, count: int, prefix: str) -> List[Union[str, object]]:
+    """
+    The first `count` members of `enum`, then numbered names past its end.
+    """
+    members = list(enum)[:count]
+    return members + [f"{prefix} {i}" for i in range(len(members), count)]
+
+
+def _weights(rng: random.Random, width: int) -> List[int]:
+    """
+    `width` positive weights adding up to 100.
+    """
+    cuts = sorted(rng.sample(range(1, 100), width - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [100])]
+
+
+def generate_catalog(
+    items       : int = 1_000,
+    tags        : int = len(Tag),
+    materials   : int = len(MaterialType),
+    monsters    : int = len(Monster),
+    loot_width  : int = 6,
+    seed        : int = 0
+) -> SyntheticCatalog:
+    """
+    A reproducible catalog shaped like the shipped one at any size. Tags, materials and
+    monsters reuse the enum members before numbered names are made up, and tag
+    popularity is skewed so a few tags carry most items. Each loot table has
+    `loot_width` entries, about half of them tags.
+    """
+    if not 1 <= loot_width <= 100:
+        raise ValueError(f"Loot width '{loot_width}' must be between 1 and 100")
+
+    if min(items, tags, materials, monsters) < 1:
+        raise ValueError("A catalog needs at least one item, tag, material and monster")
+
+    rng = random.Random(seed)
+    qualities = list(Quality)
+
+    tag_names = _names(Tag, tags, "Tag")
+    tag_weights = [1 / (rank + 1) for rank in range(tags)]
+
+    _materials = [
+        Material(name, rng.choices(qualities, QUALITY_WEIGHTS)[0])
+        for name in _names(MaterialType, materials, "Material")
+    ]
+
+    _items = []
+    for i in range(items):
+        item_tags = dict.fromkeys(rng.choices(tag_names, tag_weights, k=rng.randint(1, 3)))
+
+        _items.append(Item(
+            name=f"Item {i}",
+            weight=max(1, int(rng.lognormvariate(4, 1.5))),
+            value=int(rng.lognormvariate(6, 2)),
+            description=f"Synthetic item {i}.",
+            quality=rng.choices(qualities, QUALITY_WEIGHTS)[0],
+            craftable=rng.random() < 0.3,
+            composition=rng.sample(_materials, min(rng.randint(1, 3), materials)),
+            tags=list(item_tags),
+            flavor_text=None if rng.random() < 0.5 else f"Flavor of item {i}."
+        ))
+
+    # Only tags some item carries can be dropped.
+    carried = list(dict.fromkeys(tag for item in _items for tag in item.tags))
+    monster_names = _names(Monster, monsters, "Monster")
+
+    def entry():
+        if rng.random() < 0.5:
+            return rng.choice(carried), LootKind.TAG
+
+        return rng.choice(_items).name, LootKind.ITEM
+
+    loot_tables = []
+    for monster in monster_names:
+        weights = _weights(rng, loot_width)
+        all_loot, kinds = zip(*(entry() for _ in range(loot_width)))
+        loot_tables.append(LootTable(creature=monster, weights=weights, all_loot=list(all_loot), kinds=list(kinds)))
+
+    return SyntheticCatalog(_items, _materials, loot_tables, tag_names, monster_names)
+
+
+if __name__ == '__main__':
+
+    import tempfile
+
+    from sqlalchemy import create_engine
+
+    from _db_utils import SingletonModelBase
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/synthetic.db")
+        SingletonModelBase.get_instance().metadata.create_all(engine)
+
+        print(generate_catalog(items=10_000, tags=50, monsters=20).build(engine))
+        engine.dispose()
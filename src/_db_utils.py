@@ -1,22 +1,253 @@
-
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from dataclasses import dataclass, fields, replace
+from functools import partial
+from typing import Callable, List, Optional, TypeVar
+import asyncio
+import os
+import threading
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 
-DATABASE    = "sqlite:///example.db"
-ENGINE      = create_engine(DATABASE)
-Session     = sessionmaker(bind=ENGINE)
+@dataclass(frozen=True)
+class EngineProfile:
+    """
+    SQLite pragmas applied to every new connection, `None` keeps SQLite's default.
+    `read_only_uri` opens read sessions through a `mode=ro` URI connection.
+
+    A read-only connection cannot set `journal_mode`, the database only switches to
+    WAL once a write connection opens. A process that only reads leaves it in its
+    rollback journal mode, usually `delete`, so its readers gain nothing from WAL
+    until some writer has run against the file.
+    """
+    journal_mode    : Optional[str] = None
+    synchronous     : Optional[str] = None
+    cache_size      : Optional[int] = None  # pages, or KiB when negative
+    mmap_size       : Optional[int] = None  # bytes
+    temp_store      : Optional[str] = None
+    busy_timeout    : Optional[int] = None  # milliseconds
+    read_only_uri   : bool = False
+
+    @classmethod
+    def tuned(cls) -> "EngineProfile":
+        return cls(
+            journal_mode="WAL",
+            synchronous="NORMAL",
+            cache_size=-64_000,
+            mmap_size=256 * 1024 * 1024,
+            temp_store="MEMORY",
+            busy_timeout=5_000,
+            read_only_uri=True,
+        )
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> "EngineProfile":
+        """
+        `INVENTORY_DB_PROFILE=tuned` starts from `tuned`, then any field can be set on
+        its own, e.g. `INVENTORY_DB_BUSY_TIMEOUT=10000`.
+        """
+        profile = cls.tuned() if environ.get("INVENTORY_DB_PROFILE", "").lower() == "tuned" else cls()
+
+        for f in fields(cls):
+            if (value := environ.get(f"INVENTORY_DB_{f.name.upper()}")) is None:
+                continue
+
+            if f.name == "read_only_uri":
+                value = value.lower() in ("1", "true", "yes")
+
+            elif f.name in ("cache_size", "mmap_size", "busy_timeout"):
+                value = int(value)
+
+            profile = replace(profile, **{f.name: value})
+
+        return profile
+
+    def pragmas(self, read_only: bool = False) -> List[str]:
+        pragmas = [
+            f"PRAGMA {f.name} = {value}"
+            for f in fields(self)
+            if f.name != "read_only_uri" and (value := getattr(self, f.name)) is not None
+        ]
+
+        # A read-only connection cannot change the journal mode, the writer sets it.
+        return [p for p in pragmas if not (read_only and p.startswith("PRAGMA journal_mode"))]
+
+
+def _apply_pragmas(engine: Engine, pragmas: List[str]) -> Engine:
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """
+    A `sessionmaker` that creates the engines when its first session is made.
+    """
+
+    def __call__(self, **local_kw) -> Session:
+        _create_engines()
+        return super().__call__(**local_kw)
+
+
+T = TypeVar("T")
+
+DATABASE        = "example.db"
+PROFILE         = EngineProfile.from_env()
+ASYNC_WORKERS   = int(os.environ.get("INVENTORY_DB_ASYNC_WORKERS", 8))
+ENGINE          : Optional[Engine] = None
+READ_ENGINE     : Optional[Engine] = None
+Session         = _LazySessionmaker()
+ReadSession     = _LazySessionmaker(autoflush=False)
+
+_shared         = threading.local()
+_lock           = threading.Lock()
+_executor       : Optional[ThreadPoolExecutor] = None
+
+
+def configure(
+    profile         : Optional[EngineProfile] = None,
+    database        : Optional[str] = None,
+    async_workers   : Optional[int] = None
+) -> None:
+    """
+    Use `database` with `profile` and `async_workers` threads for `run_in_db_executor`
+    from now on. The current engines and executor are shut down, new ones are created
+    on first use.
+    """
+    global DATABASE, PROFILE, ASYNC_WORKERS, ENGINE, READ_ENGINE, _executor
+
+    with _lock:
+        DATABASE = database or DATABASE
+        PROFILE = profile or PROFILE
+        ASYNC_WORKERS = async_workers or ASYNC_WORKERS
+
+        for engine in (ENGINE, READ_ENGINE):
+            if engine is not None:
+                engine.dispose()
+
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+
+        ENGINE = READ_ENGINE = _executor = None
+
+
+def _create_engines() -> None:
+    """
+    Create the engines for the configured database, once, and bind the sessionmakers.
+    """
+    global ENGINE, READ_ENGINE
+
+    if ENGINE is not None:
+        return
+
+    with _lock:
+        if ENGINE is not None:
+            return
+
+        engine = _apply_pragmas(create_engine(f"sqlite:///{DATABASE}"), PROFILE.pragmas())
+
+        if PROFILE.read_only_uri:
+            read_url = f"sqlite:///file:{os.path.abspath(DATABASE)}?mode=ro&uri=true"
+
+        else:
+            read_url = f"sqlite:///{DATABASE}"
+
+        # Reads need no transaction to commit. A pool of its own keeps autocommit set on
+        # its connections instead of switching isolation level on every checkout.
+        # Sized so every `run_in_db_executor` thread can hold a connection at once.
+        READ_ENGINE = _apply_pragmas(
+            create_engine(read_url, isolation_level="AUTOCOMMIT", pool_size=max(5, ASYNC_WORKERS)),
+            PROFILE.pragmas(read_only=PROFILE.read_only_uri)
+        )
+
+        Session.configure(bind=engine)
+        ReadSession.configure(bind=READ_ENGINE)
+
+        # Published last, a thread that sees ENGINE set finds everything bound.
+        ENGINE = engine
+
+
+def get_engine() -> Engine:
+    _create_engines()
+    return ENGINE
+
+
+def _after_fork() -> None:
+    """
+    Runs in the child of every fork. The pooled connections inherited from the parent
+    are dropped without closing them, the parent still uses them, and the child opens
+    its own on first use. The executor's threads and any lock holder did not survive.
+    """
+    global _executor, _lock, _shared
+
+    for engine in (ENGINE, READ_ENGINE):
+        if engine is not None:
+            engine.dispose(close=False)
+
+    _executor, _lock, _shared = None, threading.Lock(), threading.local()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if (executor := _executor) is None:
+        with _lock:
+            if (executor := _executor) is None:
+                executor = _executor = ThreadPoolExecutor(ASYNC_WORKERS, thread_name_prefix="inventory-db")
+
+    return executor
+
+
+async def run_in_db_executor(call: Callable[..., T], *args) -> T:
+    """
+    Await `call(*args)` on a bounded pool of `ASYNC_WORKERS` threads kept for database
+    work, so blocking SQLite I/O never runs on the event loop. SQLite releases the GIL
+    while it executes, concurrent calls overlap.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_db_executor(), partial(call, *args))
+
+
+def _shared_for(read_only: bool) -> Optional[Session]:
+    """
+    The thread's shared session if it can serve a scope of this mode, a read-only share
+    cannot serve writes, they would never be committed.
+    """
+    if (shared := getattr(_shared, "session", None)) is None:
+        return None
+
+    return shared if read_only or not getattr(_shared, "read_only", False) else None
 
 
 @contextmanager
-def session_scope() -> Session:
-    session = Session()
+def session_scope(read_only: bool = False) -> Session:
+    """
+    A session committed and closed on exit. With `read_only` nothing is committed.
+    Inside `shared_session` the thread's shared session is handed out instead, unless
+    it is read-only and this scope writes, then the writes get a session of their own.
+    """
+    if (shared := _shared_for(read_only)) is not None:
+        yield shared
+        return
+
+    session = ReadSession() if read_only else Session()
 
     try:
         yield session
-        session.commit()
+
+        if not read_only:
+            session.commit()
 
     except:
         session.rollback()
@@ -26,6 +257,31 @@ def session_scope() -> Session:
         session.close()
 
 
+@contextmanager
+def shared_session(read_only: bool = False) -> Session:
+    """
+    One session for every `session_scope` on this thread until the block exits, e.g.
+    for all the lookups of one encounter, which then share its connection. A read-only
+    share runs in autocommit like every read, each statement sees the latest commit
+    and the lookups do not read one snapshot. A writable share is one transaction. A
+    writable share opened inside a read-only one replaces it until the block exits.
+    """
+    if (shared := _shared_for(read_only)) is not None:
+        yield shared
+        return
+
+    outer = (getattr(_shared, "session", None), getattr(_shared, "read_only", False))
+
+    with session_scope(read_only) as session:
+        _shared.session, _shared.read_only = session, read_only
+
+        try:
+            yield session
+
+        finally:
+            _shared.session, _shared.read_only = outer
+
+
 class SingletonModelBase:
     _model_base = None
 
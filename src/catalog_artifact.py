@@ -0,0 +1,280 @@
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import mmap
+import random
+import struct
+
+from enums import as_enum, ItemName, LootKind, MaterialType, Monster, Quality, Tag
+from item import Item
+from material import Material
+
+if TYPE_CHECKING:
+    from loot import LootTable
+
+
+MAGIC       = b"INVCATLG"
+VERSION     = 1
+NONE        = 0xFFFFFFFF    # string id of a missing string, e.g. no flavor text
+
+# Sections in file order, each addressed by an (offset, count) pair in the header.
+SECTIONS    = (
+    "string_offsets",   # u32 per string plus one, into string_data
+    "string_data",      # utf-8 bytes
+    "materials",        # MATERIAL records
+    "items",            # ITEM records, ordered by id
+    "item_tags",        # u32 string ids, sliced by ITEM.tags_start/tags_count
+    "item_materials",   # u32 material indexes, sliced by ITEM.materials_start/materials_count
+    "name_index",       # u32 item indexes, ordered by the item's name bytes
+    "tags",             # TAG records, ordered by the tag's name bytes
+    "tag_items",        # u32 item indexes, sliced by TAG.start/count
+    "loot_tables",      # LOOT_TABLE records, ordered by the monster's name bytes
+    "loot_entries",     # LOOT_ENTRY records, sliced by LOOT_TABLE.start/count
+)
+
+HEADER      = struct.Struct("<8sI32s" + "QQ" * len(SECTIONS))
+U32         = struct.Struct("<I")
+MATERIAL    = struct.Struct("<II")              # name, quality
+ITEM        = struct.Struct("<qIqqIIIIIIII")    # id, name, weight, value, description, quality, flavor_text,
+                                                # craftable, tags_start, tags_count, materials_start, materials_count
+TAG         = struct.Struct("<III")             # name, start, count
+LOOT_TABLE  = struct.Struct("<III")             # monster, start, count
+LOOT_ENTRY  = struct.Struct("<III")             # kind (0 item, 1 tag), name, weight
+
+KIND_ITEM   = 0
+KIND_TAG    = 1
+
+
+class CatalogArtifact:
+    """
+    Read-only view of a catalog compiled by `_db_artifact.compile_artifact`. The file is
+    memory mapped and nothing is decoded up front, every `Item` and `LootTable` is built
+    from its fixed-width record when asked for, and name lookups binary search the
+    sorted indexes. Opening costs the same at any catalog size.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"'{path}' is too small to be a catalog artifact")
+
+        magic, version, source_hash, *sections = HEADER.unpack_from(self._mmap)
+
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a catalog artifact")
+
+        if version != VERSION:
+            raise ValueError(f"Catalog artifact version {version} is not supported, expected {VERSION}")
+
+        self.source_hash    : str = source_hash.hex()
+        self._sections      : dict = {
+            name: (sections[2 * i], sections[2 * i + 1]) for i, name in enumerate(SECTIONS)
+        }
+
+    def __enter__(self) -> "CatalogArtifact":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count("items")
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _count(self, section: str) -> int:
+        return self._sections[section][1]
+
+    def _record(self, section: str, record: struct.Struct, index: int) -> tuple:
+        return record.unpack_from(self._mmap, self._sections[section][0] + index * record.size)
+
+    def _u32(self, section: str, index: int) -> int:
+        return self._record(section, U32, index)[0]
+
+    def _string_bytes(self, id: int) -> bytes:
+        start, end = self._u32("string_offsets", id), self._u32("string_offsets", id + 1)
+        offset = self._sections["string_data"][0]
+        return self._mmap[offset + start:offset + end]
+
+    def _string(self, id: int) -> Optional[str]:
+        return None if id == NONE else self._string_bytes(id).decode()
+
+    @staticmethod
+    def _bisect(count: int, key_at: Callable[[int], object], key: object) -> Optional[int]:
+        lo, hi = 0, count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if key_at(mid) < key:
+                lo = mid + 1
+
+            else:
+                hi = mid
+
+        return lo if lo < count and key_at(lo) == key else None
+
+    def _item_record(self, index: int) -> tuple:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Item index '{index}' out of range")
+
+        return self._record("items", ITEM, index)
+
+    def item(self, index: int) -> Item:
+        """
+        The item of record `index`, records are ordered by id.
+        """
+        (
+            _, name, weight, value, description, quality, flavor_text,
+            craftable, tags_start, tags_count, materials_start, materials_count
+        ) = self._item_record(index)
+
+        composition = []
+        for i in range(materials_start, materials_start + materials_count):
+            material_name, material_quality = self._record("materials", MATERIAL, self._u32("item_materials", i))
+            composition.append(Material(as_enum(MaterialType, self._string(material_name)), Quality(self._string(material_quality))))
+
+        return Item(
+            name=as_enum(ItemName, self._string(name)),
+            weight=weight,
+            value=value,
+            description=self._string(description),
+            quality=Quality(self._string(quality)),
+            craftable=bool(craftable),
+            composition=composition,
+            tags=[as_enum(Tag, self._string(self._u32("item_tags", i))) for i in range(tags_start, tags_start + tags_count)],
+            flavor_text=self._string(flavor_text)
+        )
+
+    def name(self, index: int) -> ItemName:
+        return as_enum(ItemName, self._string(self._item_record(index)[1]))
+
+    def value(self, index: int) -> int:
+        return self._item_record(index)[3]
+
+    def fields(self, index: int, fields: Sequence[str]) -> tuple:
+        """
+        The raw values of `fields` of record `index`, any of `item_manager.FIELDS`, as the
+        database columns hold them. Only the strings asked for are decoded.
+        """
+        id, name, weight, value, description, quality, flavor_text, craftable, *_ = self._item_record(index)
+        numbers = {"id": id, "weight": weight, "value": value, "craftable": bool(craftable)}
+        strings = {"name": name, "description": description, "quality": quality, "flavor_text": flavor_text}
+
+        return tuple(numbers[field] if field in numbers else self._string(strings[field]) for field in fields)
+
+    @property
+    def items(self) -> Iterator[Item]:
+        return (self.item(i) for i in range(len(self)))
+
+    @property
+    def rows(self) -> Iterator[Tuple[int, Item]]:
+        """
+        `(id, item)` of every item, as `ItemCatalog` is built from.
+        """
+        return ((self._item_record(i)[0], self.item(i)) for i in range(len(self)))
+
+    @property
+    def names(self) -> List[ItemName]:
+        """
+        Every item's name ordered by id, without building the items.
+        """
+        return [self.name(i) for i in range(len(self))]
+
+    @property
+    def random(self) -> Item:
+        if not len(self):
+            raise KeyError("No items found for 'random'.")
+
+        return self.item(random.randrange(len(self)))
+
+    def index_fm_id(self, id: int) -> Optional[int]:
+        return self._bisect(len(self), lambda i: self._item_record(i)[0], id)
+
+    def index_fm_name(self, name: ItemName) -> Optional[int]:
+        """
+        The record index of the item called `name`, `None` when there is none.
+        """
+
+        def name_at(i: int) -> bytes:
+            return self._string_bytes(self._item_record(self._u32("name_index", i))[1])
+
+        if (index := self._bisect(self._count("name_index"), name_at, name.encode())) is None:
+            return None
+
+        return self._u32("name_index", index)
+
+    def get_fm_id(self, id: int) -> Item:
+        if (index := self.index_fm_id(id)) is None:
+            raise KeyError(f"Item id '{id}' not found.")
+
+        return self.item(index)
+
+    def get_fm_name(self, name: ItemName) -> Item:
+        if (index := self.index_fm_name(name)) is None:
+            raise KeyError(f"Item '{name}' not found.")
+
+        return self.item(index)
+
+    def _tag(self, tag: Tag) -> Optional[Tuple[int, int]]:
+        key_at = lambda i: self._string_bytes(self._record("tags", TAG, i)[0])
+
+        if (index := self._bisect(self._count("tags"), key_at, tag.encode())) is None:
+            return None
+
+        return self._record("tags", TAG, index)[1:]
+
+    def indexes_fm_tag(self, tag: Tag) -> List[int]:
+        """
+        The record indexes of the items carrying `tag`, ordered by id.
+        """
+        if (span := self._tag(tag)) is None:
+            return []
+
+        start, count = span
+        return [self._u32("tag_items", i) for i in range(start, start + count)]
+
+    def gets_fm_tag(self, tag: Tag) -> List[Item]:
+        return [self.item(index) for index in self.indexes_fm_tag(tag)]
+
+    @property
+    def monsters(self) -> List[Monster]:
+        return [
+            as_enum(Monster, self._string(self._record("loot_tables", LOOT_TABLE, i)[0]))
+            for i in range(self._count("loot_tables"))
+        ]
+
+    def loot_table(self, monster: Monster) -> "LootTable":
+        # Imported here, `loot` loads numpy and the item manager.
+        from loot import LootTable
+
+        key_at = lambda i: self._string_bytes(self._record("loot_tables", LOOT_TABLE, i)[0])
+
+        if (index := self._bisect(self._count("loot_tables"), key_at, monster.encode())) is None:
+            raise KeyError(f"Loot table '{monster}' not found.")
+
+        monster_name, start, count = self._record("loot_tables", LOOT_TABLE, index)
+        weights, all_loot, kinds = [], [], []
+
+        for i in range(start, start + count):
+            kind, name, weight = self._record("loot_entries", LOOT_ENTRY, i)
+            weights.append(weight)
+            all_loot.append(as_enum(ItemName if kind == KIND_ITEM else Tag, self._string(name)))
+            kinds.append(LootKind.ITEM if kind == KIND_ITEM else LootKind.TAG)
+
+        return LootTable(
+            creature=as_enum(Monster, self._string(monster_name)), weights=weights, all_loot=all_loot, kinds=kinds
+        )
+
+
+if __name__ == '__main__':
+
+    import sys
+
+    with CatalogArtifact(sys.argv[1] if len(sys.argv) > 1 else "catalog.bin") as artifact:
+        print(f"{len(artifact)} items, source {artifact.source_hash[:12]}")
+        print(artifact.get_fm_name(ItemName.TOOLBOX))
+        print(artifact.loot_table(Monster.GOBLIN))
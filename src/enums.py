@@ -1,5 +1,8 @@
 
 from enum import Enum
+from typing import Type, TypeVar, Union
+
+E = TypeVar("E", bound=Enum)
 
 
 class Border(str, Enum):
@@ -87,6 +90,11 @@ class Monster(str, Enum):
     TROLL           = "Troll"
 
 
+class LootKind(str, Enum):
+    ITEM    = "item"
+    TAG     = "tag"
+
+
 class Quality(str, Enum):
     POOR        = "Poor"
     COMMON      = "Common"
@@ -117,3 +125,15 @@ class Tag(str, Enum):
     WEAVING         = "Weaving"
     FOOD            = "Food"
     EQUIPMENT       = "Equipment"
+
+
+def as_enum(enum: Type[E], value: str) -> Union[E, str]:
+    """
+    The member of `enum` for `value`, or `value` itself for a name the enum does not
+    define, e.g. the catalogs made by `_db_synthetic`.
+    """
+    try:
+        return enum(value)
+
+    except ValueError:
+        return value
@@ -1,6 +1,6 @@
 
 from collections import defaultdict
-from typing import Dict, List, Union
+from typing import Dict, Iterable, List, Sequence, Union
 
 from access_wrapper import AccessWrapper
 from currency import Currency
@@ -46,6 +46,17 @@ class Inventory:
 
         return self
 
+    def add_item_counts(self, counts: Sequence[int], items: Iterable[ItemName] = ItemName) -> "Inventory":
+        """
+        Add a count per item of `items`, by default every `ItemName` ordered as the enum
+        is defined.
+        """
+        for item, count in zip(items, counts):
+            if count:
+                self.items[item] += int(count)
+
+        return self
+
     def remove_item(self, item: ItemName) -> "Inventory":
 
         if not self.items.get(item):
@@ -0,0 +1,181 @@
+from collections import defaultdict
+from dataclasses import replace
+from enum import Enum
+from types import MappingProxyType
+from typing import Callable, Collection, Iterable, List, Mapping, Tuple
+import random
+
+from _db_access_wrapper import _no_result
+from enums import ItemName, MaterialType, Quality, Tag
+from item import Item
+
+
+def _freeze(item: Item) -> Item:
+    if isinstance(item.composition, tuple) and isinstance(item.tags, tuple):
+        return item
+
+    return replace(item, composition=tuple(item.composition), tags=tuple(item.tags))
+
+
+def _index(pairs: Iterable[Tuple[Enum, Item]]) -> Mapping[Enum, Tuple[Item, ...]]:
+    index = defaultdict(list)
+
+    for key, item in pairs:
+        index[key].append(item)
+
+    return MappingProxyType({key: tuple(items) for key, items in index.items()})
+
+
+class ItemCatalog:
+    """
+    Immutable snapshot of every `Item`, indexed by name, id, `Tag`, `Quality` and
+    `MaterialType`. Built in full before it is handed out, so swapping one snapshot
+    for another is a single reference assignment.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, Item]]):
+        by_id = {id: _freeze(item) for id, item in rows}
+        items = tuple(by_id.values())
+
+        self.items              : Tuple[Item, ...] = items
+        self.by_id              : Mapping[int, Item] = MappingProxyType(by_id)
+        self.by_name            : Mapping[ItemName, Item] = MappingProxyType({item.name: item for item in items})
+        self.by_tag             : Mapping[Tag, Tuple[Item, ...]] = _index(
+            (tag, item) for item in items for tag in item.tags
+        )
+        self.by_quality         : Mapping[Quality, Tuple[Item, ...]] = _index(
+            (item.quality, item) for item in items
+        )
+        self.by_materialtype    : Mapping[MaterialType, Tuple[Item, ...]] = _index(
+            (material.name, item) for item in items for material in item.composition
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def replacing(self, ids: Collection[int], names: Collection[ItemName], rows: Iterable[Tuple[int, Item]]) -> "ItemCatalog":
+        """
+        A new snapshot without the items of `ids` and `names`, plus `rows`, in id order.
+        The other items are shared with this one, nothing is read.
+        """
+        by_id = {id: item for id, item in self.by_id.items() if id not in ids and item.name not in names}
+        by_id.update(rows)
+        return ItemCatalog(sorted(by_id.items(), key=lambda row: row[0]))
+
+    @staticmethod
+    def _choice(items: Tuple[Item, ...], key: object) -> Item:
+        if not items:
+            raise KeyError(f"No items found for '{key}'.")
+
+        return items[random.randrange(len(items))]
+
+    @staticmethod
+    def _sample(items: Tuple[Item, ...], k: int, replace: bool) -> List[Item]:
+        if k < 0:
+            raise ValueError(f"Cannot sample '{k}' items")
+
+        if not replace and k > len(items):
+            raise ValueError(f"Cannot sample '{k}' items from {len(items)} without replacement")
+
+        if not items:
+            return []
+
+        return random.choices(items, k=k) if replace else random.sample(items, k)
+
+    @property
+    def random(self) -> Item:
+        return self._choice(self.items, "random")
+
+    def get_fm_id(self, id: int) -> Item:
+        try:
+            return self.by_id[id]
+
+        except KeyError:
+            raise KeyError(f"Item id '{id}' not found.")
+
+    def get_fm_name(self, name: ItemName) -> Item:
+        try:
+            return self.by_name[name]
+
+        except KeyError:
+            raise KeyError(f"Item '{name}' not found.")
+
+    def get_fm_materialtype_random(self, material_type: MaterialType) -> Item:
+        return self._choice(self.by_materialtype.get(material_type, ()), material_type)
+
+    def get_fm_quality_random(self, quality: Quality) -> Item:
+        return self._choice(self.by_quality.get(quality, ()), quality)
+
+    def get_fm_tag_random(self, tag: Tag) -> Item:
+        return self._choice(self.by_tag.get(tag, ()), tag)
+
+    def gets_fm_materialtype(self, material_type: MaterialType) -> Tuple[Item, ...]:
+        return self.by_materialtype.get(material_type, ())
+
+    def gets_fm_quality(self, quality: Quality) -> Tuple[Item, ...]:
+        return self.by_quality.get(quality, ())
+
+    def gets_fm_tag(self, tag: Tag) -> Tuple[Item, ...]:
+        return self.by_tag.get(tag, ())
+
+    def sample_fm_materialtype(self, material_type: MaterialType, k: int, replace: bool = False) -> List[Item]:
+        return self._sample(self.gets_fm_materialtype(material_type), k, replace)
+
+    def sample_fm_quality(self, quality: Quality, k: int, replace: bool = False) -> List[Item]:
+        return self._sample(self.gets_fm_quality(quality), k, replace)
+
+    def sample_fm_tag(self, tag: Tag, k: int, replace: bool = False) -> List[Item]:
+        return self._sample(self.gets_fm_tag(tag), k, replace)
+
+
+class CatalogAccessWrapper:
+
+    """
+    Attribute, item and lookup access like `_db_access_wrapper.AccessWrapper`, served
+    from whichever `ItemCatalog` `catalog` returns at the time of the call. A missing
+    item raises `NoResultFound` as the database lookups do.
+    """
+
+    def __init__(self, keys, catalog: Callable[[], ItemCatalog]):
+        self.keys       : Enum = keys
+        self.catalog    : Callable[[], ItemCatalog] = catalog
+
+    def __getattr__(self, name: str) -> Item:
+
+        if not (_name := getattr(self.keys, name, None)):
+            raise AttributeError(f"{name} is not a valid attribute")
+
+        return self.get_fm_name(_name)
+
+    def __getitem__(self, name: Enum) -> Item:
+
+        if not (_name := getattr(self.keys, name.name, None)):
+            raise AttributeError(f"{name} is not a valid attribute")
+
+        return self.get_fm_name(_name)
+
+    @property
+    def random(self) -> Item:
+        try:
+            return self.catalog().random
+
+        except KeyError:
+            raise _no_result("Query returned no results.") from None
+
+    @property
+    def all_results(self) -> List[Item]:
+        return list(self.catalog().items)
+
+    def get_fm_id(self, id: int) -> Item:
+        try:
+            return self.catalog().get_fm_id(id)
+
+        except KeyError:
+            raise _no_result("Query returned no results.") from None
+
+    def get_fm_name(self, name: Enum) -> Item:
+        try:
+            return self.catalog().get_fm_name(name)
+
+        except KeyError:
+            raise _no_result(f"Query '{name}' returned no results.") from None
@@ -1,65 +1,476 @@
 
-from typing import Generic, List, TypeVar
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, FrozenSet, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type, TYPE_CHECKING
+import threading
 
-from _db_access_wrapper import AccessWrapper
-from _db_models import ModelBase, QueryBase, ItemModel
-from _db_utils import session_scope
+from _db_access_wrapper import _in_db_executor, _read_session
+from _db_invalidation import InvalidationBus
 from material import Material
-from enums import ItemName, MaterialType, Quality, Tag
+from enums import as_enum, ItemName, MaterialType, Quality, Tag
 from item import Item
+from item_catalog import CatalogAccessWrapper, ItemCatalog
 
+if TYPE_CHECKING:
+    from _db_models import ItemModel
+    from catalog_artifact import CatalogArtifact
 
-ModelType = TypeVar('ModelType', bound=ModelBase)
-QueryType = TypeVar('QueryType', bound=QueryBase)
+
+def _model() -> Type["ItemModel"]:
+    # Imported on first reload, keeps SQLAlchemy out of startup.
+    from _db_models import ItemModel
+    return ItemModel
 
 
 def as_item(query):
     return Item(
-        name=ItemName(query.name),
+        name=as_enum(ItemName, query.name),
         weight=query.weight,
         value=query.value,
         description=query.description,
         quality=Quality(query.quality.name),
         craftable=query.craftable,
-        composition=[Material(MaterialType(m.name), Quality(m.quality.name)) for m in query.materials],
-        tags=[Tag(t.name) for t in query.tags],
+        composition=[Material(as_enum(MaterialType, m.name), Quality(m.quality.name)) for m in query.materials],
+        tags=[as_enum(Tag, t.name) for t in query.tags],
         flavor_text=query.flavor_text
     )
 
 
+ORDERS = ("id", "name", "value", "weight")
+FIELDS = ("id", "name", "weight", "value", "description", "quality", "craftable", "flavor_text")
+PATCH_LIMIT = 10_000    # changed keys above which the snapshot is loaded in full again
+
+
+class ItemPage(NamedTuple):
+    items   : List[Item]
+    after   : Optional[tuple]   # pass to `ItemQuery.page` for the next page, `None` on the last
+
+
+@dataclass(frozen=True)
+class ItemQuery:
+    """
+    Filters and order over every item, run as one SQL statement. Each method returns
+    a new query, so they chain and a query can be kept and extended:
+
+        ItemManager.query().any_tag(Tag.JUNK, Tag.TOOL).of_quality(Quality.POOR).order_by("value").page(20)
+
+    Names, tags, qualities and materials each match any of theirs unless `all_tags`,
+    the value and weight bounds are inclusive.
+    """
+    names       : Tuple[ItemName, ...] = ()
+    tags_any    : Tuple[Tag, ...] = ()
+    tags_all    : Tuple[Tag, ...] = ()
+    qualities   : Tuple[Quality, ...] = ()
+    materials   : Tuple[MaterialType, ...] = ()
+    value       : Tuple[Optional[int], Optional[int]] = (None, None)
+    weight      : Tuple[Optional[int], Optional[int]] = (None, None)
+    craftable   : Optional[bool] = None
+    order       : str = "id"
+    descending  : bool = False
+
+    def named(self, *names: ItemName) -> "ItemQuery":
+        return replace(self, names=self.names + names)
+
+    def any_tag(self, *tags: Tag) -> "ItemQuery":
+        return replace(self, tags_any=self.tags_any + tags)
+
+    def all_tags(self, *tags: Tag) -> "ItemQuery":
+        return replace(self, tags_all=self.tags_all + tags)
+
+    def of_quality(self, *qualities: Quality) -> "ItemQuery":
+        return replace(self, qualities=self.qualities + qualities)
+
+    def of_material(self, *materials: MaterialType) -> "ItemQuery":
+        return replace(self, materials=self.materials + materials)
+
+    def value_between(self, low: Optional[int] = None, high: Optional[int] = None) -> "ItemQuery":
+        return replace(self, value=(low, high))
+
+    def weight_between(self, low: Optional[int] = None, high: Optional[int] = None) -> "ItemQuery":
+        return replace(self, weight=(low, high))
+
+    def only_craftable(self, craftable: bool = True) -> "ItemQuery":
+        return replace(self, craftable=craftable)
+
+    def order_by(self, order: str, descending: bool = False) -> "ItemQuery":
+        if order not in ORDERS:
+            raise ValueError(f"Cannot order items by '{order}', expected one of {', '.join(ORDERS)}")
+
+        return replace(self, order=order, descending=descending)
+
+    def ids(self) -> List[int]:
+        with _read_session() as session:
+            return [row[-1] for row in _model().gets_id_fm_query(session, self)]
+
+    def all(self) -> List["Item"]:
+        """
+        Every matching item, from the catalog when it is loaded and holds them all,
+        otherwise read with the query.
+        """
+        if (catalog := ItemManager._catalog) is not None:
+            ids = self.ids()
+
+            if all(id in catalog.by_id for id in ids):
+                return [catalog.by_id[id] for id in ids]
+
+        return list(self.stream())
+
+    def page(self, limit: int, after: Optional[tuple] = None) -> ItemPage:
+        """
+        Up to `limit` items following the position `after` from the previous page. Each
+        page seeks straight to its position instead of skipping the rows before it.
+        """
+        if limit < 1:
+            raise ValueError(f"Page limit '{limit}' must be a positive integer")
+
+        with _read_session() as session:
+            rows = _model().gets_id_fm_query(session, self, limit + 1, after)
+            items = ItemManager._gets_fm_ids(session, [row[-1] for row in rows[:limit]])
+
+        return ItemPage(items=items, after=rows[limit - 1] if len(rows) > limit else None)
+
+    def select(self, *fields: str) -> List[tuple]:
+        return ItemManager.select(fields, self)
+
+    def stream(self, chunk_size: int = 1_000) -> Iterator["Item"]:
+        """
+        Every matching item read and converted `chunk_size` rows at a time, straight from
+        the database without the catalog. The read session stays open until exhausted.
+        """
+        with _read_session() as session:
+            for row in _model().gets_fm_query(session, self, chunk_size):
+                yield as_item(row)
+
+
 class ItemManager:
-    _model      : Generic[ModelType, QueryType] = ItemModel
-    Item        : AccessWrapper = AccessWrapper(ItemName, _model, as_item)
+    """
+    Item lookups served from an in-memory `ItemCatalog`, loaded from the database on
+    first use. Call `reload` after the catalog changes. Given an opened artifact with
+    `use_artifact`, the catalog and the per-tag reads come from it instead.
+    """
+    _catalog    : Optional[ItemCatalog] = None
+    _artifact   : Optional["CatalogArtifact"] = None
+    _stale      : Optional[ItemCatalog] = None      # the last snapshot, until `_stale_keys` are read again
+    _stale_keys : FrozenSet[Hashable] = frozenset()
+    _generation : int = 0
+    _lock       : threading.Lock = threading.Lock()
+    _loading    : threading.Lock = threading.Lock()
+    _listeners  : List[Callable[[], None]] = []
+    Item        : CatalogAccessWrapper = CatalogAccessWrapper(ItemName, lambda: ItemManager._lookups())
+
+    @classmethod
+    def catalog(cls) -> ItemCatalog:
+        if (catalog := cls._catalog) is None:
+
+            # Threads asking at once wait for the first one's load instead of repeating it.
+            with cls._loading:
+                if (catalog := cls._catalog) is None:
+                    catalog = cls.reload() if cls._stale is None else cls._patch()
+
+        return catalog
+
+    @classmethod
+    def _lookups(cls):
+        # With an artifact `Item` decodes the one record asked for, not the whole catalog.
+        return cls.catalog() if cls._artifact is None else cls._artifact
+
+    @classmethod
+    def reload(cls) -> ItemCatalog:
+        """
+        Load a fresh snapshot. One invalidated while loading is returned but not kept,
+        the next lookup loads again. From an artifact this decodes every item, only the
+        lookups that need the whole catalog, e.g. by quality, load it.
+        """
+        with cls._lock:
+            generation = cls._generation
+
+        if (artifact := cls._artifact) is not None:
+            catalog = ItemCatalog(artifact.rows)
+
+        else:
+            with _read_session() as session:
+                catalog = ItemCatalog((row.id, as_item(row)) for row in _model().gets_all(session))
+
+        return cls._install(generation, catalog)
+
+    @classmethod
+    def _patch(cls) -> ItemCatalog:
+        """
+        The last snapshot with only the items of the changed keys, names or `("id", id)`,
+        read again.
+        """
+        with cls._lock:
+            generation, stale, keys = cls._generation, cls._stale, cls._stale_keys
+
+        if stale is None:
+            return cls.reload()
+
+        ids = {key[1] for key in keys if isinstance(key, tuple)}
+        names = {key for key in keys if not isinstance(key, tuple)}
+
+        with _read_session() as session:
+            rows = {row.id: row for row in _model().gets_fm_ids(session, sorted(ids))}
+
+            if names:
+                rows.update((row.id, row) for row in _model().gets_fm_query(session, ItemQuery(names=tuple(names))))
+
+            changed = [(id, as_item(row)) for id, row in rows.items()]
+
+        return cls._install(generation, stale.replacing(ids, names, changed))
+
+    @classmethod
+    def _install(cls, generation: int, catalog: ItemCatalog) -> ItemCatalog:
+        with cls._lock:
+            if generation != cls._generation:
+                return catalog
+
+            cls._catalog, cls._stale, cls._stale_keys = catalog, None, frozenset()
+
+        cls._notify()
+        return catalog
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Drop the current snapshot, the next lookup reloads it.
+        """
+        with cls._lock:
+            cls._catalog, cls._stale, cls._stale_keys = None, None, frozenset()
+            cls._generation += 1
+
+        cls._notify()
+
+    @classmethod
+    def _evict(cls, keys: Optional[FrozenSet[Hashable]]) -> None:
+        """
+        Drop the current snapshot after the items of `keys` changed. The next lookup
+        reads only those items again, the rest are kept from the dropped snapshot.
+        """
+        if keys is None or cls._artifact is not None or len(keys) > PATCH_LIMIT:
+            cls.invalidate()
+            return
+
+        with cls._lock:
+            if (stale := cls._catalog or cls._stale) is not None:
+                cls._stale, cls._stale_keys = stale, cls._stale_keys | keys
+
+            cls._catalog = None
+            cls._generation += 1
+
+        cls._notify()
+
+    @classmethod
+    def use_artifact(cls, artifact: Optional["CatalogArtifact"]) -> None:
+        """
+        Read from an opened `CatalogArtifact` instead of the database, e.g. in a worker
+        process, or from the database again with `None`. `Item`, `select` and the per-tag
+        reads then decode single records, only `select` with a query still reads the
+        database.
+        """
+        cls._artifact = artifact
+        cls.invalidate()
+
+    @classmethod
+    def _notify(cls) -> None:
+        for listener in cls._listeners:
+            listener()
 
     @classmethod
-    def get_fm_materialtype_random(cls, material_type: MaterialType) -> Material:
-        with session_scope() as session:
-            return as_item(cls._model.get_fm_materialtype_random(session, material_type))
+    def on_reload(cls, listener: Callable[[], None]) -> None:
+        cls._listeners.append(listener)
+
+    @classmethod
+    def get_fm_materialtype_random(cls, material_type: MaterialType) -> "Item":
+        return cls.catalog().get_fm_materialtype_random(material_type)
 
     @classmethod
     def get_fm_quality_random(cls, quality: Quality) -> "Item":
-        with session_scope() as session:
-            return as_item(cls._model.get_fm_quality_random(session, quality))
+        return cls.catalog().get_fm_quality_random(quality)
 
     @classmethod
     def get_fm_tag_random(cls, tag: Tag) -> "Item":
-        with session_scope() as session:
-            return as_item(cls._model.get_fm_tag_random(session, tag))
+        return cls.catalog().get_fm_tag_random(tag)
+
+    @classmethod
+    def sample_fm_materialtype(cls, material_type: MaterialType, k: int, replace: bool = False) -> List["Item"]:
+        return cls.catalog().sample_fm_materialtype(material_type, k, replace)
+
+    @classmethod
+    def sample_fm_quality(cls, quality: Quality, k: int, replace: bool = False) -> List["Item"]:
+        return cls.catalog().sample_fm_quality(quality, k, replace)
+
+    @classmethod
+    def sample_fm_tag(cls, tag: Tag, k: int, replace: bool = False) -> List["Item"]:
+        return cls.catalog().sample_fm_tag(tag, k, replace)
 
     @classmethod
     def gets_fm_quality(cls, quality: Quality) -> List["Item"]:
-        with session_scope() as session:
-            return [as_item(row) for row in cls._model.gets_fm_quality(session, quality)]
+        return list(cls.catalog().gets_fm_quality(quality))
 
     @classmethod
     def gets_fm_materialtype(cls, material_type: MaterialType) -> List["Item"]:
-        with session_scope() as session:
-            return [as_item(row) for row in cls._model.gets_fm_materialtype(session, material_type)]
+        return list(cls.catalog().gets_fm_materialtype(material_type))
 
     @classmethod
     def gets_fm_tag(cls, tag: Tag) -> List["Item"]:
-        with session_scope() as session:
-            return [as_item(row) for row in cls._model.gets_fm_tag(session, tag)]
+        return list(cls.catalog().gets_fm_tag(tag))
+
+    @classmethod
+    def query(cls, **filters) -> ItemQuery:
+        """
+        A new `ItemQuery`, optionally starting from its fields, e.g. `query(craftable=True)`.
+        """
+        return ItemQuery(**filters)
+
+    @classmethod
+    def select(cls, fields: Sequence[str], query: Optional[ItemQuery] = None) -> List[tuple]:
+        """
+        Only `fields` of the items matching `query`, or of every item, as tuples of the
+        raw column values in the query's order, e.g. `select(("name", "value"))`. Read
+        straight from the database, the catalog is not loaded.
+        """
+        if unknown := [field for field in fields if field not in FIELDS]:
+            raise ValueError(f"Cannot select {', '.join(unknown)}, expected any of {', '.join(FIELDS)}")
+
+        if not fields:
+            raise ValueError("Select at least one field")
+
+        if query is None and (artifact := cls._artifact) is not None:
+            return [artifact.fields(index, fields) for index in range(len(artifact))]
+
+        with _read_session() as session:
+            return _model().gets_fields_fm_query(session, query or ItemQuery(), tuple(fields))
+
+    @classmethod
+    def _gets_fm_ids(cls, session, ids: List[int]) -> List["Item"]:
+        """
+        The items of `ids` in that order, from the catalog when it is loaded and holds
+        them all, otherwise read by id in `session`.
+        """
+        if (catalog := cls._catalog) is not None and all(id in catalog.by_id for id in ids):
+            return [catalog.by_id[id] for id in ids]
+
+        return [as_item(row) for row in _model().gets_fm_ids(session, ids)]
+
+    @classmethod
+    def values_fm_tag(cls, tag: Tag) -> List[int]:
+        """
+        Values of the items carrying `tag`, by id. From the catalog when it is loaded,
+        otherwise only the values are read.
+        """
+        if (catalog := cls._catalog) is not None:
+            return [item.value for item in catalog.gets_fm_tag(tag)]
+
+        if (artifact := cls._artifact) is not None:
+            return [artifact.value(index) for index in artifact.indexes_fm_tag(tag)]
+
+        return [value for (value,) in cls.select(("value",), ItemQuery(tags_any=(tag,)))]
+
+    @classmethod
+    def values_fm_names(cls, names: Sequence[ItemName]) -> Dict[ItemName, int]:
+        """
+        Value of each of `names` that is an item. From the catalog when it is loaded,
+        otherwise only these items' values are read.
+        """
+        if (catalog := cls._catalog) is not None:
+            return {name: catalog.by_name[name].value for name in names if name in catalog.by_name}
+
+        if (artifact := cls._artifact) is not None:
+            indexes = {name: artifact.index_fm_name(name) for name in names}
+            return {name: artifact.value(index) for name, index in indexes.items() if index is not None}
+
+        if not names:
+            return {}
+
+        return {as_enum(ItemName, name): value for name, value in cls.select(("name", "value"), ItemQuery(names=tuple(names)))}
+
+    @classmethod
+    def names_fm_tag(cls, tag: Tag) -> List[ItemName]:
+        """
+        Names of the items carrying `tag`, by id. From the catalog when it is loaded,
+        otherwise only the names are read.
+        """
+        if (catalog := cls._catalog) is not None:
+            return [item.name for item in catalog.gets_fm_tag(tag)]
+
+        if (artifact := cls._artifact) is not None:
+            return [artifact.name(index) for index in artifact.indexes_fm_tag(tag)]
+
+        return [as_enum(ItemName, name) for (name,) in cls.select(("name",), ItemQuery(tags_any=(tag,)))]
+
+    @classmethod
+    def search(cls, text: str, limit: int = 10, tag: Optional[Tag] = None, quality: Optional[Quality] = None) -> List["Item"]:
+        """
+        Items whose description or flavor text has a word starting with each word of
+        `text`, best match first. Ranked by SQLite's full-text index, the items themselves
+        come from the catalog when it is loaded, otherwise they are read by id.
+        """
+        with _read_session() as session:
+            return cls._gets_fm_ids(session, _model().search_ids(session, text, limit, tag, quality))
+
+
+# Every table an `Item` is built from. A change to the items or their links reads only
+# the changed items again, one to a tag, quality or material may touch any item.
+InvalidationBus.subscribe(("Items", "Item_Tag", "Item_Material"), ItemManager._evict)
+InvalidationBus.subscribe(("Tags", "Qualities", "Materials"), lambda keys: ItemManager.invalidate())
+
+
+class AsyncItemManager:
+    """
+    `ItemManager` for asyncio code. Only loading the catalog touches the database and
+    that runs on the database executor, every lookup after it is served from memory
+    without leaving the event loop.
+    """
+
+    @classmethod
+    async def catalog(cls) -> ItemCatalog:
+        if (catalog := ItemManager._catalog) is None:
+            catalog = await _in_db_executor(ItemManager.catalog)
+
+        return catalog
+
+    @classmethod
+    async def reload(cls) -> ItemCatalog:
+        return await _in_db_executor(ItemManager.reload)
+
+    @classmethod
+    async def get_fm_id(cls, id: int) -> "Item":
+        return (await cls.catalog()).get_fm_id(id)
+
+    @classmethod
+    async def get_fm_name(cls, name: ItemName) -> "Item":
+        return (await cls.catalog()).get_fm_name(name)
+
+    @classmethod
+    async def get_fm_materialtype_random(cls, material_type: MaterialType) -> "Item":
+        return (await cls.catalog()).get_fm_materialtype_random(material_type)
+
+    @classmethod
+    async def get_fm_quality_random(cls, quality: Quality) -> "Item":
+        return (await cls.catalog()).get_fm_quality_random(quality)
+
+    @classmethod
+    async def get_fm_tag_random(cls, tag: Tag) -> "Item":
+        return (await cls.catalog()).get_fm_tag_random(tag)
+
+    @classmethod
+    async def sample_fm_tag(cls, tag: Tag, k: int, replace: bool = False) -> List["Item"]:
+        return (await cls.catalog()).sample_fm_tag(tag, k, replace)
+
+    @classmethod
+    async def gets_fm_quality(cls, quality: Quality) -> List["Item"]:
+        return list((await cls.catalog()).gets_fm_quality(quality))
+
+    @classmethod
+    async def gets_fm_materialtype(cls, material_type: MaterialType) -> List["Item"]:
+        return list((await cls.catalog()).gets_fm_materialtype(material_type))
+
+    @classmethod
+    async def gets_fm_tag(cls, tag: Tag) -> List["Item"]:
+        return list((await cls.catalog()).gets_fm_tag(tag))
+
+    @classmethod
+    async def search(cls, text: str, limit: int = 10, tag: Optional[Tag] = None, quality: Optional[Quality] = None) -> List["Item"]:
+        return await _in_db_executor(ItemManager.search, text, limit, tag, quality)
 
 
 if __name__ == '__main__':
@@ -70,13 +481,17 @@ if __name__ == '__main__':
     print(ItemManager.Item.random)
     print(ItemManager.Item.all_results)
     print(ItemManager.Item[ItemName.TRASH])
-    print(ItemManager.Item.fm_id(1))
+    print(ItemManager.Item.get_fm_id(1))
 
     print(ItemManager.get_fm_materialtype_random(MaterialType.WOOD))
     print(ItemManager.get_fm_quality_random(Quality.UNCOMMON))
     print(ItemManager.get_fm_tag_random(Tag.JUNK))
     print(ItemManager.gets_fm_quality(Quality.UNCOMMON))
     print(ItemManager.gets_fm_materialtype(MaterialType.WOOD))
+    print(ItemManager.search("wood"))
+    print(ItemManager.query().any_tag(Tag.TOOL).value_between(high=1000).order_by("value").page(3))
+    print(ItemManager.names_fm_tag(Tag.JUNK), ItemManager.values_fm_tag(Tag.JUNK))
+    print(ItemManager.query(craftable=True).order_by("value").select("name", "value", "quality"))
 
     # print(LootManager.Tables.GOBLIN)
     # print(LootManager.Tables.fm_id(1))
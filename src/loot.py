@@ -1,60 +1,230 @@
 
 from dataclasses import dataclass, field
-from typing import List
+from functools import cached_property
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 import random
 
-from enums import ItemName, Monster, Tag
+import numpy as np
+
+from enums import ItemName, LootKind, Monster, Tag
 from inventory import Inventory
 from item_manager import ItemManager
+from sampler import AliasTable, RNG
+
+
+ITEM_IDS = {item: i for i, item in enumerate(ItemName)}
+
+
+def item_id(item: ItemName) -> int:
+    """
+    Index of `item` in the count vectors. Names outside `ItemName`, from a synthetic
+    catalog, are appended on first use.
+    """
+    return ITEM_IDS.setdefault(item, len(ITEM_IDS))
+
+
+class CompiledLootTable(NamedTuple):
+    """
+    Alias table over a `LootTable`'s weights plus the items each entry can resolve to.
+    An item entry has a pool of one, a tag entry has every item carrying the tag.
+    `pool_ids` holds the same pools as `ITEM_IDS` indices for the vectorized draws.
+    """
+    alias       : AliasTable
+    pools       : List[List[ItemName]]
+    pool_ids    : List[np.ndarray]
+
+
+def _loot_kind(loot: Union[ItemName, Tag, str]) -> LootKind:
+    if isinstance(loot, ItemName):
+        return LootKind.ITEM
+
+    if isinstance(loot, Tag):
+        return LootKind.TAG
+
+    raise ValueError(f"Kind of loot '{loot}' is not given.")
+
+
+class CreatureValues:
+    """
+    Expected `creature_value` per loot table, from the average item value per tag.
+    Only item values are read, not the catalog. Computed once per table and kept until
+    `invalidate` is called.
+    """
+    _tag_values     : Dict[Tag, Optional[float]] = {}
+    _item_values    : Dict[ItemName, int] = {}
+    _values         : Dict[Tuple[Monster, Tuple], int] = {}
+
+    @classmethod
+    def get(cls, table: "LootTable") -> int:
+        key = (table.creature, tuple(table.all_loot), tuple(table.kinds))
+
+        if (value := cls._values.get(key)) is None:
+            value = cls._values[key] = cls._expected_value(table)
+
+        return value
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls._tag_values = {}
+        cls._item_values = {}
+        cls._values = {}
+
+    @classmethod
+    def _tag_value(cls, tag: Tag) -> Optional[float]:
+        """
+        Average value of the items carrying `tag`, `None` when no item does.
+        """
+        if tag not in cls._tag_values:
+            values = ItemManager.values_fm_tag(tag)
+            cls._tag_values[tag] = sum(values) / len(values) if values else None
+
+        return cls._tag_values[tag]
+
+    @classmethod
+    def _expected_value(cls, table: "LootTable") -> int:
+        items = [loot for loot, kind in zip(table.all_loot, table.kinds) if kind == LootKind.ITEM]
+
+        # Only the values of this table's items are read, not every item's.
+        if missing := [item for item in dict.fromkeys(items) if item not in cls._item_values]:
+            cls._item_values.update(ItemManager.values_fm_names(missing))
+
+        value = 0
+        for loot, kind in zip(table.all_loot, table.kinds):
+
+            if kind == LootKind.ITEM:
+                value += cls._item_values[loot]
+
+            elif (tag_value := cls._tag_value(loot)) is None:
+                raise ValueError(f"Tag '{loot}' in the {table.creature} loot table has no items.")
+
+            else:
+                value += tag_value
+
+        return int(value) // 1000
+
+
+ItemManager.on_reload(CreatureValues.invalidate)
 
 
 @dataclass(frozen=True)
 class LootTable:
+    """
+    Weighted drops of a monster, each an item or any item carrying a tag as `kinds`
+    says. `kinds` may be left out when every entry is an `ItemName` or `Tag`, a plain
+    name from a synthetic catalog needs its kind given.
+    """
     creature    : Monster
     weights     : List[int] = field(default_factory=list)
     all_loot    : List[ItemName] = field(default_factory=list)
+    kinds       : List[LootKind] = field(default_factory=list)
 
     def __post_init__(self):
         if len(self.weights) != len(self.all_loot):
             raise ValueError("Lengths of weights and all_loot must be the same.")
 
+        if not self.kinds and self.all_loot:
+            object.__setattr__(self, "kinds", [_loot_kind(loot) for loot in self.all_loot])
+
+        if len(self.kinds) != len(self.all_loot):
+            raise ValueError("Lengths of kinds and all_loot must be the same.")
+
         if sum(self.weights) != 100:
             raise ValueError("Weights must add up to 100.")
 
+    @cached_property
+    def compiled(self) -> CompiledLootTable:
+
+        pools = []
+
+        for loot, kind in zip(self.all_loot, self.kinds):
+
+            if kind == LootKind.ITEM:
+                pool = [loot]
+
+            elif not (pool := sorted(ItemManager.names_fm_tag(loot), key=item_id)):
+                raise ValueError(f"Tag '{loot}' in the {self.creature} loot table has no items.")
+
+            pools.append(pool)
+
+        return CompiledLootTable(
+            alias=AliasTable(self.weights),
+            pools=pools,
+            pool_ids=[np.array([item_id(item) for item in pool], dtype=np.intp) for pool in pools]
+        )
+
     @property
     def loot(self) -> ItemName:
+        pool = self.compiled.pools[self.compiled.alias.draw()]
+        return pool[random.randrange(len(pool))]
 
-        choice = random.choices(self.all_loot, weights=self.weights)[0]
+    def roll_many(self, n: int, counts: bool = False, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draw `n` drops at once. Returns the `ITEM_IDS` of every drop, or with `counts`
+        a vector of drops per `ItemName` suitable for `Inventory.add_item_counts`.
+        """
+        if n < 0:
+            raise ValueError(f"Cannot roll '{n}' drops")
 
-        if isinstance(choice, Tag):
-            return ItemManager.get_fm_tag_random(choice).name
+        rng = RNG if rng is None else rng
+        compiled = self.compiled
 
-        if isinstance(choice, ItemName):
-            return choice
+        entries = compiled.alias.draws(n, rng)
+        drops = np.empty(n, dtype=np.intp)
 
-    @property
-    def creature_value(self) -> int:
+        for entry, pool in enumerate(compiled.pool_ids):
+            mask = entries == entry
 
-        value = 0
-        for loot in self.all_loot:
+            if hits := int(np.count_nonzero(mask)):
+                drops[mask] = pool[rng.integers(len(pool), size=hits)]
 
-            if isinstance(loot, Tag):
-                value += ItemManager.get_fm_tag_random(loot).value
+        if counts:
+            return np.bincount(drops, minlength=len(ITEM_IDS))
 
-            if isinstance(loot, ItemName):
-                value += ItemManager.Item.get_fm_name(loot).value
+        return drops
 
-        return value // 1000
+    @property
+    def creature_value(self) -> int:
+        return CreatureValues.get(self)
 
     @property
     def inventory(self) -> Inventory:
         return Inventory().add_item(self.loot).add_currency(self.creature_value)
 
-    def encounter_by_level(self, level: int = 1) -> Inventory:
+    def roll_counts(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Per-`ItemName` counts for `n` drops, drawn as one multinomial over the entries
+        and one over each entry's pool. Cost does not depend on `n`.
+        """
+        if n < 0:
+            raise ValueError(f"Cannot roll '{n}' drops")
+
+        rng = RNG if rng is None else rng
+        compiled = self.compiled
+
+        weights = np.array(self.weights, dtype=float)
+        counts = np.zeros(len(ITEM_IDS), dtype=np.int64)
 
+        for pool, hits in zip(compiled.pool_ids, rng.multinomial(n, weights / weights.sum())):
+            if hits:
+                np.add.at(counts, pool, rng.multinomial(hits, np.full(len(pool), 1 / len(pool))))
+
+        return counts
+
+    def encounter_by_level(self, level: int = 1, aggregate: bool = True, rng: Optional[np.random.Generator] = None) -> Inventory:
+        """
+        One `inventory` per level. With `aggregate` the drops are drawn in one go by
+        `roll_counts`, otherwise each level is rolled and merged in turn (the reference).
+        """
         if level < 1:
             raise ValueError(f"Level '{level}' must be a positive integer")
 
+        if aggregate:
+            return (
+                Inventory()
+                .add_item_counts(self.roll_counts(level, rng), ITEM_IDS)
+                .add_currency(self.creature_value * level)
+            )
+
         _inventory = Inventory()
 
         for _ in range(level):
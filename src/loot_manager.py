@@ -1,43 +1,91 @@
+from typing import Dict, List, Optional, Type, TYPE_CHECKING
 
-from typing import Generic, List, TypeVar, Union
-import json
-
-from _db_access_wrapper import AccessWrapper
-from _db_models import ModelBase, QueryBase, LootTableModel
-from enums import ItemName, Monster, Tag
+from _db_access_wrapper import _in_db_executor, _read_session, AccessWrapper
+from _db_cache import LRUCache
+from enums import as_enum, ItemName, LootKind, Monster, Tag
 from loot import LootTable
 
-ModelType = TypeVar('ModelType', bound=ModelBase)
-QueryType = TypeVar('QueryType', bound=QueryBase)
-
-
-def _item_or_tag_helper(all_loot: List[str]) -> List[Union[ItemName, Tag]]:
-    all_out = []
+if TYPE_CHECKING:
+    from _db_models import LootTableModel
+    from catalog_artifact import CatalogArtifact
 
-    for loot in all_loot:
-        try:
-            out = ItemName(loot)
-        except ValueError:
-            out = Tag(loot)
-        all_out.append(out)
 
-    return all_out
+def _model() -> Type["LootTableModel"]:
+    # Imported on first use, keeps SQLAlchemy out of startup.
+    from _db_models import LootTableModel
+    return LootTableModel
 
 
 def as_loottable(query):
     return LootTable(
-        creature=Monster(query.monster.name),
-        weights=json.loads(query.weights),
-        all_loot=_item_or_tag_helper(json.loads(query.all_loot))
+        creature=as_enum(Monster, query.monster.name),
+        weights=[entry.weight for entry in query.entries],
+        all_loot=[entry.loot for entry in query.entries],
+        kinds=[LootKind(entry.kind) for entry in query.entries]
     )
 
 
 class LootManager:
-    _model      : Generic[ModelType, QueryType] = LootTableModel
-    Tables      : AccessWrapper = AccessWrapper(Monster, _model, as_loottable)
+    Tables      : AccessWrapper = AccessWrapper(
+        Monster,
+        _model,
+        as_loottable,
+        cache=LRUCache(maxsize=128, ttl=300),
+        tables=("LootTables", "LootEntries"),
+        # Entries are converted by name, and `LootTable.compiled` pools items by tag. An
+        # item's other columns, e.g. its value, leave the tables as they are.
+        depends_on=("Monsters", "Tags", "Item_Tag")
+    )
+    _artifact           : Optional["CatalogArtifact"] = None
+    _artifact_tables    : Dict[Monster, LootTable] = {}
+
+    @classmethod
+    def use_artifact(cls, artifact: Optional["CatalogArtifact"]) -> None:
+        """
+        Serve `table` from an opened `CatalogArtifact` instead of the database, e.g. in a
+        worker process, or from the database again with `None`.
+        """
+        cls._artifact = artifact
+        cls._artifact_tables = {}
+
+    @classmethod
+    def table(cls, monster: Monster) -> LootTable:
+        """
+        The loot table of `monster`, from the artifact given to `use_artifact` or `Tables`.
+        """
+        if (artifact := cls._artifact) is None:
+            return cls.Tables[monster]
+
+        if (table := cls._artifact_tables.get(monster)) is None:
+            table = cls._artifact_tables[monster] = artifact.loot_table(monster)
+
+        return table
+
+    @classmethod
+    def monsters_fm_item(cls, item: ItemName) -> List[Monster]:
+        """
+        Every monster that can drop `item`, listed by name or through one of its tags.
+        """
+        with _read_session() as session:
+            return [as_enum(Monster, name) for name in _model().gets_monster_fm_item(session, item)]
+
+    @classmethod
+    def monsters_fm_tag(cls, tag: Tag) -> List[Monster]:
+        with _read_session() as session:
+            return [as_enum(Monster, name) for name in _model().gets_monster_fm_tag(session, tag)]
+
+    @classmethod
+    async def amonsters_fm_item(cls, item: ItemName) -> List[Monster]:
+        return await _in_db_executor(cls.monsters_fm_item, item)
+
+    @classmethod
+    async def amonsters_fm_tag(cls, tag: Tag) -> List[Monster]:
+        return await _in_db_executor(cls.monsters_fm_tag, tag)
 
 
 if __name__ == '__main__':
 
     print(LootManager.Tables[Monster.GOBLIN])
-    print(LootManager.Tables.fm_name(Monster.GOBLIN))
+    print(LootManager.Tables.get_fm_name(Monster.GOBLIN))
+    print(LootManager.Tables.cache.stats)
+    print(LootManager.monsters_fm_item(ItemName.TOOLBOX))
@@ -0,0 +1,73 @@
+from typing import List, Optional, Sequence
+import random
+
+import numpy as np
+
+
+RNG = np.random.default_rng()
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table. Built once in O(n), each draw is O(1).
+
+    Draw a column uniformly, then keep it with probability `prob[column]`
+    or fall through to `alias[column]`.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        if not weights:
+            raise ValueError("Weights must not be empty.")
+
+        if any(w < 0 for w in weights):
+            raise ValueError("Weights must be non-negative.")
+
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("Weights must add up to a positive number.")
+
+        n = len(weights)
+        self.prob   : List[float] = [0.0] * n
+        self.alias  : List[int] = list(range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Whatever is left is 1.0 up to float error.
+        for i in small + large:
+            self.prob[i] = 1.0
+
+        self._prob_array    = np.array(self.prob)
+        self._alias_array   = np.array(self.alias, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def draw(self, rng: random.Random = random) -> int:
+        column = rng.randrange(len(self.prob))
+        return column if rng.random() < self.prob[column] else self.alias[column]
+
+    def draws(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        rng = RNG if rng is None else rng
+
+        columns = rng.integers(len(self.prob), size=n)
+        keep = rng.random(n) < self._prob_array[columns]
+        return np.where(keep, columns, self._alias_array[columns])
+
+
+if __name__ == '__main__':
+
+    from collections import Counter
+
+    table = AliasTable([1, 2, 7, 15, 15, 60])
+    print(sorted(Counter(table.draw() for _ in range(100_000)).items()))
+    print(np.bincount(table.draws(100_000)))
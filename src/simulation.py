@@ -0,0 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Hashable, List, Optional, Tuple
+import os
+
+import numpy as np
+
+from catalog_artifact import CatalogArtifact
+from enums import Monster
+from inventory import Inventory
+from item_manager import ItemManager
+from loot import item_id, ITEM_IDS
+from loot_manager import LootManager
+
+
+def _split(encounters: int, workers: int) -> List[int]:
+    share, extra = divmod(encounters, workers)
+    return [share + (i < extra) for i in range(workers)]
+
+
+def _item_ids(artifact: Optional[str] = None) -> List[Hashable]:
+    """
+    Every catalog item registered in `ITEM_IDS` before the pool starts, so the count
+    vectors of all workers have one length and order.
+    """
+    if artifact is None:
+        names = [name for (name,) in ItemManager.select(("name",))]
+
+    else:
+        with CatalogArtifact(artifact) as opened:
+            names = opened.names
+
+    for name in names:
+        item_id(name)
+
+    return list(ITEM_IDS)
+
+
+def _init_worker(items: List[Hashable], artifact: Optional[str] = None) -> None:
+    # The database connections `_item_ids` pooled in the parent were already dropped
+    # by `_db_utils` when this worker forked, it reads over its own.
+    ITEM_IDS.clear()
+    ITEM_IDS.update((item, i) for i, item in enumerate(items))
+
+    if artifact is not None:
+        # Kept open for the life of the worker.
+        opened = CatalogArtifact(artifact)
+        ItemManager.use_artifact(opened)
+        LootManager.use_artifact(opened)
+
+
+def _simulate_chunk(
+    seed                : np.random.SeedSequence,
+    encounters          : int,
+    bestiary            : List[Monster],
+    mob_level_min       : int,
+    mob_level_max       : int
+) -> Tuple[np.ndarray, int]:
+    """
+    Runs in a worker. Every encounter is a random monster at a random level, and the
+    drops of one monster's encounters are drawn together since each level is an
+    independent roll.
+    """
+    rng = np.random.default_rng(seed)
+    tables = [LootManager.table(monster) for monster in bestiary]
+
+    monsters = rng.integers(len(tables), size=encounters)
+    levels = rng.integers(mob_level_min, mob_level_max + 1, size=encounters)
+
+    counts = np.zeros(len(ITEM_IDS), dtype=np.int64)
+    coin = 0
+
+    for i, table in enumerate(tables):
+        if total_level := int(levels[monsters == i].sum()):
+            counts += table.roll_counts(total_level, rng)
+            coin += table.creature_value * total_level
+
+    return counts, coin
+
+
+def simulate_encounters(
+    encounters          : int,
+    seed                : Optional[int] = None,
+    workers             : Optional[int] = None,
+    bestiary            : Optional[List[Monster]] = None,
+    mob_level_min       : int = 1,
+    mob_level_max       : int = 1,
+    artifact            : Optional[str] = None
+) -> Inventory:
+    """
+    Monte Carlo of `encounters` fights fanned out over a process pool, reduced into one
+    `Inventory`. Each worker draws from its own stream spawned from `seed`, so a run is
+    reproducible for a given seed and worker count. With the path of a compiled
+    `artifact` the workers read items and loot tables from it, not the database.
+    """
+    if encounters < 0:
+        raise ValueError(f"Cannot simulate '{encounters}' encounters")
+
+    if not 1 <= mob_level_min <= mob_level_max:
+        raise ValueError(f"Invalid level range '{mob_level_min}'-'{mob_level_max}'")
+
+    workers = workers or os.cpu_count() or 1
+    bestiary = list(Monster) if bestiary is None else list(bestiary)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    items = _item_ids(artifact)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(items, artifact)) as executor:
+        results = executor.map(
+            _simulate_chunk,
+            seeds,
+            _split(encounters, workers),
+            [bestiary] * workers,
+            [mob_level_min] * workers,
+            [mob_level_max] * workers
+        )
+
+        counts = np.zeros(len(items), dtype=np.int64)
+        coin = 0
+
+        for chunk_counts, chunk_coin in results:
+            counts += chunk_counts
+            coin += chunk_coin
+
+    return Inventory().add_item_counts(counts, items).add_currency(coin)
+
+
+if __name__ == '__main__':
+
+    import time
+
+    start = time.perf_counter()
+    inventory = simulate_encounters(1_000_000, seed=42, mob_level_max=10)
+    print(f"{time.perf_counter() - start:.2f}s")
+    print(inventory)
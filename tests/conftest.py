@@ -0,0 +1,49 @@
+import shutil
+
+import pytest
+from sqlalchemy import create_engine
+
+import _db_utils
+from _db_builder import BUILD_DATABASE, invalidate_caches
+from _db_utils import SingletonModelBase
+
+
+@pytest.fixture
+def built(tmp_path):
+    """
+    An engine on a new database holding the shipped catalog.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'built.db'}")
+    SingletonModelBase.get_instance().metadata.create_all(engine)
+    BUILD_DATABASE(engine=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def serve_database():
+    """
+    Call with the path of a database to serve every lookup from it, with every cache
+    dropped, until the test ends. The configured database is restored after.
+    """
+    database = _db_utils.DATABASE
+
+    def serve(path) -> None:
+        _db_utils.configure(database=str(path))
+        invalidate_caches()
+
+    yield serve
+
+    _db_utils.configure(database=database)
+    invalidate_caches()
+
+
+@pytest.fixture
+def copied_database(tmp_path, serve_database):
+    """
+    A copy of the shipped database served in its place, free to write to.
+    """
+    path = tmp_path / "copy.db"
+    shutil.copy(_db_utils.DATABASE, path)
+    serve_database(path)
+    return path
@@ -0,0 +1,45 @@
+import asyncio
+
+from _db_access_wrapper import AccessWrapper
+from _db_entries import LOOT_TABLES
+from enums import ItemName, Monster, Tag
+from item_manager import AsyncItemManager, ItemManager
+from loot_manager import _model, as_loottable, LootManager
+
+
+def test_tables_aget_matches_sync():
+    tables = AccessWrapper(Monster, _model, as_loottable)
+
+    async def main():
+        return await asyncio.gather(*(tables.aget(monster) for monster in list(Monster) * 10))
+
+    for monster, table in zip(list(Monster) * 10, asyncio.run(main())):
+        assert table == LOOT_TABLES[monster]
+
+
+def test_tables_aget_serves_cache_hits_on_the_loop():
+    LootManager.Tables.invalidate()
+    LootManager.Tables[Monster.GOBLIN]
+    hits = LootManager.Tables.cache.stats.hits
+
+    assert asyncio.run(LootManager.Tables.aget(Monster.GOBLIN)) == LOOT_TABLES[Monster.GOBLIN]
+    assert LootManager.Tables.cache.stats.hits == hits + 1
+
+
+def test_async_item_manager():
+    ItemManager.invalidate()
+
+    async def main():
+        return await asyncio.gather(
+            AsyncItemManager.get_fm_tag_random(Tag.JUNK),
+            AsyncItemManager.get_fm_name(ItemName.TOOLBOX),
+            AsyncItemManager.gets_fm_tag(Tag.JUNK),
+            LootManager.amonsters_fm_item(ItemName.TOOLBOX),
+        )
+
+    junk, toolbox, tagged, monsters = asyncio.run(main())
+
+    assert Tag.JUNK in junk.tags
+    assert toolbox.name == ItemName.TOOLBOX
+    assert {item.name for item in tagged} == {item.name for item in ItemManager.gets_fm_tag(Tag.JUNK)}
+    assert monsters == LootManager.monsters_fm_item(ItemName.TOOLBOX)
@@ -0,0 +1,124 @@
+import pytest
+from sqlalchemy import create_engine
+
+from _db_artifact import compile_artifact, open_artifact
+from _db_builder import BUILD_DATABASE
+from _db_entries import LOOT_TABLES
+from _db_utils import SingletonModelBase
+from catalog_artifact import CatalogArtifact
+from enums import ItemName, Monster, Tag
+from item_manager import ItemManager
+from loot_manager import LootManager
+from simulation import simulate_encounters
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / "catalog.bin"
+    compile_artifact(str(path))
+
+    with open_artifact(str(path)) as artifact:
+        yield artifact
+
+
+def test_artifact_items_match_catalog(artifact):
+    catalog = ItemManager.catalog()
+
+    assert len(artifact) == len(catalog)
+
+    for (id, item), compiled in zip(catalog.by_id.items(), artifact.items):
+        assert compiled.name == item.name
+        assert compiled.weight == item.weight and compiled.value == item.value
+        assert compiled.quality == item.quality and compiled.craftable == item.craftable
+        assert compiled.flavor_text == item.flavor_text
+        assert list(compiled.tags) == list(item.tags)
+        assert [(m.name, m.quality) for m in compiled.composition] == [(m.name, m.quality) for m in item.composition]
+        assert artifact.get_fm_id(id).name == item.name
+
+
+def test_artifact_lookups(artifact):
+    assert artifact.get_fm_name(ItemName.TOOLBOX).name == ItemName.TOOLBOX
+    assert {item.name for item in artifact.gets_fm_tag(Tag.JUNK)} == {item.name for item in ItemManager.gets_fm_tag(Tag.JUNK)}
+
+    for monster, table in LOOT_TABLES.items():
+        assert artifact.loot_table(monster) == table
+
+    with pytest.raises(KeyError):
+        artifact.get_fm_name("Flarp")
+
+    assert artifact.gets_fm_tag("Flarp") == []
+
+
+def test_managers_read_from_an_artifact(artifact):
+    from_database = ItemManager.names_fm_tag(Tag.JUNK), ItemManager.select(("id", "name", "value"))
+
+    try:
+        ItemManager.use_artifact(artifact)
+        LootManager.use_artifact(artifact)
+
+        assert (ItemManager.names_fm_tag(Tag.JUNK), ItemManager.select(("id", "name", "value"))) == from_database
+        assert ItemManager.Item.TOOLBOX.value == artifact.get_fm_name(ItemName.TOOLBOX).value
+        assert len(ItemManager.catalog()) == len(artifact)
+        assert LootManager.table(Monster.GOBLIN) == LOOT_TABLES[Monster.GOBLIN]
+
+    finally:
+        ItemManager.use_artifact(None)
+        LootManager.use_artifact(None)
+
+
+def test_managers_decode_single_records_from_an_artifact(artifact, monkeypatch):
+    decoded = []
+    item = CatalogArtifact.item
+    monkeypatch.setattr(CatalogArtifact, "item", lambda self, index: decoded.append(index) or item(self, index))
+
+    try:
+        ItemManager.use_artifact(artifact)
+        LootManager.use_artifact(artifact)
+
+        for monster in LOOT_TABLES:
+            table = LootManager.table(monster)
+            table.compiled, table.creature_value
+
+        ItemManager.values_fm_tag(Tag.JUNK), ItemManager.select(("name", "value"))
+        assert decoded == []
+
+        assert ItemManager.Item.TOOLBOX.name == ItemName.TOOLBOX
+        assert len(decoded) == 1
+
+    finally:
+        ItemManager.use_artifact(None)
+        LootManager.use_artifact(None)
+
+
+def test_simulation_workers_read_from_an_artifact(artifact):
+    from_database = simulate_encounters(2_000, seed=5, workers=2, mob_level_max=5)
+    from_artifact = simulate_encounters(2_000, seed=5, workers=2, mob_level_max=5, artifact=artifact.path)
+
+    assert from_artifact.items == from_database.items
+    assert from_artifact.currency == from_database.currency
+
+
+def test_stale_artifact_is_rejected(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    SingletonModelBase.get_instance().metadata.create_all(engine)
+    BUILD_DATABASE(engine=engine)
+
+    path = str(tmp_path / "catalog.bin")
+    compile_artifact(path, engine)
+    open_artifact(path, engine).close()
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql('UPDATE "Items" SET value = value + 1 WHERE id = 1')
+
+    with pytest.raises(ValueError):
+        open_artifact(path, engine)
+
+    engine.dispose()
+
+
+def test_artifact_rejects_other_files(tmp_path):
+    path = tmp_path / "catalog.bin"
+    path.write_bytes(b"\0" * 4096)
+
+    with pytest.raises(ValueError):
+        CatalogArtifact(str(path))
@@ -0,0 +1,86 @@
+from dataclasses import replace
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from _db_builder import BUILD_DATABASE, SYNC_DATABASE
+from _db_entries import ITEMS, LOOT_TABLES, MATERIALS
+from _db_utils import DATABASE, SingletonModelBase
+
+
+TABLES = ("Tags", "Qualities", "Monsters", "Materials", "Items", "Item_Tag", "Item_Material", "LootTables", "LootEntries")
+
+
+def test_build_database_matches_shipped_catalog(tmp_path):
+    path = tmp_path / "bulk.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SingletonModelBase.get_instance().metadata.create_all(engine)
+
+    report = BUILD_DATABASE(engine=engine)
+    engine.dispose()
+
+    assert report.rows["Items"] == len(ITEMS)
+    assert report.rows["Materials"] == len(MATERIALS)
+    assert report.rows["LootTables"] == len(LOOT_TABLES)
+    assert report.rows_per_second > 0
+
+    built, shipped = sqlite3.connect(path), sqlite3.connect(DATABASE)
+    for table in TABLES:
+        query = f'SELECT * FROM "{table}" ORDER BY 1, 2'
+        assert built.execute(query).fetchall() == shipped.execute(query).fetchall(), table
+
+
+def test_items_fts_follows_item_writes(built):
+    with built.begin() as conn:
+        conn.exec_driver_sql('''UPDATE "Items" SET description = 'A glowing relic' WHERE id = 1''')
+        conn.exec_driver_sql('''DELETE FROM "Items" WHERE id = 2''')
+
+        def match(text):
+            return [id for (id,) in conn.exec_driver_sql('SELECT rowid FROM "Items_fts" WHERE "Items_fts" MATCH ?', (text,))]
+
+        assert match("glowing") == [1]
+        assert match("heavily") == []
+        assert match("button") == []
+        assert match("toolbox") == [13]
+
+
+def test_sync_database_without_changes_is_empty(built):
+    assert not SYNC_DATABASE(engine=built)
+
+
+def test_sync_database_applies_only_the_difference(built):
+    items = dict(ITEMS)
+    removed, changed = list(items)[:2]
+    del items[removed]
+    items[changed] = replace(items[changed], value=items[changed].value + 1, tags=items[changed].tags[:1])
+
+    report = SYNC_DATABASE(items=items.values(), engine=built)
+
+    assert report.changes["Items"]["deleted"] == [removed]
+    assert report.changes["Items"]["updated"] == [changed]
+    assert not report.changes["Items"]["inserted"]
+    assert not SYNC_DATABASE(items=items.values(), engine=built)
+
+    with built.connect() as conn:
+        assert conn.exec_driver_sql('SELECT value FROM "Items" WHERE name = ?', (changed,)).scalar() == items[changed].value
+        assert conn.exec_driver_sql('SELECT COUNT(*) FROM "Items"').scalar() == len(items)
+
+    assert SYNC_DATABASE(engine=built).changes["Items"]["inserted"] == [removed]
+
+
+def test_sync_database_dry_run_rolls_back(built):
+    items = list(ITEMS.values())[1:]
+
+    assert SYNC_DATABASE(items=items, engine=built, dry_run=True)
+    assert not SYNC_DATABASE(engine=built)
+
+
+def test_sync_database_rewrites_changed_loot_entries(built):
+    tables = list(LOOT_TABLES.values())
+    tables[1] = replace(tables[1], weights=list(reversed(tables[1].weights)))
+
+    report = SYNC_DATABASE(loot_tables=tables, engine=built)
+
+    assert report.changes["LootEntries"]["updated"] == [2]
+    assert not report.changes["LootTables"]["updated"]
+    assert not SYNC_DATABASE(loot_tables=tables, engine=built)
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from _db_cache import LRUCache
+from enums import Monster
+from loot_manager import LootManager
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: 0)
+    cache.get_or_load("c", lambda: 3)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats == (1, 3, 1, 2)
+
+
+def test_ttl_expires_entries():
+    cache = LRUCache(maxsize=2, ttl=0.01)
+    cache.get_or_load("a", lambda: 1)
+    time.sleep(0.02)
+
+    assert cache.get_or_load("a", lambda: 2) == 2
+    assert cache.stats.misses == 2
+
+
+def test_invalidate():
+    cache = LRUCache()
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+
+    cache.invalidate("a")
+    assert "a" not in cache and "b" in cache
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_value_invalidated_while_loading_is_not_stored():
+    cache = LRUCache()
+
+    def load():
+        cache.invalidate("a")
+        return 1
+
+    assert cache.get_or_load("a", load) == 1
+    assert "a" not in cache
+    assert cache.get_or_load("a", lambda: 2) == 2
+
+
+def test_rejects_empty_cache():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_loot_tables_are_cached():
+    LootManager.Tables.invalidate()
+
+    table = LootManager.Tables.GOBLIN
+    assert LootManager.Tables[Monster.GOBLIN] is table
+    assert LootManager.Tables.get_fm_name(Monster.GOBLIN) is table
+
+    LootManager.Tables.invalidate(Monster.GOBLIN)
+    assert LootManager.Tables.GOBLIN is not table
@@ -0,0 +1,151 @@
+from dataclasses import replace
+import sqlite3
+
+import pytest
+from sqlalchemy.orm import Session
+
+import _db_models as db
+from _db_builder import SYNC_DATABASE
+from _db_entries import ITEMS, LOOT_TABLES
+from _db_invalidation import DataVersionWatcher, InvalidationBus
+from enums import ItemName, Monster, Tag
+from loot_manager import LootManager
+
+
+@pytest.fixture
+def published():
+    changes = []
+    listener = InvalidationBus.subscribe(("Items", "LootTables"), changes.append)
+    yield changes
+    InvalidationBus.unsubscribe(listener)
+
+
+def test_publish_calls_each_listener_once(published):
+    InvalidationBus.publish({"Items": {"Toolbox"}, "LootTables": {"Goblin"}, "Tags": None})
+    InvalidationBus.publish({"Items": {"Toolbox"}, "LootTables": None})
+    InvalidationBus.publish({"Monsters": None})
+
+    assert published == [frozenset({"Toolbox", "Goblin"}), None]
+
+
+def test_commit_publishes_changed_keys(built, published):
+    with Session(built) as session:
+        item = db.ItemModel.get_fm_name(session, ItemName.TOOLBOX)
+        item.value += 1
+        item.name = "Tool Chest"
+        table = db.LootTableModel.get_fm_name(session, Monster.GOBLIN)
+        table.entries[0].weight += 1
+        ids = [("id", item.id), ("id", table.id)]
+        session.commit()
+
+    assert published == [frozenset({ItemName.TOOLBOX, "Tool Chest", Monster.GOBLIN, *ids})]
+
+
+def test_rollback_publishes_nothing(built, published):
+    with Session(built) as session:
+        db.ItemModel.get_fm_name(session, ItemName.TOOLBOX).value += 1
+        session.flush()
+        session.rollback()
+
+    assert not published
+
+
+def test_sync_publishes_changed_names(built, published):
+    items = dict(ITEMS)
+    items[ItemName.TOOLBOX] = replace(items[ItemName.TOOLBOX], value=items[ItemName.TOOLBOX].value + 1)
+
+    SYNC_DATABASE(items=items.values(), engine=built)
+
+    assert published == [frozenset({ItemName.TOOLBOX})]
+
+
+def test_loot_tables_evict_only_changed_monsters():
+    LootManager.Tables.invalidate()
+    LootManager.Tables[Monster.GOBLIN], LootManager.Tables[Monster.GOBLIN_SHAMAN]
+
+    InvalidationBus.publish({"LootTables": {"Goblin"}})
+
+    assert Monster.GOBLIN not in LootManager.Tables.cache
+    assert Monster.GOBLIN_SHAMAN in LootManager.Tables.cache
+    assert LootManager.Tables[Monster.GOBLIN] == LOOT_TABLES[Monster.GOBLIN]
+
+    InvalidationBus.publish({"Tags": {Tag.JUNK}})
+
+    assert Monster.GOBLIN_SHAMAN not in LootManager.Tables.cache
+
+
+def test_loot_tables_outlive_item_value_changes(built, published):
+    LootManager.Tables.invalidate()
+    LootManager.Tables[Monster.GOBLIN]
+
+    with Session(built) as session:
+        item = db.ItemModel.get_fm_name(session, ItemName.TOOLBOX)
+        item.value += 1
+        session.commit()
+
+        assert Monster.GOBLIN in LootManager.Tables.cache
+
+        item.tags = item.tags[1:]
+        session.commit()
+
+    assert Monster.GOBLIN not in LootManager.Tables.cache
+
+
+def test_item_ids_evicted_per_model():
+    db.QueryBase._id_cache[(db.ItemModel, ("tag", Tag.JUNK))] = [1]
+    db.QueryBase._id_cache[(db.MonsterModel, ())] = [1]
+
+    InvalidationBus.publish({"Tags": {Tag.JUNK}})
+
+    assert (db.ItemModel, ("tag", Tag.JUNK)) not in db.QueryBase._id_cache
+    assert (db.MonsterModel, ()) in db.QueryBase._id_cache
+    db.QueryBase.invalidate_ids()
+
+
+def test_data_version_watcher_sees_other_connections(built, published):
+    watcher = DataVersionWatcher(built)
+
+    try:
+        assert not watcher.poll()
+
+        with sqlite3.connect(built.url.database) as conn:
+            conn.execute('UPDATE "Items" SET value = value + 1')
+
+        assert watcher.poll()
+        assert not watcher.poll()
+        assert published == [None]
+
+    finally:
+        watcher.close()
+
+
+def test_data_version_watcher_skips_own_commits(built, published):
+    watcher = DataVersionWatcher(built)
+
+    def commit():
+        with Session(built) as session:
+            item = db.ItemModel.get_fm_name(session, ItemName.TOOLBOX)
+            item.value += 1
+            key = ("id", item.id)
+            session.commit()
+
+        return frozenset({ItemName.TOOLBOX, key})
+
+    try:
+        watcher.poll()
+        keys = commit()
+
+        assert not watcher.poll()
+        assert published == [keys]
+
+        with sqlite3.connect(built.url.database) as conn:
+            conn.execute('UPDATE "Items" SET value = value + 1')
+
+        # The other connection's change is published before the commit hides it.
+        commit()
+
+        assert published == [keys, None, keys]
+        assert not watcher.poll()
+
+    finally:
+        watcher.close()
@@ -0,0 +1,161 @@
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from _db_builder import BUILD_DATABASE
+from _db_entries import LOOT_TABLES
+from _db_migrations import migrate
+from _db_utils import SingletonModelBase
+from enums import ItemName, Monster, Tag
+from loot import LootTable
+from loot_manager import LootManager
+
+
+# The schema before the migrations, JSON loot columns and association tables without keys.
+BASELINE_SCHEMA = """
+CREATE TABLE "Qualities" (id INTEGER NOT NULL, name VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (name));
+CREATE TABLE "Tags" (id INTEGER NOT NULL, name VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (name));
+CREATE TABLE "Monsters" (id INTEGER NOT NULL, name VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (name));
+CREATE TABLE "Materials" (
+    id INTEGER NOT NULL, name VARCHAR NOT NULL, quality_id INTEGER, quantity INTEGER NOT NULL,
+    PRIMARY KEY (id), UNIQUE (name), FOREIGN KEY(quality_id) REFERENCES "Qualities" (id)
+);
+CREATE TABLE "Items" (
+    id INTEGER NOT NULL, name VARCHAR NOT NULL, weight INTEGER NOT NULL, value INTEGER NOT NULL,
+    description VARCHAR NOT NULL, quality_id INTEGER, craftable BOOLEAN NOT NULL, flavor_text VARCHAR,
+    PRIMARY KEY (id), UNIQUE (name), FOREIGN KEY(quality_id) REFERENCES "Qualities" (id)
+);
+CREATE TABLE "LootTables" (
+    id INTEGER NOT NULL, weights JSON NOT NULL, all_loot JSON NOT NULL, monster_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY(monster_id) REFERENCES "Monsters" (id)
+);
+CREATE TABLE "Item_Tag" (
+    item_id INTEGER, tag_id INTEGER,
+    FOREIGN KEY(item_id) REFERENCES "Items" (id), FOREIGN KEY(tag_id) REFERENCES "Tags" (id)
+);
+CREATE TABLE "Item_Material" (
+    item_id INTEGER, material_id INTEGER,
+    FOREIGN KEY(item_id) REFERENCES "Items" (id), FOREIGN KEY(material_id) REFERENCES "Materials" (id)
+);
+"""
+
+COPIED = ("Qualities", "Tags", "Monsters", "Materials", "Items", "Item_Tag", "Item_Material")
+ENTRIES = 'SELECT loot_table_id, position, kind, item_id, tag_id, weight FROM "LootEntries" ORDER BY 1, 2'
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """
+    A database in the baseline schema holding the shipped catalog, and one built in the
+    current schema to compare the migrated one against.
+    """
+    source = tmp_path / "source.db"
+    engine = create_engine(f"sqlite:///{source}")
+    SingletonModelBase.get_instance().metadata.create_all(engine)
+    BUILD_DATABASE(engine=engine)
+    engine.dispose()
+
+    path = tmp_path / "baseline.db"
+
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        conn.execute("ATTACH ? AS source", (str(source),))
+
+        for table in COPIED:
+            conn.execute(f'INSERT INTO "{table}" SELECT * FROM source."{table}"')
+
+        # Nothing kept a link from being added twice.
+        conn.execute('INSERT INTO "Item_Tag" SELECT * FROM source."Item_Tag" LIMIT 1')
+
+        query = 'SELECT t.id, t.monster_id, m.name FROM source."LootTables" t JOIN source."Monsters" m ON m.id = t.monster_id'
+        for id, monster_id, name in conn.execute(query).fetchall():
+            table = LOOT_TABLES[Monster(name)]
+            # `json.dumps` into a `JSON` column, encoded twice.
+            conn.execute(
+                'INSERT INTO "LootTables" VALUES (?, ?, ?, ?)',
+                (id, json.dumps(json.dumps(table.weights)), json.dumps(json.dumps(table.all_loot)), monster_id)
+            )
+
+    conn.close()
+    return path, source
+
+
+def test_migrate_baseline_database(baseline):
+    path, source = baseline
+    engine = create_engine(f"sqlite:///{path}")
+
+    changes = migrate(engine)
+
+    assert "rebuilt Item_Tag with primary key (item_id, tag_id)" in changes
+    assert "rebuilt Item_Material with primary key (item_id, material_id)" in changes
+    assert "created table LootEntries" in changes
+    assert migrate(engine) == []
+
+    inspector = inspect(engine)
+    assert inspector.get_pk_constraint("Item_Tag")["constrained_columns"] == ["item_id", "tag_id"]
+    assert inspector.get_pk_constraint("Item_Material")["constrained_columns"] == ["item_id", "material_id"]
+    assert {"weights", "all_loot"}.isdisjoint(column["name"] for column in inspector.get_columns("LootTables"))
+    assert "Items_fts" in inspector.get_table_names()
+
+    for table in SingletonModelBase.get_instance().metadata.sorted_tables:
+        assert {index.name for index in table.indexes} <= {index["name"] for index in inspector.get_indexes(table.name)}
+
+    engine.dispose()
+
+    migrated, built = sqlite3.connect(path), sqlite3.connect(source)
+
+    try:
+        assert migrated.execute(ENTRIES).fetchall() == built.execute(ENTRIES).fetchall()
+
+        for table in ("Item_Tag", "Item_Material"):
+            query = f'SELECT * FROM "{table}" ORDER BY 1, 2'
+            assert migrated.execute(query).fetchall() == built.execute(query).fetchall(), table
+
+    finally:
+        migrated.close()
+        built.close()
+
+
+def _item_or_tag(loot: str):
+    try:
+        return ItemName(loot)
+
+    except ValueError:
+        return Tag(loot)
+
+
+def _baseline_tables(path) -> dict:
+    """
+    The loot tables as `as_loottable` read them from the JSON columns before the
+    migration, item names tried before tags.
+    """
+    query = 'SELECT m.name, t.weights, t.all_loot FROM "LootTables" t JOIN "Monsters" m ON m.id = t.monster_id'
+    tables = {}
+
+    with sqlite3.connect(path) as conn:
+        for name, weights, all_loot in conn.execute(query).fetchall():
+            all_loot = [_item_or_tag(loot) for loot in json.loads(json.loads(all_loot))]
+            tables[Monster(name)] = LootTable(creature=Monster(name), weights=json.loads(json.loads(weights)), all_loot=all_loot)
+
+    conn.close()
+    return tables
+
+
+def test_migrated_loot_tables_round_trip(baseline, serve_database):
+    path, _ = baseline
+    before = _baseline_tables(path)
+    assert len(before) == len(LOOT_TABLES)
+
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine)
+    engine.dispose()
+
+    serve_database(path)
+    after = {monster: LootManager.Tables[monster] for monster in before}
+
+    assert after == before
+    assert [type(loot) for table in after.values() for loot in table.all_loot] == [
+        type(loot) for table in before.values() for loot in table.all_loot
+    ]
@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from _db_entries import ITEMS, LOOT_TABLES
+from _db_models import ItemModel, LootTableModel, QueryBase
+from _db_utils import ReadSession, Session, session_scope
+from enums import ItemName, MaterialType, Monster, Quality, Tag
+from item_manager import as_item
+from loot_manager import as_loottable
+
+
+# One statement for the items plus one per eager loaded relationship.
+ITEM_GRAPH_QUERIES = 5
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    engines = {session.get_bind() for session in (Session(), ReadSession())}
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.parametrize("query, arg", [
+    (ItemModel.gets_fm_tag, Tag.JUNK),
+    (ItemModel.gets_fm_tag, Tag.TOOL),
+    (ItemModel.gets_fm_quality, Quality.COMMON),
+    (ItemModel.gets_fm_materialtype, MaterialType.STEEL),
+])
+def test_gets_fm_loads_item_graph_in_fixed_queries(query, arg):
+    with session_scope() as session, count_queries() as statements:
+        items = [as_item(row) for row in query(session, arg)]
+
+    assert len(items) > 1
+    assert len(statements) <= ITEM_GRAPH_QUERIES
+
+
+def test_gets_all_loads_item_graph_in_fixed_queries():
+    with session_scope() as session, count_queries() as statements:
+        items = [as_item(row) for row in ItemModel.gets_all(session)]
+
+    assert len(items) > ITEM_GRAPH_QUERIES
+    assert len(statements) <= ITEM_GRAPH_QUERIES
+
+
+def test_get_fm_tag_random_picks_from_cached_ids():
+    QueryBase.invalidate_ids()
+
+    with session_scope() as session:
+        tagged = {row.id for row in ItemModel.gets_fm_tag(session, Tag.TOOL)}
+        picks = {ItemModel.get_fm_tag_random(session, Tag.TOOL).id for _ in range(200)}
+
+        assert picks == tagged
+        assert ItemModel.get_fm_tag_random(session, Tag.MECHANICAL) is None
+
+        with count_queries() as statements:
+            ItemModel.get_fm_tag_random(session, Tag.TOOL)
+
+    assert len(statements) <= ITEM_GRAPH_QUERIES
+    assert not any("random()" in statement for statement, _ in statements)
+
+
+def test_samples_fm_tag_in_one_round_trip():
+    QueryBase.invalidate_ids()
+
+    with session_scope() as session:
+        tagged = {row.id for row in ItemModel.gets_fm_tag(session, Tag.JUNK)}
+        ItemModel.samples_fm_tag(session, Tag.JUNK, 1)
+
+        with count_queries() as statements:
+            picks = ItemModel.samples_fm_tag(session, Tag.JUNK, 50, replace=True)
+
+        assert len(picks) == 50
+        assert {row.id for row in picks} <= tagged
+        assert len(statements) <= ITEM_GRAPH_QUERIES
+
+        unique = ItemModel.samples_fm_tag(session, Tag.JUNK, len(tagged))
+        assert {row.id for row in unique} == tagged
+
+        with pytest.raises(ValueError):
+            ItemModel.samples_fm_tag(session, Tag.JUNK, len(tagged) + 1)
+
+
+def test_lookups_reuse_their_statement():
+    with session_scope() as session:
+        junk = {row.name for row in ItemModel.gets_fm_tag(session, Tag.JUNK)}
+        statement = QueryBase._statements[(ItemModel, "fm_tag")]
+        tool = {row.name for row in ItemModel.gets_fm_tag(session, Tag.TOOL)}
+
+    assert QueryBase._statements[(ItemModel, "fm_tag")] is statement
+    assert junk and tool and junk != tool
+
+
+def test_loot_table_loads_in_one_statement():
+    with session_scope() as session, count_queries() as statements:
+        table = as_loottable(LootTableModel.get_fm_name(session, Monster.GOBLIN))
+
+    assert len(statements) == 1
+    assert table.weights == LOOT_TABLES[Monster.GOBLIN].weights
+    assert table.all_loot == LOOT_TABLES[Monster.GOBLIN].all_loot
+
+
+@pytest.mark.parametrize("query, arg", [
+    (ItemModel.gets_fm_tag, Tag.JUNK),
+    (ItemModel.gets_fm_quality, Quality.COMMON),
+    (ItemModel.gets_fm_materialtype, MaterialType.STEEL),
+    (LootTableModel.gets_monster_fm_item, ItemName.TOOLBOX),
+    (LootTableModel.gets_monster_fm_tag, Tag.JUNK),
+])
+def test_gets_fm_uses_indexes(query, arg):
+    with session_scope() as session:
+        with count_queries() as statements:
+            query(session, arg)
+
+        connection = session.connection().connection.dbapi_connection
+
+        for statement, params in statements:
+            plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", params)]
+
+            assert plan, statement
+            assert not [step for step in plan if step.startswith("SCAN")], (statement, plan)
+
+
+@pytest.mark.parametrize("item", [ItemName.TOOLBOX, ItemName.SAW, ItemName.BOTTLE_CAP])
+def test_gets_monster_fm_item_matches_loot_tables(item):
+    tags = set(next(i for i in ITEMS.values() if i.name == item).tags)
+    expected = {
+        monster for monster, table in LOOT_TABLES.items()
+        if item in table.all_loot or tags.intersection(table.all_loot)
+    }
+
+    with session_scope() as session:
+        assert set(LootTableModel.gets_monster_fm_item(session, item)) == expected
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import create_engine
+
+from _db_synthetic import generate_catalog
+from _db_utils import SingletonModelBase
+from item_manager import ItemManager
+from loot_manager import LootManager
+from simulation import simulate_encounters
+
+
+def test_generate_catalog_is_reproducible():
+    first, second = generate_catalog(items=200, seed=1), generate_catalog(items=200, seed=1)
+
+    assert [item.name for item in first.items] == [item.name for item in second.items]
+    assert [table.weights for table in first.loot_tables] == [table.weights for table in second.loot_tables]
+    assert all(sum(table.weights) == 100 for table in first.loot_tables)
+
+
+def test_generate_catalog_past_the_enums():
+    catalog = generate_catalog(items=10, tags=30, materials=30, monsters=10)
+
+    assert len(catalog.tags) == 30 and catalog.tags[-1] == "Tag 29"
+    assert len(catalog.materials) == 30 and len(catalog.monsters) == 10
+
+
+@pytest.fixture
+def synthetic(tmp_path, serve_database):
+    path = tmp_path / "synthetic.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SingletonModelBase.get_instance().metadata.create_all(engine)
+
+    catalog = generate_catalog(items=500, tags=40, monsters=8)
+    catalog.build(engine)
+    engine.dispose()
+
+    serve_database(path)
+    return catalog
+
+
+def test_synthetic_catalog_loads_through_the_managers(synthetic):
+    assert len(ItemManager.catalog()) == len(synthetic.items)
+    assert ItemManager.Item.get_fm_name("Item 7").name == "Item 7"
+
+    monster = synthetic.monsters[-1]
+    table = LootManager.Tables.get_fm_name(monster)
+    assert table.all_loot == synthetic.loot_tables[-1].all_loot
+
+    inventory = table.encounter_by_level(1_000)
+    assert sum(inventory.items.values()) == 1_000
+    assert inventory.currency
+
+
+def test_simulation_over_a_synthetic_catalog(synthetic):
+    inventory = simulate_encounters(2_000, seed=3, workers=3, bestiary=synthetic.monsters, mob_level_max=5)
+
+    assert set(inventory.items) <= {item.name for item in synthetic.items}
+    assert inventory.currency
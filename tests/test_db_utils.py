@@ -0,0 +1,151 @@
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import _db_utils
+from _db_models import MonsterModel
+from _db_utils import EngineProfile, session_scope, shared_session
+from enums import Monster
+
+
+def test_shared_session_is_reused_on_the_thread():
+    with shared_session() as shared:
+        with session_scope() as first, session_scope(read_only=True) as second:
+            assert first is shared and second is shared
+
+    with session_scope() as session:
+        assert session is not shared
+
+
+def test_read_only_session_discards_writes():
+    with session_scope(read_only=True) as session:
+        session.add(MonsterModel(name="Mimic"))
+        MonsterModel.get_fm_name(session, Monster.GOBLIN)
+
+    with session_scope(read_only=True) as session:
+        assert MonsterModel.get_fm_name(session, "Mimic") is None
+
+
+def test_forked_children_open_their_own_connections():
+    with session_scope(read_only=True) as session:
+        inherited = session.connection().connection.dbapi_connection
+
+    if (pid := os.fork()) == 0:
+        try:
+            with session_scope(read_only=True) as session:
+                own = session.connection().connection.dbapi_connection
+                found = MonsterModel.get_fm_name(session, Monster.GOBLIN) is not None
+
+            os._exit(0 if own is not inherited and found else 1)
+
+        except BaseException:
+            os._exit(2)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    with session_scope(read_only=True) as session:
+        assert session.connection().connection.dbapi_connection is inherited
+
+
+def test_writes_inside_a_read_only_share_are_committed(copied_database):
+    with shared_session(read_only=True) as shared:
+        with session_scope() as session:
+            assert session is not shared
+            session.add(MonsterModel(name="Mimic"))
+
+        with shared_session() as writable:
+            assert writable is not shared
+
+    with session_scope() as session:
+        assert MonsterModel.get_fm_name(session, "Mimic") is not None
+
+
+def test_read_only_share_sees_each_commit(copied_database):
+    with shared_session(read_only=True) as shared:
+        assert MonsterModel.get_fm_name(shared, "Mimic") is None
+
+        # Committed by another connection between two lookups of the share.
+        with sqlite3.connect(copied_database) as conn:
+            conn.execute("INSERT INTO \"Monsters\" (name) VALUES ('Mimic')")
+
+        conn.close()
+        assert MonsterModel.get_fm_name(shared, "Mimic") is not None
+
+
+def test_engine_profile_from_env():
+    assert EngineProfile.from_env({}) == EngineProfile()
+    assert EngineProfile.from_env({"INVENTORY_DB_PROFILE": "tuned"}) == EngineProfile.tuned()
+
+    profile = EngineProfile.from_env({
+        "INVENTORY_DB_PROFILE": "tuned",
+        "INVENTORY_DB_BUSY_TIMEOUT": "100",
+        "INVENTORY_DB_READ_ONLY_URI": "false",
+    })
+    assert profile.busy_timeout == 100
+    assert not profile.read_only_uri
+
+
+@pytest.fixture
+def tuned(copied_database):
+    """
+    The copied database served with `EngineProfile.tuned`.
+    """
+    profile = _db_utils.PROFILE
+    _db_utils.configure(profile=EngineProfile.tuned())
+    yield copied_database
+    _db_utils.configure(profile=profile)
+
+
+def _pragmas(conn) -> dict:
+    names = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+    return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def test_tuned_pragmas_are_applied_on_connect(tuned):
+    expected = {
+        "journal_mode": "wal", "synchronous": 1, "cache_size": -64_000,
+        "mmap_size": 256 * 1024 * 1024, "temp_store": 2, "busy_timeout": 5_000,
+    }
+
+    with _db_utils.get_engine().connect() as conn:
+        assert _pragmas(conn) == expected
+
+    # The writer above switched the file to WAL, the read-only reader sees it too.
+    with session_scope(read_only=True) as session:
+        assert _pragmas(session.connection()) == expected
+
+
+def test_read_only_uri_rejects_writes(tuned):
+    with session_scope(read_only=True) as session:
+        with pytest.raises(OperationalError, match="readonly"):
+            session.execute(text('INSERT INTO "Monsters" (name) VALUES (\'Mimic\')'))
+
+
+def test_readers_alone_leave_the_journal_mode(tuned):
+    with session_scope(read_only=True) as session:
+        MonsterModel.get_fm_name(session, Monster.GOBLIN)
+
+    with sqlite3.connect(tuned) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+
+    conn.close()
+
+    with _db_utils.get_engine().connect():
+        pass
+
+    with sqlite3.connect(tuned) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    conn.close()
+
+
+def test_engine_profile_pragmas():
+    profile = EngineProfile(journal_mode="WAL", busy_timeout=100)
+
+    assert profile.pragmas() == ["PRAGMA journal_mode = WAL", "PRAGMA busy_timeout = 100"]
+    assert profile.pragmas(read_only=True) == ["PRAGMA busy_timeout = 100"]
+    assert EngineProfile().pragmas() == []
@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import Dict
+import subprocess
+import sys
+
+import pytest
+
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Heavy packages each domain module must leave unloaded. SQLAlchemy is imported on the
+# first query, NumPy only by the modules on the loot path.
+DEFERRED = {
+    "currency"          : ("numpy", "sqlalchemy"),
+    "enums"             : ("numpy", "sqlalchemy"),
+    "inventory"         : ("numpy", "sqlalchemy"),
+    "item"              : ("numpy", "sqlalchemy"),
+    "item_catalog"      : ("numpy", "sqlalchemy"),
+    "material"          : ("numpy", "sqlalchemy"),
+    "item_manager"      : ("numpy", "sqlalchemy"),
+    "catalog_artifact"  : ("numpy", "sqlalchemy"),
+    "loot"              : ("sqlalchemy",),
+    "loot_manager"      : ("sqlalchemy",),
+    "simulation"        : ("sqlalchemy",),
+    "main"              : ("sqlalchemy",),
+}
+
+# Cumulative `-X importtime` budgets, in multiples of a bare interpreter importing the
+# stdlib modules of `BASELINE`, so a slower machine gets a larger budget. Loading
+# SQLAlchemy costs about eleven baselines and blows every budget, NumPy about three.
+BASELINE = ("dataclasses", "decimal", "json", "typing")
+BUDGETS = {module: 10 if "numpy" not in deferred else 4 for module, deferred in DEFERRED.items()}
+
+
+def import_in_subprocess(module: str, code: str = "") -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}\n{code}"],
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def import_times(modules) -> Dict[str, int]:
+    """
+    Cumulative microseconds of each top level import of `modules` in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    times = {}
+
+    # "import time: self [us] | cumulative | imported package", nested imports indented.
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+
+    return times
+
+
+@pytest.fixture(scope="module")
+def baseline() -> int:
+    # The slowest of three runs, the budgets err on the generous side.
+    return max(sum(import_times(BASELINE)[module] for module in BASELINE) for _ in range(3))
+
+
+@pytest.mark.parametrize("module, budget", BUDGETS.items())
+def test_import_time_budget(module, budget, baseline):
+    # The fastest of three runs, a busy machine should not fail a module within budget.
+    cumulative = min(import_times((module,))[module] for _ in range(3))
+
+    assert cumulative <= budget * baseline, f"{module} took {cumulative / 1000:.0f}ms, {cumulative / baseline:.1f} baselines"
+
+
+@pytest.mark.parametrize("module, deferred", DEFERRED.items())
+def test_domain_modules_defer_heavy_imports(module, deferred):
+    stdout = import_in_subprocess(module, f"print(sorted({{m.split('.')[0] for m in sys.modules}} & {set(deferred)}))")
+
+    assert stdout.strip() == "[]"
+
+
+def test_engines_are_created_on_first_use():
+    stdout = import_in_subprocess("_db_utils", "\n".join((
+        "print(_db_utils.ENGINE is None)",
+        "_db_utils.get_engine()",
+        "print(_db_utils.ENGINE is not None)",
+    )))
+
+    assert stdout.split() == ["True", "True"]
@@ -0,0 +1,238 @@
+from dataclasses import FrozenInstanceError
+import sqlite3
+
+import pytest
+from sqlalchemy.orm.exc import NoResultFound
+
+import _db_utils
+import item_manager
+from enums import ItemName, MaterialType, Quality, Tag
+from item_manager import as_item, ItemManager
+
+
+def test_catalog_indexes():
+    catalog = ItemManager.catalog()
+
+    assert ItemManager.Item.TRASH is catalog.by_name[ItemName.TRASH]
+    assert ItemManager.Item[ItemName.TRASH] is catalog.by_name[ItemName.TRASH]
+    assert all(Tag.JUNK in item.tags for item in ItemManager.gets_fm_tag(Tag.JUNK))
+    assert all(item.quality == Quality.COMMON for item in ItemManager.gets_fm_quality(Quality.COMMON))
+    assert all(
+        MaterialType.WOOD in (m.name for m in item.composition)
+        for item in ItemManager.gets_fm_materialtype(MaterialType.WOOD)
+    )
+    assert Tag.JUNK in ItemManager.get_fm_tag_random(Tag.JUNK).tags
+
+
+def test_catalog_items_are_immutable():
+    item = ItemManager.Item.TRASH
+
+    with pytest.raises(FrozenInstanceError):
+        item.value = 1
+
+    with pytest.raises(AttributeError):
+        item.tags.append(Tag.TREASURE)
+
+    with pytest.raises(TypeError):
+        ItemManager.catalog().by_name[ItemName.TRASH] = item
+
+
+def test_catalog_reload_swaps_snapshot():
+    old = ItemManager.catalog()
+    new = ItemManager.reload()
+
+    assert new is not old
+    assert new is ItemManager.catalog()
+    assert len(old) == len(new)
+    assert old.by_name[ItemName.TRASH] == new.by_name[ItemName.TRASH]
+
+
+def test_catalog_invalidated_while_loading_is_not_kept(monkeypatch):
+    converted = []
+
+    def convert(row):
+        if not converted:
+            ItemManager.invalidate()
+
+        converted.append(row)
+        return as_item(row)
+
+    monkeypatch.setattr(item_manager, "as_item", convert)
+
+    assert len(ItemManager.reload()) == len(converted)
+    assert ItemManager._catalog is None
+
+
+def test_catalog_missing_key():
+    with pytest.raises(AttributeError):
+        ItemManager.Item.FLARP
+
+    with pytest.raises(NoResultFound):
+        ItemManager.Item.get_fm_name("Flarp")
+
+    with pytest.raises(NoResultFound):
+        ItemManager.Item.get_fm_id(-1)
+
+    with pytest.raises(KeyError):
+        ItemManager.get_fm_tag_random(Tag.MECHANICAL)
+
+
+def test_sample_fm_tag():
+    junk = {item.name for item in ItemManager.gets_fm_tag(Tag.JUNK)}
+
+    assert {item.name for item in ItemManager.sample_fm_tag(Tag.JUNK, 50, replace=True)} <= junk
+    assert {item.name for item in ItemManager.sample_fm_tag(Tag.JUNK, len(junk))} == junk
+
+    with pytest.raises(ValueError):
+        ItemManager.sample_fm_tag(Tag.JUNK, len(junk) + 1)
+
+
+def test_search_ranks_matching_text():
+    assert ItemManager.search("rusty nail")[0].name == ItemName.RUSTY_NAIL
+    assert ItemManager.search("rust")[0].name == ItemName.RUSTY_NAIL
+    assert len(ItemManager.search("goblin", limit=2)) == 2
+
+    uncommon = ItemManager.search("goblin", quality=Quality.UNCOMMON)
+    assert {item.name for item in uncommon} == {ItemName.JADE_EARRING, ItemName.RUNED_STONE}
+    assert all(Tag.JUNK in item.tags for item in ItemManager.search("small", tag=Tag.JUNK))
+
+
+def test_search_without_words():
+    assert ItemManager.search("") == []
+    assert ItemManager.search('" ( -') == []
+
+
+def _add_item_behind_the_catalog(path, name: str, description: str) -> None:
+    # Written by another connection, nothing is published to the caches.
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            'INSERT INTO "Items" (name, weight, value, description, quality_id, craftable) VALUES (?, 1, 1, ?, 1, 0)',
+            (name, description)
+        )
+
+    conn.close()
+
+
+def test_catalog_reads_only_changed_items_again(copied_database, monkeypatch):
+    from _db_models import ItemModel
+
+    before = ItemManager.catalog()
+    monkeypatch.setattr(ItemManager, "reload", lambda: pytest.fail("Reloaded the whole catalog"))
+
+    with _db_utils.session_scope() as session:
+        ItemModel.get_fm_name(session, ItemName.TOOLBOX).value += 1
+        ItemModel.get_fm_name(session, ItemName.TRASH).name = "Rubbish"
+
+    after = ItemManager.catalog()
+
+    assert after.by_name[ItemName.TOOLBOX].value == before.by_name[ItemName.TOOLBOX].value + 1
+    assert "Rubbish" in after.by_name and ItemName.TRASH not in after.by_name
+    assert after.by_name[ItemName.RUSTY_NAIL] is before.by_name[ItemName.RUSTY_NAIL]
+    assert list(after.by_id) == list(before.by_id)
+
+
+def test_search_does_not_load_the_catalog(copied_database):
+    assert ItemManager.search("rusty nail")[0].name == ItemName.RUSTY_NAIL
+    assert ItemManager._catalog is None
+
+
+def test_search_finds_items_newer_than_the_catalog(copied_database):
+    ItemManager.catalog()
+    _add_item_behind_the_catalog(copied_database, "Zorblax", "A zorblax gadget.")
+
+    assert [item.name for item in ItemManager.search("zorblax")] == ["Zorblax"]
+
+
+def test_query_without_the_catalog(copied_database):
+    query = ItemManager.query().any_tag(Tag.JUNK).order_by("value")
+    page = query.page(5)
+
+    assert [item.name for item in query.all()] == [name for (name,) in query.select("name")]
+    assert [item.name for item in page.items] == [name for (name,) in query.select("name")[:5]]
+    assert ItemManager._catalog is None
+
+
+def test_query_finds_items_newer_than_the_catalog(copied_database):
+    ItemManager.catalog()
+    _add_item_behind_the_catalog(copied_database, "Zorblax", "A zorblax gadget.")
+    query = ItemManager.query().order_by("id", descending=True)
+
+    assert query.all()[0].name == "Zorblax"
+    assert query.page(1).items[0].name == "Zorblax"
+
+
+def test_query_matches_filtering_the_catalog():
+    items = ItemManager.catalog().items
+    query = (
+        ItemManager.query()
+        .any_tag(Tag.TOOL, Tag.JUNK)
+        .of_material(MaterialType.WOOD, MaterialType.IRON, MaterialType.STEEL)
+        .value_between(10, 20_000)
+        .order_by("value")
+    )
+    expected = sorted(
+        (
+            item for item in items
+            if {Tag.TOOL, Tag.JUNK} & set(item.tags)
+            and {MaterialType.WOOD, MaterialType.IRON, MaterialType.STEEL} & {m.name for m in item.composition}
+            and 10 <= item.value <= 20_000
+        ),
+        key=lambda item: item.value
+    )
+
+    assert expected and query.all() == expected
+    assert query.only_craftable().all() == [item for item in expected if item.craftable]
+    assert ItemManager.query().all_tags(Tag.TOOL, Tag.CONSTRUCTION).all() == [
+        item for item in items if {Tag.TOOL, Tag.CONSTRUCTION} <= set(item.tags)
+    ]
+    assert ItemManager.query().named(ItemName.TOOLBOX, ItemName.TRASH).all() == [
+        item for item in items if item.name in (ItemName.TOOLBOX, ItemName.TRASH)
+    ]
+    assert ItemManager.query(qualities=(Quality.POOR,)).weight_between(high=100).all() == [
+        item for item in items if item.quality == Quality.POOR and item.weight <= 100
+    ]
+
+
+def test_query_pages_and_streams_in_order():
+    query = ItemManager.query().order_by("weight", descending=True)
+    pages, after = [], None
+
+    while True:
+        page = query.page(5, after)
+        pages.extend(page.items)
+
+        if (after := page.after) is None:
+            break
+
+    # Ties are broken by id, descending along with the weight.
+    assert pages == query.all() == sorted(ItemManager.catalog().items, key=lambda item: item.weight)[::-1]
+    assert [item.name for item in query.stream(chunk_size=4)] == [item.name for item in pages]
+
+    with pytest.raises(ValueError):
+        query.order_by("flavor_text")
+
+
+def test_projections_match_the_catalog():
+    items = ItemManager.catalog().items
+    junk = [item for item in items if Tag.JUNK in item.tags]
+
+    assert ItemManager.select(("name", "value", "quality", "craftable")) == [
+        (item.name, item.value, item.quality, item.craftable) for item in items
+    ]
+    assert ItemManager.query().any_tag(Tag.JUNK).order_by("weight").select("weight") == sorted(
+        (item.weight,) for item in junk
+    )
+
+    for loaded in (True, False):
+        if not loaded:
+            ItemManager.invalidate()
+
+        assert ItemManager.names_fm_tag(Tag.JUNK) == [item.name for item in junk]
+        assert ItemManager.values_fm_tag(Tag.JUNK) == [item.value for item in junk]
+        assert ItemManager.names_fm_tag("Not a tag") == []
+        assert ItemManager.values_fm_names((ItemName.TOOLBOX, "Not an item")) == {
+            ItemName.TOOLBOX: ItemManager.Item.TOOLBOX.value
+        }
+
+    with pytest.raises(ValueError):
+        ItemManager.select(("name", "tags"))
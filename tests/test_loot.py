@@ -0,0 +1,140 @@
+from collections import Counter
+import random
+
+import numpy as np
+import pytest
+
+import loot
+
+from enums import ItemName, LootKind, Monster, Tag
+from inventory import Inventory
+from item_manager import ItemManager
+from loot import ITEM_IDS, LootTable
+from sampler import AliasTable
+
+
+DRAWS = 100_000
+
+
+@pytest.fixture
+def goblin():
+    return LootTable(
+        creature=Monster.GOBLIN,
+        weights=[10, 30, 60],
+        all_loot=[ItemName.TOOLBOX, ItemName.SAW, Tag.JUNK]
+    )
+
+
+def test_plain_names_keep_their_kind(monkeypatch):
+    monkeypatch.setattr(loot, "ITEM_IDS", dict(ITEM_IDS))
+    monkeypatch.setattr(ItemManager, "names_fm_tag", lambda tag: ["Shared Item"] if tag == "Shared" else [])
+
+    # An item and a tag of one name, only the tag entry is pooled by tag.
+    table = LootTable(Monster.GOBLIN, [50, 50], ["Shared", "Shared"], [LootKind.ITEM, LootKind.TAG])
+    assert table.compiled.pools == [["Shared"], ["Shared Item"]]
+
+    with pytest.raises(ValueError):
+        LootTable(Monster.GOBLIN, [100], ["Shared"])
+
+
+def test_alias_table_matches_weights():
+    weights = [1, 2, 7, 15, 15, 60]
+    table = AliasTable(weights)
+    counts = Counter(table.draw() for _ in range(DRAWS))
+
+    for i, w in enumerate(weights):
+        assert counts[i] / DRAWS == pytest.approx(w / 100, abs=0.01)
+
+
+def test_alias_table_rejects_bad_weights():
+    with pytest.raises(ValueError):
+        AliasTable([])
+
+    with pytest.raises(ValueError):
+        AliasTable([0, 0])
+
+
+def test_loot_pools_are_compiled_once(goblin):
+    assert goblin.compiled is goblin.compiled
+    assert goblin.compiled.pools[0] == [ItemName.TOOLBOX]
+    assert ItemName.TRASH in goblin.compiled.pools[2]
+
+
+def test_loot_matches_weights(goblin):
+    counts = Counter(goblin.loot for _ in range(DRAWS))
+    junk = sum(n for item, n in counts.items() if item in goblin.compiled.pools[2])
+
+    assert counts[ItemName.TOOLBOX] / DRAWS == pytest.approx(0.10, abs=0.01)
+    assert counts[ItemName.SAW] / DRAWS == pytest.approx(0.30, abs=0.01)
+    assert junk / DRAWS == pytest.approx(0.60, abs=0.01)
+
+
+def test_roll_many_matches_weights(goblin):
+    counts = goblin.roll_many(DRAWS, counts=True)
+    junk = sum(counts[ITEM_IDS[item]] for item in goblin.compiled.pools[2])
+
+    assert counts.sum() == DRAWS
+    assert counts[ITEM_IDS[ItemName.TOOLBOX]] / DRAWS == pytest.approx(0.10, abs=0.01)
+    assert counts[ITEM_IDS[ItemName.SAW]] / DRAWS == pytest.approx(0.30, abs=0.01)
+    assert junk / DRAWS == pytest.approx(0.60, abs=0.01)
+
+
+def test_roll_many_is_seedable(goblin):
+    first = goblin.roll_many(1000, rng=np.random.default_rng(7))
+    second = goblin.roll_many(1000, rng=np.random.default_rng(7))
+
+    assert (first == second).all()
+
+
+def test_roll_many_counts_fill_inventory(goblin):
+    counts = goblin.roll_many(50, counts=True)
+    inventory = Inventory().add_item_counts(counts)
+
+    assert sum(inventory.items.values()) == 50
+
+
+def test_encounter_by_level_matches_reference(goblin):
+    level = 1_000
+    aggregate = goblin.encounter_by_level(level, rng=np.random.default_rng(7))
+
+    # The reference rolls each level with the `random` module.
+    random.seed(7)
+    reference = goblin.encounter_by_level(level, aggregate=False)
+
+    assert sum(aggregate.items.values()) == sum(reference.items.values()) == level
+    assert aggregate.currency == reference.currency
+
+    for item in (ItemName.TOOLBOX, ItemName.SAW):
+        assert aggregate.items[item] / level == pytest.approx(reference.items[item] / level, abs=0.06)
+
+
+def test_encounter_by_level_rejects_level_zero(goblin):
+    with pytest.raises(ValueError):
+        goblin.encounter_by_level(0)
+
+
+def test_creature_value_is_the_expected_item_value(goblin):
+    catalog = ItemManager.catalog()
+    junk = [item.value for item in catalog.gets_fm_tag(Tag.JUNK)]
+    expected = catalog.by_name[ItemName.TOOLBOX].value + catalog.by_name[ItemName.SAW].value + sum(junk) / len(junk)
+
+    assert goblin.creature_value == int(expected) // 1000
+
+
+def test_creature_value_is_cached_until_the_items_reload(goblin, monkeypatch):
+    value = goblin.creature_value
+    values_fm_names = ItemManager.values_fm_names
+    monkeypatch.setattr(ItemManager, "values_fm_names", lambda names: {
+        name: item_value + 1_000_000 for name, item_value in values_fm_names(names).items()
+    })
+
+    assert goblin.creature_value == value
+
+    ItemManager.invalidate()
+    assert goblin.creature_value == value + 2_000
+
+    monkeypatch.undo()
+    assert goblin.creature_value == value + 2_000
+
+    ItemManager.reload()
+    assert goblin.creature_value == value
@@ -0,0 +1,22 @@
+from simulation import simulate_encounters
+
+
+def test_simulation_is_reproducible():
+    first = simulate_encounters(2000, seed=7, workers=2, mob_level_max=5)
+    second = simulate_encounters(2000, seed=7, workers=2, mob_level_max=5)
+
+    assert first.items == second.items
+    assert first.currency == second.currency
+
+
+def test_simulation_seeds_differ():
+    first = simulate_encounters(2000, seed=7, workers=2, mob_level_max=5)
+    second = simulate_encounters(2000, seed=8, workers=2, mob_level_max=5)
+
+    assert first.items != second.items
+
+
+def test_simulation_drops_one_item_per_level():
+    inventory = simulate_encounters(500, seed=1, workers=3)
+
+    assert sum(inventory.items.values()) == 500